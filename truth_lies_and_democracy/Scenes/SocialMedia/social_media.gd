@@ -28,10 +28,11 @@ func load_posts():
 	last_loaded_round = Manager.current_round
 
 	var active_stories:Array[int] = []
-	for story_group in DataLoader.StoryGroup_array:
-		if story_group.group_id == Manager.current_round:
-			active_stories = story_group.stories
-	for post_group in DataLoader.MediaPostGroup_array:
+	var story_group = DataLoader.StoryGroup_by_group_id.get(Manager.current_round)
+	if story_group:
+		active_stories = story_group.stories
+	var post_group = DataLoader.MediaPostGroup_by_group_id.get(Manager.current_round)
+	if post_group:
 		for story_post in post_group.story_posts_resolved:
 			if not story_post.story_id in active_stories:
 				continue
@@ -8,6 +8,32 @@ static var MediaPostGroup_array:Array[GeneratedDataClasses.MediaPostGroup] = []
 static var StoryPosts_array:Array[GeneratedDataClasses.StoryPosts] = []
 static var SocialMediaPost_array:Array[GeneratedDataClasses.SocialMediaPost] = []
 
+# Lookups kept after loading: {id: object} for types with a unique id field, and
+# {value: Array of objects} for the fields listed under `index:` in the schema,
+# where an array field is indexed by each of its elements
+static var StoryGroup_by_group_id:Dictionary = {}
+static var StoryGroup_by_stories:Dictionary = {}
+static var Story_by_story_id:Dictionary = {}
+static var MediaPostGroup_by_group_id:Dictionary = {}
+static var MediaPostGroup_by_story_posts:Dictionary = {}
+static var StoryPosts_by_story_id:Dictionary = {}
+static var SocialMediaPost_by_post_id:Dictionary = {}
+
+static func _clear() -> void:
+	"""Empty the arrays and lookups, so that loading again does not keep the objects of the last load"""
+	StoryGroup_array.clear()
+	StoryGroup_by_group_id.clear()
+	StoryGroup_by_stories.clear()
+	Story_array.clear()
+	Story_by_story_id.clear()
+	MediaPostGroup_array.clear()
+	MediaPostGroup_by_group_id.clear()
+	MediaPostGroup_by_story_posts.clear()
+	StoryPosts_array.clear()
+	StoryPosts_by_story_id.clear()
+	SocialMediaPost_array.clear()
+	SocialMediaPost_by_post_id.clear()
+
 static func _load_data(json_path: String, external_data: Dictionary = {}) -> Dictionary:
 	""" [WARN] Do not use this function directly! """
 	var file = FileAccess.open(json_path, FileAccess.READ)
@@ -41,6 +67,10 @@ static func _load_data(json_path: String, external_data: Dictionary = {}) -> Dic
 			if entry.has("group_id"):
 				var id_val:int = entry["group_id"]
 				storygroup_by_id[id_val] = obj
+				StoryGroup_by_group_id[id_val] = obj
+			if obj.stories != null:
+				for value in obj.stories:
+					StoryGroup_by_stories.get_or_add(value, []).append(obj)
 		result["StoryGroup"] = storygroup_list
 		all_objects["StoryGroup"] = storygroup_by_id
 
@@ -57,6 +87,7 @@ static func _load_data(json_path: String, external_data: Dictionary = {}) -> Dic
 			if entry.has("story_id"):
 				var id_val:int = entry["story_id"]
 				story_by_id[id_val] = obj
+				Story_by_story_id[id_val] = obj
 		result["Story"] = story_list
 		all_objects["Story"] = story_by_id
 
@@ -73,6 +104,10 @@ static func _load_data(json_path: String, external_data: Dictionary = {}) -> Dic
 			if entry.has("group_id"):
 				var id_val:int = entry["group_id"]
 				mediapostgroup_by_id[id_val] = obj
+				MediaPostGroup_by_group_id[id_val] = obj
+			if obj.story_posts != null:
+				for value in obj.story_posts:
+					MediaPostGroup_by_story_posts.get_or_add(value, []).append(obj)
 		result["MediaPostGroup"] = mediapostgroup_list
 		all_objects["MediaPostGroup"] = mediapostgroup_by_id
 
@@ -89,6 +124,8 @@ static func _load_data(json_path: String, external_data: Dictionary = {}) -> Dic
 			if entry.has("story_id"):
 				var id_val:int = entry["story_id"]
 				storyposts_by_id[id_val] = obj
+			if obj.story_id != null:
+				StoryPosts_by_story_id.get_or_add(obj.story_id, []).append(obj)
 		result["StoryPosts"] = storyposts_list
 		all_objects["StoryPosts"] = storyposts_by_id
 
@@ -105,6 +142,7 @@ static func _load_data(json_path: String, external_data: Dictionary = {}) -> Dic
 			if entry.has("post_id"):
 				var id_val:int = entry["post_id"]
 				socialmediapost_by_id[id_val] = obj
+				SocialMediaPost_by_post_id[id_val] = obj
 		result["SocialMediaPost"] = socialmediapost_list
 		all_objects["SocialMediaPost"] = socialmediapost_by_id
 
@@ -200,13 +238,60 @@ static func _validate_references(all_objects: Dictionary, _external_data: Dictio
 
 static var full_data:Dictionary = {}
 
+static func _check_uniqueness(type_name: String, objects: Array, path: String, first_seen: Dictionary) -> void:
+	"""Warn about unique values seen before, in this file or an earlier one, with where they were first seen"""
+	if type_name == "StoryGroup":
+		var seen_group_id: Dictionary = first_seen.get_or_add("StoryGroup.group_id", {})
+		for i in objects.size():
+			var value = objects[i].group_id
+			if value == null:
+				continue
+			var location = "%s[%d]" % [path, i]
+			var first = seen_group_id.get_or_add(value, location)
+			if first != location:
+				push_warning("Uniqueness error: StoryGroup[%d].group_id '%s' in %s was first seen at %s" % [i, str(value), path, first])
+	if type_name == "Story":
+		var seen_story_id: Dictionary = first_seen.get_or_add("Story.story_id", {})
+		for i in objects.size():
+			var value = objects[i].story_id
+			if value == null:
+				continue
+			var location = "%s[%d]" % [path, i]
+			var first = seen_story_id.get_or_add(value, location)
+			if first != location:
+				push_warning("Uniqueness error: Story[%d].story_id '%s' in %s was first seen at %s" % [i, str(value), path, first])
+	if type_name == "MediaPostGroup":
+		var seen_group_id: Dictionary = first_seen.get_or_add("MediaPostGroup.group_id", {})
+		for i in objects.size():
+			var value = objects[i].group_id
+			if value == null:
+				continue
+			var location = "%s[%d]" % [path, i]
+			var first = seen_group_id.get_or_add(value, location)
+			if first != location:
+				push_warning("Uniqueness error: MediaPostGroup[%d].group_id '%s' in %s was first seen at %s" % [i, str(value), path, first])
+	if type_name == "SocialMediaPost":
+		var seen_post_id: Dictionary = first_seen.get_or_add("SocialMediaPost.post_id", {})
+		for i in objects.size():
+			var value = objects[i].post_id
+			if value == null:
+				continue
+			var location = "%s[%d]" % [path, i]
+			var first = seen_post_id.get_or_add(value, location)
+			if first != location:
+				push_warning("Uniqueness error: SocialMediaPost[%d].post_id '%s' in %s was first seen at %s" % [i, str(value), path, first])
+
 static func load_multiple_files(file_paths: Array[String]) -> void:
+	_clear()
 	var combined = {}
 	var external_lookup = {}
+	# "Type.field" -> {value: "path[index]" where it was first seen}
+	var first_seen = {}
 	
 	for path in file_paths:
 		var data = _load_data(path, external_lookup)
 		for type_name in data.keys():
+			_check_uniqueness(type_name, data[type_name], path, first_seen)
 			if not combined.has(type_name):
 				combined[type_name] = []
 			combined[type_name].append_array(data[type_name])
@@ -225,4 +310,4 @@ static func load_multiple_files(file_paths: Array[String]) -> void:
 					lookup[obj.post_id] = obj
 			external_lookup[type_name] = lookup
 	
-	full_data = combined
+	full_data = combined
\ No newline at end of file
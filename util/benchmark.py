@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the generated pipeline scripts
+Builds synthetic data from the schema and times the generated tools on it
+"""
+import contextlib
+import importlib.util
+import inspect
+import io
+import json
+import tempfile
+import time
+import tracemalloc
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import openpyxl
+
+from schema_cache import load_schema
+
+UTIL_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = UTIL_DIR / "scripts"
+SCHEMA_PATH = UTIL_DIR / "schema.yaml"
+
+
+def load_script(path: Path):
+    """Import a generated script as a module"""
+    # The generated scripts import their shared modules (dataset) from their own directory
+    if str(path.parent) not in sys.path:
+        sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)  # pyright: ignore[reportArgumentType]
+    # Registered so worker processes can unpickle functions from it
+    sys.modules[path.stem] = module
+    spec.loader.exec_module(module)  # pyright: ignore[reportOptionalMemberAccess]
+    return module
+
+
+def forget_loaded(module, path: Path) -> None:
+    """Drop the dataset a script keeps for path in its process, so that the next
+    run parses the file again, as a run of its own would"""
+    forget = getattr(module, "forget_dataset", None)
+    if forget is not None:
+        forget(str(path))
+
+
+def synthetic_cell(field_type: str, row: int) -> Any:
+    """Cell value as an editor would type it into the workbook"""
+    if field_type == 'int':
+        return row
+    elif field_type == 'float':
+        return row + 0.5
+    elif field_type == 'bool':
+        return "TRUE" if row % 2 else "FALSE"
+    elif field_type.startswith('array<'):
+        return ", ".join(str(row + i) for i in range(3))
+    return f"Synthetic text for row {row}, long enough to look like real content"
+
+
+def synthetic_value(field_type: str, row: int) -> Any:
+    """Field value as it appears in the JSON data"""
+    if field_type == 'int':
+        return row
+    elif field_type == 'float':
+        return row + 0.5
+    elif field_type == 'bool':
+        return bool(row % 2)
+    elif field_type.startswith('array<'):
+        return [row + i for i in range(3)]
+    return f"Synthetic text for row {row}, long enough to look like real content"
+
+
+def fit_constraints(value: Any, field_def: Dict) -> Any:
+    """Trim synthetic strings to the field's max_length, and arrays whose elements
+    are unique across entries to the row's own element"""
+    if 'unique_elements' in field_def.get('constraints', []) and isinstance(value, list):
+        value = value[:1]
+    for constraint in field_def.get('constraints', []):
+        if isinstance(constraint, dict) and 'max_length' in constraint and isinstance(value, str):
+            value = value[:constraint['max_length']]
+    return value
+
+
+def build_workbook(schema: Dict, type_names: List[str], rows: int) -> Path:
+    """Write (and reuse) a workbook with one sheet of synthetic rows per type"""
+    path = Path(tempfile.gettempdir()) / f"bench_{'_'.join(type_names)}_{rows}.xlsx"
+    if path.exists():
+        return path
+
+    wb = openpyxl.Workbook(write_only=True)
+    for type_name in type_names:
+        fields = schema['types'][type_name]['fields']
+        ws = wb.create_sheet(type_name)
+        ws.append(list(fields.keys()))
+        ws.append([field_def.get('description', '') for field_def in fields.values()])
+        for row in range(1, rows + 1):
+            ws.append([synthetic_cell(field_def['type'], row) for field_def in fields.values()])
+    wb.save(path)
+    return path
+
+
+class _RowSource:
+    """Stands in for a worksheet whose rows are already in memory"""
+    def __init__(self, rows: List[tuple]):
+        self.rows = rows
+
+    def iter_rows(self, values_only: bool = True):
+        return iter(self.rows)
+
+
+def bench_excel(type_name: str, rows: int, script_path: Path) -> None:
+    schema = load_schema(str(SCHEMA_PATH))[0]
+    xlsx_path = build_workbook(schema, [type_name], rows)
+    converter = load_script(script_path)
+    output_path = Path(tempfile.gettempdir()) / "bench_output.json"
+
+    print(f"excel_to_json: {script_path} on {rows} {type_name} rows")
+
+    start = time.perf_counter()
+    converter.excel_to_json(str(xlsx_path), str(output_path))
+    elapsed = time.perf_counter() - start
+    print(f"  end-to-end:  {elapsed:8.2f} s  {rows / elapsed:12,.0f} rows/s")
+
+    if "stream" in inspect.signature(converter.excel_to_json).parameters:
+        start = time.perf_counter()
+        converter.excel_to_json(str(xlsx_path), str(output_path), stream=True)
+        elapsed = time.perf_counter() - start
+        print(f"  --stream:    {elapsed:8.2f} s  {rows / elapsed:12,.0f} rows/s")
+
+    if "reader" in inspect.signature(converter.excel_to_json).parameters:
+        start = time.perf_counter()
+        converter.excel_to_json(str(xlsx_path), str(output_path), stream=True, reader="fast")
+        elapsed = time.perf_counter() - start
+        print(f"  --stream --reader fast: {elapsed:8.2f} s  {rows / elapsed:12,.0f} rows/s")
+
+    if hasattr(converter, "iter_entries"):
+        wb = openpyxl.load_workbook(xlsx_path, read_only=True)
+        sheet_rows = list(wb[type_name].iter_rows(values_only=True))
+        wb.close()
+
+        start = time.perf_counter()
+        decoded = sum(1 for _ in converter.iter_entries(_RowSource(sheet_rows),
+                                                        converter.SHEET_CONVERTERS[type_name]))
+        elapsed = time.perf_counter() - start
+        print(f"  decode only: {elapsed:8.2f} s  {decoded / elapsed:12,.0f} rows/s")
+
+
+def bench_parallel(rows: int, jobs: int, script_path: Path) -> None:
+    schema = load_schema(str(SCHEMA_PATH))[0]
+    sheet_order = schema.get('excel', {}).get('sheet_order', list(schema['types']))
+    xlsx_path = build_workbook(schema, sheet_order, rows)
+    converter = load_script(script_path)
+    output_path = Path(tempfile.gettempdir()) / "bench_output.json"
+
+    print(f"excel_to_json --stream: {len(sheet_order)} sheets x {rows} rows")
+
+    timings = {}
+    for n in (1, jobs):
+        start = time.perf_counter()
+        converter.excel_to_json(str(xlsx_path), str(output_path), stream=True, jobs=n)
+        timings[n] = time.perf_counter() - start
+        print(f"  --jobs {n}: {timings[n]:8.2f} s")
+    print(f"  speedup:  {timings[1] / timings[jobs]:8.2f}x")
+
+
+def build_json(schema: Dict, type_names: List[str], rows: int) -> Path:
+    """Write a JSON data file with synthetic entries per type"""
+    path = Path(tempfile.gettempdir()) / f"bench_{'_'.join(type_names)}_{rows}.json"
+    data = {}
+    for type_name in type_names:
+        fields = schema['types'][type_name]['fields']
+        data[type_name] = [
+            {field_name: fit_constraints(synthetic_value(field_def['type'], row), field_def)
+             for field_name, field_def in fields.items()}
+            for row in range(1, rows + 1)
+        ]
+    path.write_text(json.dumps(data), "utf-8")
+    return path
+
+
+def bench_export(type_name: str, rows: int, script_path: Path) -> None:
+    schema = load_schema(str(SCHEMA_PATH))[0]
+    json_path = build_json(schema, [type_name], rows)
+    template_path = SCRIPTS_DIR / "data_template.xlsx"
+    output_path = Path(tempfile.gettempdir()) / "bench_output.xlsx"
+    exporter = load_script(script_path)
+
+    print(f"json_to_excel: {script_path} on {rows} {type_name} entries")
+
+    start = time.perf_counter()
+    exporter.json_to_excel(str(json_path), str(template_path), str(output_path))
+    elapsed = time.perf_counter() - start
+    print(f"  default:   {elapsed:8.2f} s  {rows / elapsed:12,.0f} rows/s")
+
+    if "stream" in inspect.signature(exporter.json_to_excel).parameters:
+        start = time.perf_counter()
+        exporter.json_to_excel(str(json_path), str(template_path), str(output_path), stream=True)
+        elapsed = time.perf_counter() - start
+        print(f"  --stream:  {elapsed:8.2f} s  {rows / elapsed:12,.0f} rows/s")
+
+    if "engine" in inspect.signature(exporter.json_to_excel).parameters:
+        start = time.perf_counter()
+        exporter.json_to_excel(str(json_path), str(template_path), str(output_path), engine="xml")
+        elapsed = time.perf_counter() - start
+        print(f"  --engine xml: {elapsed:8.2f} s  {rows / elapsed:12,.0f} rows/s")
+
+
+def bench_export_parallel(rows: int, jobs: int, script_path: Path) -> None:
+    schema = load_schema(str(SCHEMA_PATH))[0]
+    sheet_order = schema.get('excel', {}).get('sheet_order', list(schema['types']))
+    json_path = build_json(schema, sheet_order, rows)
+    template_path = SCRIPTS_DIR / "data_template.xlsx"
+    output_path = Path(tempfile.gettempdir()) / "bench_output.xlsx"
+    exporter = load_script(script_path)
+
+    print(f"json_to_excel --engine xml: {len(sheet_order)} sheets x {rows} entries")
+
+    timings = {}
+    for n in (1, jobs):
+        start = time.perf_counter()
+        exporter.json_to_excel(str(json_path), str(template_path), str(output_path), engine="xml", jobs=n)
+        timings[n] = time.perf_counter() - start
+        print(f"  --jobs {n}: {timings[n]:8.2f} s")
+    print(f"  speedup:  {timings[1] / timings[jobs]:8.2f}x")
+
+
+def bench_validate(rows: int, script_path: Path) -> None:
+    schema = load_schema(str(SCHEMA_PATH))[0]
+    json_path = build_json(schema, list(schema['types']), rows)
+    validator_module = load_script(script_path)
+    entities = rows * len(schema['types'])
+
+    print(f"validate_data: {script_path} on {len(schema['types'])} types x {rows} entries")
+
+    validator = validator_module.DataValidator()
+    forget_loaded(validator_module, json_path)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        validator.validate_files([str(json_path)])
+    elapsed = time.perf_counter() - start
+    print(f"  total:      {elapsed:8.2f} s  ({len(validator.errors)} errors)")
+
+    # Entity checks alone, on data that is already loaded
+    data = json.loads(json_path.read_text("utf-8"))
+    validator = validator_module.DataValidator()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for type_name, entries in data.items():
+            if hasattr(validator, "_validate_type"):
+                validator._validate_type(type_name, entries, str(json_path))
+            else:
+                getattr(validator, f"_validate_{type_name}")(entries, str(json_path))
+    elapsed = time.perf_counter() - start
+    print(f"  per entity: {elapsed / entities * 1e6:8.2f} us")
+
+    if hasattr(validator_module, "JsonStream"):
+        # --stream: time without tracing, then peak Python allocations with it
+        for label, stream in (("loaded", False), ("stream", True)):
+            validator = validator_module.DataValidator(stream=stream)
+            forget_loaded(validator_module, json_path)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                validator.validate_files([str(json_path)])
+            elapsed = time.perf_counter() - start
+
+            validator = validator_module.DataValidator(stream=stream)
+            forget_loaded(validator_module, json_path)
+            tracemalloc.start()
+            with contextlib.redirect_stdout(io.StringIO()):
+                validator.validate_files([str(json_path)])
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {label + ':':11s} {elapsed:8.2f} s  peak {peak / 2**20:7.1f} MB")
+
+    if not hasattr(validator_module, "CACHE_SUFFIX"):
+        return
+
+    # --cache: first run, rerun on the same file, rerun after a small edit
+    cached_path = json_path.with_name(json_path.stem + "_cached.json")
+    cache_path = Path(str(cached_path) + validator_module.CACHE_SUFFIX)
+    cached_path.write_text(json_path.read_text("utf-8"), "utf-8")
+    cache_path.unlink(missing_ok=True)
+    for label in ("cold cache", "unchanged", "one edit"):
+        if label == "one edit":
+            # Swap two entries in the middle of a type
+            data = json.loads(cached_path.read_text("utf-8"))
+            entries = data[next(iter(data))]
+            middle = len(entries) // 2
+            entries[middle - 1], entries[middle] = entries[middle], entries[middle - 1]
+            cached_path.write_text(json.dumps(data), "utf-8")
+
+        validator = validator_module.DataValidator(cache=True)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            validator.validate_files([str(cached_path)])
+        elapsed = time.perf_counter() - start
+        print(f"  {label + ':':11s} {elapsed:8.2f} s  ({len(validator.errors)} errors)")
+
+
+def bench_validate_parallel(rows: int, files: int, jobs: int, script_path: Path) -> None:
+    schema = load_schema(str(SCHEMA_PATH))[0]
+    json_path = build_json(schema, list(schema['types']), rows)
+    validator_module = load_script(script_path)
+
+    paths = []
+    for i in range(files):
+        path = json_path.with_name(f"{json_path.stem}_file{i}.json")
+        path.write_text(json_path.read_text("utf-8"), "utf-8")
+        paths.append(str(path))
+
+    print(f"validate_data: {files} files x {len(schema['types'])} types x {rows} entries")
+
+    timings = {}
+    for n in (1, jobs):
+        validator = validator_module.DataValidator(jobs=n)
+        for path in paths:
+            forget_loaded(validator_module, path)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            validator.validate_files(paths)
+        timings[n] = time.perf_counter() - start
+        print(f"  --jobs {n}: {timings[n]:8.2f} s  ({len(validator.errors)} errors)")
+    print(f"  speedup:  {timings[1] / timings[jobs]:8.2f}x")
+
+
+def bench_entities(type_name: str, rows: int, script_path: Path) -> None:
+    schema = load_schema(str(SCHEMA_PATH))[0]
+    json_path = build_json(schema, [type_name], rows)
+    entities = load_script(script_path)
+    text = json_path.read_text("utf-8")
+
+    print(f"entities: {script_path} on {rows} {type_name} entries")
+
+    # Memory held by the entries, measured the same way for both forms
+    tracemalloc.start()
+    entries = json.loads(text)[type_name]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    objects = entities.from_dicts(type_name, entries)
+    del entries
+    object_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    print(f"  dicts:      {dict_bytes / rows:8.1f} bytes/entry")
+    print(f"  entities:   {object_bytes / rows:8.1f} bytes/entry  ({object_bytes / dict_bytes:.0%})")
+
+    entries = json.loads(text)[type_name]
+    start = time.perf_counter()
+    objects = entities.from_dicts(type_name, entries)
+    elapsed = time.perf_counter() - start
+    # Without the field values, which both forms share
+    print(f"  containers: {sys.getsizeof(entries[0])} -> {sys.getsizeof(objects[0])} bytes")
+    print(f"  from_dict:  {elapsed / rows * 1e6:8.2f} us")
+
+    start = time.perf_counter()
+    entities.to_dicts(objects)
+    elapsed = time.perf_counter() - start
+    print(f"  to_dict:    {elapsed / rows * 1e6:8.2f} us")
+
+
+def bench_columns(type_name: str, rows: int, script_path: Path) -> None:
+    schema = load_schema(str(SCHEMA_PATH))[0]
+    json_path = build_json(schema, [type_name], rows)
+    columns = load_script(script_path)
+    text = json_path.read_text("utf-8")
+
+    print(f"columns: {script_path} on {rows} {type_name} entries")
+
+    tracemalloc.start()
+    entries = json.loads(text)[type_name]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    table = columns.ColumnTable(type_name, entries)
+    del entries
+    table_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"  dicts:      {dict_bytes / rows:8.1f} bytes/entry")
+    print(f"  columns:    {table_bytes / rows:8.1f} bytes/entry  ({table_bytes / dict_bytes:.0%})")
+    for field, kind in columns.COLUMN_KINDS[type_name]:
+        print(f"    {field:20s} {kind:10s} {type(table[field]).__name__}")
+
+    # Whole-column checks on the id column, packed and as a list
+    id_field = columns.COLUMN_KINDS[type_name][0][0]
+    keys = dict.fromkeys(range(rows + 1))
+    for label, column in (("packed", table[id_field]), ("list", list(table[id_field]))):
+        start = time.perf_counter()
+        columns.out_of_range(column, 0, rows)
+        columns.duplicates(column)
+        columns.missing(column, keys)
+        elapsed = time.perf_counter() - start
+        print(f"  checks ({label}): {elapsed * 1e3:8.2f} ms")
+
+
+def bench_generate(schema_path: Path, jobs: int = 1) -> None:
+    import jinja2  # noqa: F401 - imported up front, out of the cold-start time
+    from generate_from_schema import SchemaGenerator
+    from template_cache import compile_templates
+
+    print(f"generate_from_schema: {schema_path}, {jobs} job(s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compiled_dir = Path(tmp) / "compiled"
+        # cold: every template compiled into the empty cache; warm: loaded from it
+        for label, force in (("cold", True), ("warm", True), ("up to date", False)):
+            start = time.perf_counter()
+            generator = SchemaGenerator(str(schema_path), str(UTIL_DIR / "templates"), str(compiled_dir))
+            if force:
+                compile_templates(generator.env)
+            loaded = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                generator.generate_all(str(Path(tmp) / "scripts"), str(Path(tmp) / "godot"), force=force,
+                                       jobs=jobs)
+            elapsed = time.perf_counter() - start
+            print(f"  {label + ':':12s} schema and templates {(loaded - start) * 1e3:8.1f} ms  "
+                  f"total {elapsed * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python benchmark.py <command> [args]")
+        print("\nCommands:")
+        print("  excel [type] [rows] [excel_to_json.py]  - Time excel_to_json on a synthetic sheet")
+        print("  parallel [rows] [jobs]                  - Compare serial and --jobs conversion of all sheets")
+        print("  export [type] [rows] [json_to_excel.py] - Time json_to_excel on synthetic entries")
+        print("  export-parallel [rows] [jobs]           - Compare serial and --jobs XML export of all sheets")
+        print("  validate [rows] [validate_data.py]      - Time validate_data on synthetic entries of every type")
+        print("  validate-parallel [rows] [files] [jobs] - Compare serial and --jobs validation of several files")
+        print("  entities [type] [rows] [entities.py]    - Memory and from_dict/to_dict time of entity classes")
+        print("  columns [type] [rows] [columns.py]      - Memory and whole-column check time of columnar tables")
+        print("  generate [schema.yaml] [jobs]           - Cold, warm and up-to-date generator runs")
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    if command == "excel":
+        type_name = sys.argv[2] if len(sys.argv) > 2 else "Story"
+        rows = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+        script_path = Path(sys.argv[4]) if len(sys.argv) > 4 else SCRIPTS_DIR / "excel_to_json.py"
+        bench_excel(type_name, rows, script_path)
+
+    elif command == "parallel":
+        rows = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+        jobs = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+        bench_parallel(rows, jobs, SCRIPTS_DIR / "excel_to_json.py")
+
+    elif command == "export":
+        type_name = sys.argv[2] if len(sys.argv) > 2 else "Story"
+        rows = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+        script_path = Path(sys.argv[4]) if len(sys.argv) > 4 else SCRIPTS_DIR / "json_to_excel.py"
+        bench_export(type_name, rows, script_path)
+
+    elif command == "export-parallel":
+        rows = int(sys.argv[2]) if len(sys.argv) > 2 else 30_000
+        jobs = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+        bench_export_parallel(rows, jobs, SCRIPTS_DIR / "json_to_excel.py")
+
+    elif command == "validate":
+        rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+        script_path = Path(sys.argv[3]) if len(sys.argv) > 3 else SCRIPTS_DIR / "validate_data.py"
+        bench_validate(rows, script_path)
+
+    elif command == "validate-parallel":
+        rows = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+        files = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+        jobs = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+        bench_validate_parallel(rows, files, jobs, SCRIPTS_DIR / "validate_data.py")
+
+    elif command == "entities":
+        type_name = sys.argv[2] if len(sys.argv) > 2 else "SocialMediaPost"
+        rows = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+        script_path = Path(sys.argv[4]) if len(sys.argv) > 4 else SCRIPTS_DIR / "entities.py"
+        bench_entities(type_name, rows, script_path)
+
+    elif command == "columns":
+        type_name = sys.argv[2] if len(sys.argv) > 2 else "StoryPosts"
+        rows = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+        script_path = Path(sys.argv[4]) if len(sys.argv) > 4 else SCRIPTS_DIR / "columns.py"
+        bench_columns(type_name, rows, script_path)
+
+    elif command == "generate":
+        schema_path = Path(sys.argv[2]) if len(sys.argv) > 2 else SCHEMA_PATH
+        jobs = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        bench_generate(schema_path, jobs)
+
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
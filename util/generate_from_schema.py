@@ -1,41 +1,184 @@
 #!/usr/bin/env python3
-import yaml
 import json
+import hashlib
+import threading
+import traceback
 from pathlib import Path
-from typing import Dict, List, Any
-from jinja2 import Environment, FileSystemLoader, Template
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
+from typing import Dict, List, Any, Optional, Tuple
+
+from schema_cache import load_schema
+
+# Names the generated entity classes use themselves, unavailable as field names
+ENTITY_MEMBERS = {"TYPE_NAME", "FIELDS", "get", "from_dict", "to_dict", "self", "cls", "data"}
+
+# Written next to the generated scripts: per output, the hashes of the template,
+# the schema types and the rest of the render context it was generated from,
+# and of the file written
+MANIFEST_NAME = ".generated.json"
+
+class SchemaError(ValueError):
+    """A schema the outputs cannot be generated from, reported with the type at fault"""
+
+    def __init__(self, type_name: str, message: str, detail: Any = None):
+        lines = [f"In: {type_name}", f"[ERROR] {message}"]
+        if detail is not None:
+            lines.append(str(detail))
+        super().__init__("\n".join(lines))
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+def _context_digest(value: Any) -> str:
+    return _digest(json.dumps(value, sort_keys=True, default=repr).encode("utf-8"))
+
+def _file_digest(path: Path) -> str:
+    try:
+        return _digest(path.read_bytes())
+    except OSError:
+        return ""
+
+def write_excel_template(schema: Dict, types: Dict, output_path: Path):
+    """The data entry workbook: a sheet per type, a header row of field names and
+    a row of descriptions. Module-level, to be run in a worker process."""
+    # Imported here: openpyxl alone takes longer to import than an up-to-date run
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active) # pyright: ignore[reportArgumentType]
+
+    excel_config = schema.get('excel', {})
+    default_width = excel_config.get('column_width', {}).get('default', 20)
+
+    # Shared by every cell they apply to, rather than one object per cell
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_font = Font(color="FFFFFF", bold=True)
+    header_alignment = Alignment(horizontal="center")
+    desc_font = Font(italic=True, size=9)
+
+    for type_name in excel_config.get('sheet_order', types.keys()):
+        type_def = types[type_name]
+        ws = wb.create_sheet(type_name)
+
+        col_idx = 1
+        for field_name, field_def in type_def['fields'].items():
+            cell = ws.cell(row=1, column=col_idx)
+            cell.value = field_name
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+
+            desc = field_def.get('description', '')
+            constraints = field_def.get('constraints', [])
+
+            ref_info = []
+            for c in constraints:
+                if isinstance(c, dict):
+                    if 'references' in c:
+                        ref_info.append(f"→ {c['references']}")
+                    elif 'references_many' in c:
+                        ref_info.append(f"→ {c['references_many']} (comma-separated)")
+
+            if ref_info:
+                desc = f"{desc} | {' '.join(ref_info)}"
+
+            desc_cell = ws.cell(row=2, column=col_idx)
+            desc_cell.value = desc
+            desc_cell.font = desc_font
+
+            width = excel_config.get('column_width', {}).get(field_name, default_width)
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+            col_idx += 1
+
+        ws.freeze_panes = 'A3'
+
+    wb.save(output_path)
 
 class SchemaGenerator:
-    def __init__(self, schema_path: str, templates_dir: str = "templates"):
-        with open(schema_path, 'r') as f:
-            self.schema = yaml.safe_load(f)
+    def __init__(self, schema_path: str, templates_dir: str = "templates", compiled_dir: Optional[str] = None):
+        self.generator_hash = _file_digest(Path(__file__))
+        # The reference analysis is kept with the parsed schema, until this file changes
+        self.schema, tables = load_schema(schema_path, self._reference_tables, self.generator_hash)
         self.types = self.schema['types']
         self.enums = self.schema.get('enums', {})
+        # Baked into generated scripts so their caches drop out when the schema changes
+        self.schema_hash = hashlib.sha256(
+            json.dumps({"types": self.types, "enums": self.enums}, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
 
         self.templates_path = Path(templates_dir)
-        self.env = Environment(
-            loader=FileSystemLoader(self.templates_path),
-            trim_blocks=True,
-            lstrip_blocks=True
-        )
-
-        self.env.filters['gdscript_type'] = self._map_to_gdscript_type
-        self.env.filters['gdscript_default'] = self._get_gdscript_default
-        self.env.filters['python_type'] = self._map_to_python_type
-        self.env.filters['get_id_field'] = self._get_id_field
-
+        # Templates compiled to Python modules, see template_cache
+        self.compiled_path = Path(compiled_dir) if compiled_dir else self.templates_path / ".compiled"
+        self._env = None
+        self._env_lock = threading.Lock()
+        # Outputs already generated from the same inputs are skipped, see generate_all
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        # output path -> line of the summary, for the files written
+        self.written: Dict[str, str] = {}
+        # --check: (output path, diff) of the files that differ from a fresh render
+        self.check = False
+        self.mismatches: List[Tuple[Path, List[str]]] = []
+
+        self.references, self.external_references, self.unique_keys, self.indexes = tables
+
+    @property
+    def env(self):
+        """The Jinja environment, set up on first use: jinja2 is not even imported
+        when every output is up to date. Templates load from their precompiled
+        modules. Locked, as rendering threads share it."""
+        with self._env_lock:
+            if self._env is None:
+                from jinja2 import Environment
+                from template_cache import PrecompiledLoader
+                env = Environment(
+                    loader=PrecompiledLoader(self.templates_path, self.compiled_path),
+                    trim_blocks=True,
+                    lstrip_blocks=True
+                )
+
+                env.filters['gdscript_type'] = self._map_to_gdscript_type
+                env.filters['gdscript_default'] = self._get_gdscript_default
+                env.filters['python_type'] = self._map_to_python_type
+                env.filters['get_id_field'] = self._get_id_field
+                env.filters['pyrepr'] = repr
+                self._env = env
+        return self._env
+
+    def _reference_tables(self, schema: Dict) -> tuple:
+        """(references, external references, unique keys, indexes) of a schema"""
+        self.types = schema['types']
         self._analyze_references()
+        return self.references, self.external_references, self.unique_keys, self.indexes
 
     def _analyze_references(self):
         self.references = {}
         self.external_references = {}
+        # (label, kind, fields) per type: single unique fields, then the type's
+        # composite keys, then arrays whose elements are unique across entries
+        self.unique_keys = {}
+        # (field, is_array) per type for the fields listed under `index:`, looked up
+        # by value: by each element for arrays, which makes reverse references
+        self.indexes = {}
 
         for type_name, type_def in self.types.items():
+            element_keys = []
             for field_name, field_def in type_def['fields'].items():
                 constraints = field_def.get('constraints', [])
+                is_array = field_def["type"].startswith("array<")
+
+                if 'unique' in constraints:
+                    if is_array:
+                        raise SchemaError(type_name, "'unique' expects a single value, use 'unique_elements' for arrays!",
+                                          field_def)
+                    self.unique_keys.setdefault(type_name, []).append((field_name, "field", (field_name,)))
+
+                if 'unique_elements' in constraints:
+                    if not is_array:
+                        raise SchemaError(type_name, "'unique_elements' expects array, not single value!",
+                                          field_def)
+                    element_keys.append((f"{field_name}[]", "elements", (field_name,)))
 
                 for constraint in constraints:
                     if isinstance(constraint, dict):
@@ -45,10 +188,8 @@ class SchemaGenerator:
                             target = (type_name, field_name, ref, False, is_external)
 
                             if field_def["type"].startswith("array<"):
-                                print(f"In: {type_name}")
-                                print(f"[ERROR] 'references' expects single target, not array!")
-                                print(field_def)
-                                exit(1)
+                                raise SchemaError(type_name, "'references' expects single target, not array!",
+                                                  field_def)
 
                             if is_external:
                                 self.external_references.setdefault(type_name, []).append(target)
@@ -61,126 +202,288 @@ class SchemaGenerator:
                             target = (type_name, field_name, ref, True, is_external)
 
                             if not field_def["type"].startswith("array<"):
-                                print(f"In: {type_name}")
-                                print(f"[ERROR] 'references_many' expects array, not single target!")
-                                print(field_def)
-                                exit(1)
+                                raise SchemaError(type_name, "'references_many' expects array, not single target!",
+                                                  field_def)
 
                             if is_external:
                                 self.external_references.setdefault(type_name, []).append(target)
                             else:
                                 self.references.setdefault(type_name, []).append(target)
 
-    def generate_all(self, output_dir: str = ".", output_dir_godot:str="."):
+            for key in type_def.get('unique', []):
+                unknown = [field_name for field_name in key if field_name not in type_def['fields']]
+                if len(key) < 2 or unknown:
+                    raise SchemaError(type_name, "'unique' keys list two or more fields of the type!", key)
+                self.unique_keys.setdefault(type_name, []).append((f"({', '.join(key)})", "fields", tuple(key)))
+            if element_keys:
+                self.unique_keys.setdefault(type_name, []).extend(element_keys)
+
+            for field_name in type_def.get('index', []):
+                field_def = type_def['fields'].get(field_name)
+                indexed = [field for field, _ in self.indexes.get(type_name, [])]
+                if field_def is None or 'unique' in field_def.get('constraints', []) or field_name in indexed:
+                    raise SchemaError(type_name, "'index' lists fields of the type that are not unique, once each!",
+                                      field_name)
+                self.indexes.setdefault(type_name, []).append((field_name, field_def["type"].startswith("array<")))
+
+    def generate_all(self, output_dir: str = ".", output_dir_godot:str=".", force: bool = False,
+                     jobs: int = 1, check: bool = False):
+        """Generate every output. An output whose template, schema types and render
+        context hash as recorded in the manifest, and whose file is as it was
+        written, is not rendered again; a rendered file is only written when its
+        content changed. Unchanged files keep their mtime, so Godot does not
+        reimport them.
+
+        With jobs > 1 the templates render on that many threads and the Excel
+        template, the slowest output, is built in a worker process meanwhile.
+        A failing output is reported with its file after the others are done.
+
+        With check, nothing is written: every template is rendered and compared
+        with the file on disk, the committed files serving as golden files, and
+        the generator exits with 1 if any differs. The Excel template, saved with
+        its creation time, is not checked."""
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True)
         output_path_godot = Path(output_dir_godot)
         output_path_godot.mkdir(exist_ok=True)
 
-        self.generate_gdscript_classes(output_path_godot / "generated_classes.gd")
-        self.generate_data_loader(output_path_godot / "data_loader.gd")
-        self.generate_excel_template(output_path / "data_template.xlsx")
-        self.generate_excel_converter(output_path / "excel_to_json.py")
-        self.generate_json_converter(output_path / "json_to_excel.py")
-        self.generate_validator(output_path / "validate_data.py")
-
-        print(f"Generated files in {output_path} and {output_path_godot}")
+        manifest_path = output_path / MANIFEST_NAME
+        self.manifest = {}
+        self.check = check
+        self.mismatches = []
+        if not force and not check:
+            try:
+                manifest = json.loads(manifest_path.read_text("utf-8"))
+                if manifest.get("generator") == self.generator_hash:
+                    self.manifest = manifest["outputs"]
+            except (OSError, ValueError, KeyError, AttributeError):
+                pass
+        recorded = json.dumps(self.manifest, sort_keys=True)
+        self.written = {}
+
+        excel_path = output_path / "data_template.xlsx"
+        excel_context = {"types": self.types, "excel": self.schema.get('excel', {})}
+        # Saved afresh when stale: the workbook holds its creation time, never the same bytes
+        excel_stale = not check and not self._up_to_date(excel_path, None, excel_context)
+
+        outputs = [
+            (output_path_godot / "generated_classes.gd", self.generate_gdscript_classes),
+            (output_path_godot / "data_loader.gd", self.generate_data_loader),
+            (output_path / "excel_to_json.py", self.generate_excel_converter),
+            (output_path / "json_to_excel.py", self.generate_json_converter),
+            (output_path / "validate_data.py", self.generate_validator),
+            (output_path / "prune_data.py", self.generate_pruner),
+            (output_path / "dataset.py", self.generate_dataset),
+            (output_path / "entities.py", self.generate_entities),
+            (output_path / "columns.py", self.generate_columns),
+            (output_path / "sqlite_data.py", self.generate_sqlite_tool),
+        ]
+        # Summary order: the workbook after the Godot files
+        order = [str(path) for path, _ in outputs]
+        order.insert(2, str(excel_path))
+        failures: List[Tuple[Path, Exception]] = []
+
+        if jobs > 1:
+            from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+            processes = ProcessPoolExecutor(max_workers=1) if excel_stale else None
+            pending = []
+            if processes is not None:
+                # Submitted before any thread starts, so the worker is forked from a quiet process
+                pending.append((excel_path, processes.submit(write_excel_template, self.schema,
+                                                             self.types, excel_path)))
+            with ThreadPoolExecutor(max_workers=jobs) as threads:
+                pending += [(path, threads.submit(generate, path)) for path, generate in outputs]
+                for path, future in pending:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failures.append((path, e))
+            if processes is not None:
+                processes.shutdown()
+        else:
+            if excel_stale:
+                outputs.insert(2, (excel_path, self.generate_excel_template))
+            for path, generate in outputs:
+                try:
+                    generate(path)
+                except Exception as e:
+                    failures.append((path, e))
+
+        if excel_stale and all(path != excel_path for path, _ in failures):
+            self._record(excel_path, None, excel_context)
+
+        if check:
+            for path, diff in self.mismatches:
+                print(f"[ERROR] {path} differs from what the schema and templates generate:")
+                for line in diff[:20]:
+                    print(f"  {line}")
+                if len(diff) > 20:
+                    print(f"  ... {len(diff) - 20} more diff lines")
+            print(f"Checked {len(outputs)} generated files in {output_path} and {output_path_godot}: "
+                  f"{len(self.mismatches)} differ")
+        elif json.dumps(self.manifest, sort_keys=True) != recorded:
+            manifest = {"generator": self.generator_hash, "outputs": self.manifest}
+            manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), "utf-8")
+
+        if not check:
+            for path in sorted(self.written, key=order.index):
+                print(f"  {self.written[path]}")
+            print(f"Generated files in {output_path} and {output_path_godot}: "
+                  f"{len(self.written)} written, the rest unchanged")
+
+        for path, error in failures:
+            print(f"[ERROR] Generating {path} failed:")
+            if isinstance(error, SchemaError):
+                print(error)
+            else:
+                print("".join(traceback.format_exception(error)).rstrip())
+        if failures or self.mismatches:
+            exit(1)
+
+    def _dependencies(self, template_name: Optional[str], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Manifest entry of an output, without the hash of the file itself"""
+        template = self.templates_path / template_name if template_name else None
+        return {
+            "template": _file_digest(template) if template else "",
+            "types": {type_name: _context_digest(type_def)
+                      for type_name, type_def in context.get("types", {}).items()},
+            "context": _context_digest(context),
+        }
+
+    def _up_to_date(self, output_path: Path, template_name: Optional[str], context: Dict[str, Any]) -> bool:
+        entry = self.manifest.get(str(output_path))
+        return (entry is not None
+                and {key: entry.get(key) for key in ("template", "types", "context")}
+                    == self._dependencies(template_name, context)
+                and entry.get("output") == _file_digest(output_path))
+
+    def _record(self, output_path: Path, template_name: Optional[str], context: Dict[str, Any],
+                written: bool = True):
+        """Note an output as generated and, if its file was written, which of its
+        schema types changed since the manifest"""
+        entry = self._dependencies(template_name, context)
+        old_types = self.manifest.get(str(output_path), {}).get("types", {})
+        changed = [type_name for type_name, digest in entry["types"].items()
+                   if old_types.get(type_name) != digest]
+        entry["output"] = _file_digest(output_path)
+        self.manifest[str(output_path)] = entry
+        if not written:
+            return
+        if old_types and changed and len(changed) < len(entry["types"]):
+            self.written[str(output_path)] = f"{output_path} ({', '.join(changed)} changed)"
+        else:
+            self.written[str(output_path)] = str(output_path)
+
+    def _render(self, output_path: Path, template_name: str, executable: bool = False, **context):
+        """Render a template to output_path unless it is up to date, and write it
+        only if the content differs from the file there"""
+        if self._up_to_date(output_path, template_name, context):
+            return
+        content = self.env.get_template(template_name).render(**context)
+        try:
+            current = output_path.read_text("utf-8")
+        except (OSError, UnicodeDecodeError):
+            current = None
+        unchanged = current == content
+        if self.check:
+            if not unchanged:
+                import difflib
+                diff = difflib.unified_diff((current or "").splitlines(), content.splitlines(),
+                                            f"{output_path} (on disk)", f"{output_path} (generated)",
+                                            lineterm="")
+                self.mismatches.append((output_path, list(diff)))
+            return
+        if not unchanged:
+            output_path.write_text(content, "utf-8")
+        if executable and output_path.stat().st_mode & 0o777 != 0o755:
+            output_path.chmod(0o755)
+        self._record(output_path, template_name, context, written=not unchanged)
 
     def generate_gdscript_classes(self, output_path: Path):
-        template = self.env.get_template('gdscript_classes.gd.j2')
-        content = template.render(
+        self._render(output_path, 'gdscript_classes.gd.j2',
             types=self.types,
             enums=self.enums,
             schema=self.schema
         )
-        output_path.write_text(content, "utf-8")
 
     def generate_data_loader(self, output_path: Path):
-        template = self.env.get_template('data_loader.gd.j2')
-        content = template.render(
+        self._render(output_path, 'data_loader.gd.j2',
             types=self.types,
             references=self.references,
-            external_references=self.external_references
+            external_references=self.external_references,
+            indexes=self.indexes
         )
-        output_path.write_text(content, "utf-8")
 
     def generate_excel_converter(self, output_path: Path):
-        template = self.env.get_template('excel_to_json.py.j2')
-        content = template.render(
-            types=self.types
+        converters = {
+            type_name: {
+                field_name: self._get_python_converter(field_def)
+                for field_name, field_def in type_def['fields'].items()
+            }
+            for type_name, type_def in self.types.items()
+        }
+        self._render(output_path, 'excel_to_json.py.j2', executable=True,
+            types=self.types,
+            converters=converters,
+            sheet_order=self._get_sheet_order(),
+            schema_hash=self.schema_hash
         )
-        output_path.write_text(content, "utf-8")
-        output_path.chmod(0o755)
 
     def generate_json_converter(self, output_path: Path):
-        template = self.env.get_template('json_to_excel.py.j2')
-        content = template.render(
+        self._render(output_path, 'json_to_excel.py.j2', executable=True,
             types=self.types
         )
-        output_path.write_text(content, "utf-8")
-        output_path.chmod(0o755)
 
 
     def generate_validator(self, output_path: Path):
-        template = self.env.get_template('validator.py.j2')
-        content = template.render(
+        validation_steps = {
+            type_name: [
+                self._get_validation_step(field_name, field_def)
+                for field_name, field_def in type_def['fields'].items()
+            ]
+            for type_name, type_def in self.types.items()
+        }
+        self._render(output_path, 'validator.py.j2', executable=True,
             types=self.types,
+            validation_steps=validation_steps,
             enums=self.enums,
             references=self.references,
             external_references=self.external_references,
-            schema=self.schema
+            unique_keys=self.unique_keys,
+            root_types=self._get_root_types(),
+            schema=self.schema,
+            schema_hash=self.schema_hash
         )
-        output_path.write_text(content, "utf-8")
-        output_path.chmod(0o755)
 
-    def generate_excel_template(self, output_path: Path):
-        wb = openpyxl.Workbook()
-        wb.remove(wb.active) # pyright: ignore[reportArgumentType]
-
-        excel_config = self.schema.get('excel', {})
-        default_width = excel_config.get('column_width', {}).get('default', 20)
-
-        for type_name in excel_config.get('sheet_order', self.types.keys()):
-            type_def = self.types[type_name]
-            ws = wb.create_sheet(type_name)
-
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_font = Font(color="FFFFFF", bold=True)
-
-            col_idx = 1
-            for field_name, field_def in type_def['fields'].items():
-                cell = ws.cell(row=1, column=col_idx)
-                cell.value = field_name
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal="center")
-
-                desc = field_def.get('description', '')
-                constraints = field_def.get('constraints', [])
-
-                ref_info = []
-                for c in constraints:
-                    if isinstance(c, dict):
-                        if 'references' in c:
-                            ref_info.append(f"→ {c['references']}")
-                        elif 'references_many' in c:
-                            ref_info.append(f"→ {c['references_many']} (comma-separated)")
+    def generate_pruner(self, output_path: Path):
+        self._render(output_path, 'prune_data.py.j2', executable=True, root_types=self._get_root_types())
 
-                if ref_info:
-                    desc = f"{desc} | {' '.join(ref_info)}"
+    def generate_entities(self, output_path: Path):
+        for type_name, type_def in self.types.items():
+            for field_name in type_def['fields']:
+                if not field_name.isidentifier() or field_name in ENTITY_MEMBERS:
+                    raise SchemaError(type_name, f"Field name '{field_name}' cannot be an entity attribute!")
 
-                desc_cell = ws.cell(row=2, column=col_idx)
-                desc_cell.value = desc
-                desc_cell.font = Font(italic=True, size=9)
+        self._render(output_path, 'entities.py.j2', types=self.types)
 
-                width = excel_config.get('column_width', {}).get(field_name, default_width)
-                ws.column_dimensions[get_column_letter(col_idx)].width = width
+    def generate_columns(self, output_path: Path):
+        self._render(output_path, 'columns.py.j2', types=self.types)
 
-                col_idx += 1
+    def generate_sqlite_tool(self, output_path: Path):
+        self._render(output_path, 'sqlite_data.py.j2', executable=True,
+            types=self.types
+        )
 
-            ws.freeze_panes = 'A3'
+    def generate_dataset(self, output_path: Path):
+        self._render(output_path, 'dataset.py.j2',
+            types=self.types,
+            references=self.references,
+            external_references=self.external_references,
+            indexes=self.indexes
+        )
 
-        wb.save(output_path)
+    def generate_excel_template(self, output_path: Path):
+        write_excel_template(self.schema, self.types, output_path)
 
     def _map_to_gdscript_type(self, field_def: Dict) -> str:
         type_str = field_def['type'] if isinstance(field_def, dict) else field_def
@@ -240,6 +543,71 @@ class SchemaGenerator:
             return f'List[{self._map_to_python_type(inner)}]'
         return 'Any'
 
+    def _get_sheet_order(self) -> List[str]:
+        """excel.sheet_order, followed by any type it does not list"""
+        sheet_order = list(self.schema.get('excel', {}).get('sheet_order', []))
+        return sheet_order + [t for t in self.types if t not in sheet_order]
+
+    def _get_root_types(self) -> List[str]:
+        """Types marked `root: true`, and types no reference points at"""
+        targets = {target_ref.split('.')[0]
+                   for refs in list(self.references.values()) + list(self.external_references.values())
+                   for _, _, target_ref, _, _ in refs}
+        return [type_name for type_name, type_def in self.types.items()
+                if type_def.get('root') or type_name not in targets]
+
+    def _get_python_converter(self, field_def: Dict) -> str:
+        """Name of the excel_to_json cell converter for a field"""
+        type_str = field_def['type']
+
+        if type_str in ('int', 'float', 'bool'):
+            return f'_to_{type_str}'
+        elif type_str.startswith('array<'):
+            inner = type_str[6:-1]
+            if inner in ('int', 'float', 'bool'):
+                return f'_to_{inner}_array'
+            return '_to_str_array'
+        return '_to_str'
+
+    def _get_validation_step(self, field_name: str, field_def: Dict) -> tuple:
+        """(field, kind, required, unique, checks) plan step for the generated validator"""
+        type_str = field_def['type']
+        constraints = field_def.get('constraints', [])
+
+        if type_str in ('int', 'float', 'bool'):
+            kind = type_str
+        elif type_str.startswith('array'):
+            kind = 'array'
+        else:
+            kind = None
+
+        if 'required' not in constraints:
+            required = None
+        elif type_str == 'string':
+            required = 'blank'
+        elif type_str.startswith('array'):
+            required = 'empty'
+        else:
+            required = 'missing'
+
+        checks = []
+        for constraint in constraints:
+            if not isinstance(constraint, dict):
+                continue
+            if 'min' in constraint:
+                checks.append(('min', constraint['min']))
+            if 'max' in constraint:
+                checks.append(('max', constraint['max']))
+            if 'max_length' in constraint and type_str == 'string':
+                checks.append(('max_length', constraint['max_length']))
+            if 'enum' in constraint:
+                enum_values = constraint['enum']
+                if isinstance(enum_values, str) and enum_values in self.enums:
+                    enum_values = self.enums[enum_values]['values']
+                checks.append(('enum', enum_values))
+
+        return (field_name, kind, required, 'unique' in constraints, checks)
+
     def _get_id_field(self, type_def: Dict) -> str:
         """Find the ID field for a type (looks for fields ending with 'id')"""
         for field_name in type_def['fields'].keys():
@@ -249,15 +617,27 @@ class SchemaGenerator:
         # TODO: return None here?
 
 if __name__ == "__main__":
-    import sys
-
-    if len(sys.argv) < 2:
-        print("Usage: python generate_from_schema_v2.py <schema.yaml> [output_dir]")
-        sys.exit(1)
-
-    schema_path = sys.argv[1]
-    output_dir = sys.argv[3] if len(sys.argv) > 3 else "."
-    output_dir_godot = sys.argv[2] if len(sys.argv) > 2 else "."
-
-    generator = SchemaGenerator(schema_path)
-    generator.generate_all(output_dir, output_dir_godot)
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the Godot classes and data loader, the Excel "
+                                                 "template and the pipeline scripts from the schema",
+                                     epilog="Example: python generate_from_schema.py schema.yaml "
+                                            "../truth_lies_and_democracy/Util/ scripts/")
+    parser.add_argument("schema", help="schema .yaml file")
+    parser.add_argument("output_dir_godot", nargs="?", default=".", help="directory of the .gd files")
+    parser.add_argument("output_dir", nargs="?", default=".", help="directory of the scripts and Excel template")
+    parser.add_argument("--force", action="store_true",
+                        help="render every output again, whatever the manifest says")
+    parser.add_argument("--check", action="store_true",
+                        help="write nothing; exit with 1 if a generated file differs from a fresh render")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="render templates on N threads, the Excel template in a worker process")
+    args = parser.parse_args()
+
+    try:
+        generator = SchemaGenerator(args.schema)
+    except SchemaError as e:
+        print(e)
+        exit(1)
+    generator.generate_all(args.output_dir, args.output_dir_godot, force=args.force, jobs=args.jobs,
+                           check=args.check)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Parsed schemas for the generator and the tools around it
+A schema file is parsed once, with the C YAML loader when PyYAML has it, and kept
+with what tools derive from it in a pickle snapshot keyed by the file's hash:
+later runs neither parse the YAML nor import yaml
+"""
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Next to the schema file, ignored by git
+SNAPSHOT_DIR_NAME = ".schema_cache"
+# Bumped when the layout of a snapshot changes
+SNAPSHOT_FORMAT = 1
+
+
+def parse_schema(text: str) -> Dict[str, Any]:
+    """A schema parsed from YAML, by the C loader if PyYAML was built with libyaml"""
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(text, Loader=loader)
+
+
+def _snapshot_path(schema_path: Path, digest: str) -> Path:
+    return schema_path.parent / SNAPSHOT_DIR_NAME / f"{schema_path.name}.{digest}.pickle"
+
+
+def _read_snapshot(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+        return None
+    return snapshot
+
+
+def _write_snapshot(path: Path, snapshot: Dict[str, Any]) -> None:
+    """Write a snapshot in place of the older ones of the same schema file. A
+    snapshot that cannot be written is only a cache miss next time."""
+    try:
+        path.parent.mkdir(exist_ok=True)
+        for stale in path.parent.glob(f"{path.name.rsplit('.', 2)[0]}.{'?' * 16}.pickle"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        # Written aside and moved in place, so a parallel run never reads half a snapshot
+        partial = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(partial, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(partial, path)
+    except OSError:
+        pass
+
+
+def load_schema(schema_path: str, derive: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                version: str = "") -> Tuple[Dict[str, Any], Any]:
+    """The parsed schema of a file, and derive(schema) when derive is given, else
+    None. Both come from the snapshot of the file's current content if there is
+    one; derive's result is kept under version, which should change whenever the
+    code of derive does. The schema is a fresh copy on every call."""
+    path = Path(schema_path)
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    snapshot_path = _snapshot_path(path, digest)
+
+    snapshot = _read_snapshot(snapshot_path)
+    changed = snapshot is None
+    if snapshot is None:
+        snapshot = {"format": SNAPSHOT_FORMAT, "schema": parse_schema(data.decode("utf-8")), "derived": {}}
+
+    derived = None
+    if derive is not None:
+        if version in snapshot["derived"]:
+            derived = snapshot["derived"][version]
+        else:
+            derived = derive(snapshot["schema"])
+            # Only the current version is kept
+            snapshot["derived"] = {version: derived}
+            changed = True
+
+    if changed:
+        _write_snapshot(snapshot_path, snapshot)
+    return snapshot["schema"], derived
@@ -1,17 +1,17 @@
 #!/usr/bin/env python3
-import yaml
+import importlib.util
 import json
 import openpyxl
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import sys
 
+from schema_cache import load_schema
+
 class SchemaMigration:
     def __init__(self, old_schema_path: str, new_schema_path: str):
-        with open(old_schema_path, 'r') as f:
-            self.old_schema = yaml.safe_load(f)
-        with open(new_schema_path, 'r') as f:
-            self.new_schema = yaml.safe_load(f)
+        self.old_schema, _ = load_schema(old_schema_path)
+        self.new_schema, _ = load_schema(new_schema_path)
         
         self.old_types = self.old_schema['types']
         self.new_types = self.new_schema['types']
@@ -142,7 +142,10 @@ class SchemaMigration:
         print("4. Test data loading with new validation rules")
         print()
     
-    def migrate_json_data(self, input_path: str, output_path: str) -> None:
+    def migrate_json_data(self, input_path: str, output_path: str, entity_classes: Optional[Dict[str, type]] = None) -> None:
+        """Migrate a JSON data file. With the ENTITY_CLASSES of the entities module
+        generated from the new schema, entries are passed through them: fields come
+        out in schema order and fields the new schema does not know are dropped."""
         with open(input_path, 'r') as f:
             data = json.load(f)
         
@@ -155,9 +158,12 @@ class SchemaMigration:
                 continue
             
             migrated_data[type_name] = []
+            entity_class = entity_classes.get(type_name) if entity_classes else None
             
             for entry in data[type_name]:
                 migrated_entry = self._migrate_entry(type_name, entry, changes)
+                if entity_class is not None:
+                    migrated_entry = entity_class.from_dict(migrated_entry).to_dict()
                 migrated_data[type_name].append(migrated_entry)
         
         for type_name in changes['added_types']:
@@ -294,7 +300,9 @@ if __name__ == "__main__":
         print("Usage: python schema_migration.py <old_schema.yaml> <new_schema.yaml> [command] [args]")
         print("\nCommands:")
         print("  report                                    - Show migration report")
-        print("  migrate-json <input.json> <output.json>  - Migrate JSON data")
+        print("  migrate-json <input.json> <output.json> [entities.py]")
+        print("                                            - Migrate JSON data, optionally through the")
+        print("                                              entity classes generated from the new schema")
         print("  migrate-excel <input.xlsx> <output.xlsx> - Migrate Excel data")
         sys.exit(1)
     
@@ -312,10 +320,16 @@ if __name__ == "__main__":
             migration.print_migration_report()
         
         elif command == "migrate-json":
-            if len(sys.argv) != 6:
-                print("Usage: ... migrate-json <input.json> <output.json>")
+            if len(sys.argv) not in (6, 7):
+                print("Usage: ... migrate-json <input.json> <output.json> [entities.py]")
                 sys.exit(1)
-            migration.migrate_json_data(sys.argv[4], sys.argv[5])
+            entity_classes = None
+            if len(sys.argv) == 7:
+                spec = importlib.util.spec_from_file_location("entities", sys.argv[6])
+                entities = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(entities)
+                entity_classes = entities.ENTITY_CLASSES
+            migration.migrate_json_data(sys.argv[4], sys.argv[5], entity_classes)
         
         elif command == "migrate-excel":
             if len(sys.argv) != 6:
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Columnar tables generated from the schema
+The entries of a type stored one column per field, without a Python object per
+number: array('q') for ints, array('d') for floats, bools packed eight to a byte
+and int arrays as one values buffer with offsets. Checks run over whole columns.
+"""
+from array import array
+from bisect import bisect_right
+from itertools import chain, compress, count
+from operator import sub
+from typing import Dict, List, Any, Iterable, Optional
+
+# type -> (field, storage kind) in schema order; "object" columns stay lists
+COLUMN_KINDS = {
+    "StoryGroup": (
+        ("group_id", "int"),
+        ("stories", "int_array"),
+    ),
+    "Story": (
+        ("story_id", "int"),
+        ("news_headline", "object"),
+        ("news_content", "object"),
+        ("news_fake", "bool"),
+    ),
+    "MediaPostGroup": (
+        ("group_id", "int"),
+        ("story_posts", "int_array"),
+    ),
+    "StoryPosts": (
+        ("story_id", "int"),
+        ("posts", "int_array"),
+    ),
+    "SocialMediaPost": (
+        ("post_id", "int"),
+        ("user_name", "object"),
+        ("content_text", "object"),
+    ),
+}
+
+class BitColumn:
+    """Booleans packed eight to a byte, least significant bit first"""
+    __slots__ = ("bits", "length")
+
+    def __init__(self, values: Iterable[bool] = ()):
+        values = list(values)
+        self.length = len(values)
+        self.bits = bytearray((self.length + 7) // 8)
+        if values:
+            number = int("".join(["1" if value else "0" for value in reversed(values)]), 2)
+            self.bits[:] = number.to_bytes(len(self.bits), "little")
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> bool:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("BitColumn index out of range")
+        return bool(self.bits[index >> 3] >> (index & 7) & 1)
+
+    def __iter__(self):
+        return map(self.__getitem__, range(self.length))
+
+    def count(self) -> int:
+        """Number of true values"""
+        return bin(int.from_bytes(self.bits, "little")).count("1")
+
+class OffsetColumn:
+    """Int arrays as one values buffer and the offset of each array in it:
+    array i is values[offsets[i]:offsets[i + 1]]"""
+    __slots__ = ("offsets", "values")
+
+    def __init__(self, arrays: Iterable[List[int]] = ()):
+        self.offsets = array("q", [0])
+        self.values = array("q")
+        for value in arrays:
+            self.values.extend(value)
+            self.offsets.append(len(self.values))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> List[int]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("OffsetColumn index out of range")
+        return self.values[self.offsets[index]:self.offsets[index + 1]].tolist()
+
+    def __iter__(self):
+        return map(self.__getitem__, range(len(self)))
+
+    def lengths(self) -> array:
+        """Length of each array"""
+        return array("q", map(sub, self.offsets[1:], self.offsets[:-1]))
+
+    def row_of(self, position: int) -> int:
+        """Index of the array holding values[position]"""
+        return bisect_right(self.offsets, position) - 1
+
+def pack(kind: str, values: list):
+    """The compact column of a storage kind for values, or the list itself if
+    they do not all fit it: missing, of another type, or beyond 64 bits"""
+    value_types = set(map(type, values))
+    try:
+        if kind == "int" and value_types == {int}:
+            return array("q", values)
+        if kind == "float" and value_types == {float}:
+            return array("d", values)
+        if kind == "bool" and value_types == {bool}:
+            return BitColumn(values)
+        if kind == "int_array" and value_types == {list}:
+            column = OffsetColumn(values)
+            # array("q") takes bools as ints, which JSON would not give back
+            if set(map(type, chain.from_iterable(values))) <= {int}:
+                return column
+    except (TypeError, OverflowError):
+        pass
+    return values
+
+class ColumnTable:
+    """The entries of a type by column, in COLUMN_KINDS order. A field whose
+    values do not all fit its storage kind keeps a list column, with None where
+    an entry has no value."""
+
+    def __init__(self, type_name: str, entries: List[Any]):
+        self.type_name = type_name
+        self.length = len(entries)
+        self.columns: Dict[str, Any] = {}
+        for field, kind in COLUMN_KINDS[type_name]:
+            values = [entry.get(field) if isinstance(entry, dict) else None for entry in entries]
+            self.columns[field] = pack(kind, values)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, field: str):
+        return self.columns[field]
+
+    def packed(self, field: str) -> bool:
+        """Whether a column is stored compactly rather than as a list"""
+        return not isinstance(self.columns[field], list)
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """The entry at index as a dict, without the fields it has no value for"""
+        entry = {}
+        for field, column in self.columns.items():
+            value = column[index]
+            if value is not None:
+                entry[field] = value
+        return entry
+
+def out_of_range(column, low: Optional[float] = None, high: Optional[float] = None) -> List[int]:
+    """Positions of the values below low or above high. Packed columns are
+    checked with one min() and max() first."""
+    if not len(column):
+        return []
+    if (low is None or min(column) >= low) and (high is None or max(column) <= high):
+        return []
+    return [position for position, value in enumerate(column)
+            if (low is not None and value < low) or (high is not None and value > high)]
+
+def duplicates(column) -> List[int]:
+    """Positions of the values already seen earlier in the column"""
+    if len(set(column)) == len(column):
+        return []
+    seen = set()
+    return [position for position, value in enumerate(column)
+            if value in seen or seen.add(value)]
+
+def missing(values, keys) -> List[int]:
+    """Positions of the values that are not in keys, a set or dict of the ids
+    referenced. Every pass runs in C: one when all values are found."""
+    if all(map(keys.__contains__, values)):
+        return []
+    absent = set(values).difference(keys)
+    return list(compress(count(), map(absent.__contains__, values)))
\ No newline at end of file
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Shared in-memory dataset for the pipeline tools
+A data file is parsed once per process; id, foreign-key and `index:` lookups
+are built from the schema on first use
+"""
+import json
+import os
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Tuple
+
+from columns import ColumnTable
+from entities import ENTITY_CLASSES, Entity
+
+# type -> id field, "" for types without one
+ID_FIELDS = {
+    "StoryGroup": "group_id",
+    "Story": "story_id",
+    "MediaPostGroup": "group_id",
+    "StoryPosts": "story_id",
+    "SocialMediaPost": "post_id",
+}
+
+# type -> (field, target type, target field, is_many) for every reference it holds
+REFERENCES = {
+    "StoryGroup": [
+        ("stories", "Story", "story_id", True),
+    ],
+    "Story": [
+    ],
+    "MediaPostGroup": [
+        ("group_id", "StoryGroup", "group_id", False),
+        ("story_posts", "StoryPosts", "story_id", True),
+    ],
+    "StoryPosts": [
+        ("story_id", "Story", "story_id", False),
+        ("posts", "SocialMediaPost", "post_id", True),
+    ],
+    "SocialMediaPost": [
+    ],
+}
+
+# type -> (field, is_array) for the fields listed under `index:` in the schema
+INDEXES = {
+    "StoryGroup": [
+        ("stories", True),
+    ],
+    "Story": [
+    ],
+    "MediaPostGroup": [
+        ("story_posts", True),
+    ],
+    "StoryPosts": [
+        ("story_id", False),
+    ],
+    "SocialMediaPost": [
+    ],
+}
+
+class Dataset:
+    """The entries of a data file, as the JSON document {type: [entry dicts]}.
+    Lookups are built on first use, in one pass each: {value: entry} per
+    (type, field) for ids and referenced fields, and per type the references
+    pointing at its entries. Call invalidate() after changing entries."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self._keys: Dict[Tuple[str, str], Dict[Any, dict]] = {}
+        self._referrers: Dict[str, Dict[Any, list]] = {}
+        self._objects: Dict[str, List[Entity]] = {}
+        self._tables: Dict[str, ColumnTable] = {}
+        self._lookups: Dict[Tuple[str, str], Dict[Any, List[dict]]] = {}
+
+    def entries(self, type_name: str) -> List[Any]:
+        """The entry list of a type, empty if the data has none"""
+        entries = self.data.get(type_name) if isinstance(self.data, dict) else None
+        return entries if isinstance(entries, list) else []
+
+    def objects(self, type_name: str) -> List[Entity]:
+        """The entries of a type as entity objects, built once; entries that are
+        not JSON objects are left out"""
+        objects = self._objects.get(type_name)
+        if objects is None:
+            from_dict = ENTITY_CLASSES[type_name].from_dict
+            objects = self._objects[type_name] = [from_dict(entry) for entry in self.entries(type_name)
+                                                  if isinstance(entry, dict)]
+        return objects
+
+    def columns(self, type_name: str) -> ColumnTable:
+        """The entries of a type stored by column, built once"""
+        table = self._tables.get(type_name)
+        if table is None:
+            table = self._tables[type_name] = ColumnTable(type_name, self.entries(type_name))
+        return table
+
+    def index(self, type_name: str, field: str) -> Dict[Any, dict]:
+        """{value: entry} for a field of a type; the first entry wins for a repeated value"""
+        index = self._keys.get((type_name, field))
+        if index is None:
+            index = self._keys[(type_name, field)] = {}
+            for entry in self.entries(type_name):
+                if isinstance(entry, dict):
+                    value = entry.get(field)
+                    if value is not None:
+                        try:
+                            index.setdefault(value, entry)
+                        except TypeError:
+                            pass
+        return index
+
+    def lookup(self, type_name: str, field: str) -> Dict[Any, List[dict]]:
+        """{value: entries} for a field listed under `index:` for the type, as the
+        Godot loader's {type}_by_{field}: every entry holding the value, in file
+        order, and for an array field every entry holding it as an element"""
+        for index_field, is_array in INDEXES[type_name]:
+            if index_field == field:
+                break
+        else:
+            raise KeyError(f"{type_name}.{field} is not an index field")
+
+        lookup = self._lookups.get((type_name, field))
+        if lookup is None:
+            lookup = self._lookups[(type_name, field)] = {}
+            for entry in self.entries(type_name):
+                value = entry.get(field) if isinstance(entry, dict) else None
+                for key in (value if is_array and isinstance(value, list) else (value,)):
+                    if key is not None:
+                        try:
+                            lookup.setdefault(key, []).append(entry)
+                        except TypeError:
+                            pass
+        return lookup
+
+    def get(self, type_name: str, obj_id: Any, default: Any = None) -> Optional[dict]:
+        """The entry of a type with an id"""
+        return self.index(type_name, ID_FIELDS[type_name]).get(obj_id, default)
+
+    def referrers(self, type_name: str, value: Any) -> List[Tuple[str, str, dict]]:
+        """(source type, field, entry) of every entry whose reference field holds
+        value and points at the type"""
+        index = self._referrers.get(type_name)
+        if index is None:
+            index = self._referrers[type_name] = defaultdict(list)
+            for source_type, references in REFERENCES.items():
+                for field, target_type, _, is_many in references:
+                    if target_type != type_name:
+                        continue
+                    for entry in self.entries(source_type):
+                        ref = entry.get(field) if isinstance(entry, dict) else None
+                        for ref_id in (ref if is_many and isinstance(ref, list) else (ref,)):
+                            if ref_id is not None:
+                                try:
+                                    index[ref_id].append((source_type, field, entry))
+                                except TypeError:
+                                    pass
+        return index.get(value, [])
+
+    def resolve(self, type_name: str, entry: dict, field: str) -> Any:
+        """The entry a reference field points to, or the list of entries for an
+        array field; ids with no entry are left out"""
+        for ref_field, target_type, target_field, is_many in REFERENCES[type_name]:
+            if ref_field == field:
+                index = self.index(target_type, target_field)
+                value = entry.get(field)
+                if is_many:
+                    return [index[ref_id] for ref_id in value or () if ref_id in index]
+                return index.get(value) if value is not None else None
+        raise KeyError(f"{type_name}.{field} is not a reference field")
+
+    def invalidate(self) -> None:
+        """Drop the lookups, entity objects and columns, to be rebuilt from the current entries"""
+        self._keys.clear()
+        self._lookups.clear()
+        self._referrers.clear()
+        self._objects.clear()
+        self._tables.clear()
+
+# Datasets of this process by absolute path, with the (mtime, size) they were read at
+_LOADED: Dict[str, Tuple[Tuple[int, int], Dataset]] = {}
+
+def _stamp(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def load_dataset(path: str) -> Dataset:
+    """The dataset of a JSON data file. Parsed once per process: later stages get
+    the same Dataset while the file is unchanged. Raises what json.load raises."""
+    key = os.path.abspath(path)
+    stamp = _stamp(path)
+    loaded = _LOADED.get(key)
+    if loaded is not None and loaded[0] == stamp:
+        return loaded[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        dataset = Dataset(json.load(f))
+    _LOADED[key] = (stamp, dataset)
+    return dataset
+
+def share_dataset(path: str, data: Dict[str, Any]) -> Dataset:
+    """Register data a tool has just written to path, so that later stages in
+    this process use it instead of parsing the file again"""
+    dataset = Dataset(data)
+    _LOADED[os.path.abspath(path)] = (_stamp(path), dataset)
+    return dataset
+
+def forget_dataset(path: str) -> None:
+    """Let the dataset of a file go once no later stage needs it"""
+    _LOADED.pop(os.path.abspath(path), None)
\ No newline at end of file
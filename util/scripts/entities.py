@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Entity classes generated from the schema
+One __slots__ class per type, much smaller than the entry dicts they are built
+from, with from_dict/to_dict written out field by field
+"""
+from typing import Dict, List, Any, Tuple
+
+class _Missing:
+    """Value of a field the source entry did not have"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MISSING"
+
+    def __bool__(self):
+        return False
+
+    def __reduce__(self):
+        # Unpickled in worker processes as the same object
+        return "MISSING"
+
+MISSING = _Missing()
+
+_new = object.__new__
+
+class Entity:
+    """Base of the entity classes. Fields the source entry did not have hold
+    MISSING and are left out by to_dict(); keys the schema does not know are
+    dropped. Read access works as on an entry dict, so code written for entry
+    dicts takes entities as they are."""
+    __slots__ = ()
+    TYPE_NAME = ""
+    FIELDS: Tuple[str, ...] = ()
+
+    def get(self, field: str, default: Any = None) -> Any:
+        if field in self.FIELDS:
+            value = getattr(self, field)
+            if value is not MISSING:
+                return value
+        return default
+
+    def __getitem__(self, field: str) -> Any:
+        value = self.get(field, MISSING)
+        if value is MISSING:
+            raise KeyError(field)
+        return value
+
+    def __contains__(self, field: str) -> bool:
+        return self.get(field, MISSING) is not MISSING
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and all(getattr(self, field) == getattr(other, field)
+                                                 for field in self.FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.FIELDS
+                           if getattr(self, field) is not MISSING)
+        return f"{self.TYPE_NAME}({fields})"
+
+class StoryGroup(Entity):
+    __slots__ = ("group_id", "stories")
+    TYPE_NAME = "StoryGroup"
+    FIELDS = __slots__
+
+    def __init__(self, group_id: int = MISSING, stories: List[int] = MISSING):
+        self.group_id = group_id
+        self.stories = stories
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StoryGroup":
+        # Slots set directly: about twice as fast as going through __init__
+        obj = _new(cls)
+        get = data.get
+        obj.group_id = get("group_id", MISSING)
+        obj.stories = get("stories", MISSING)
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {}
+        if self.group_id is not MISSING:
+            data["group_id"] = self.group_id
+        if self.stories is not MISSING:
+            data["stories"] = self.stories
+        return data
+
+class Story(Entity):
+    __slots__ = ("story_id", "news_headline", "news_content", "news_fake")
+    TYPE_NAME = "Story"
+    FIELDS = __slots__
+
+    def __init__(self, story_id: int = MISSING, news_headline: str = MISSING, news_content: str = MISSING, news_fake: bool = MISSING):
+        self.story_id = story_id
+        self.news_headline = news_headline
+        self.news_content = news_content
+        self.news_fake = news_fake
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Story":
+        # Slots set directly: about twice as fast as going through __init__
+        obj = _new(cls)
+        get = data.get
+        obj.story_id = get("story_id", MISSING)
+        obj.news_headline = get("news_headline", MISSING)
+        obj.news_content = get("news_content", MISSING)
+        obj.news_fake = get("news_fake", MISSING)
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {}
+        if self.story_id is not MISSING:
+            data["story_id"] = self.story_id
+        if self.news_headline is not MISSING:
+            data["news_headline"] = self.news_headline
+        if self.news_content is not MISSING:
+            data["news_content"] = self.news_content
+        if self.news_fake is not MISSING:
+            data["news_fake"] = self.news_fake
+        return data
+
+class MediaPostGroup(Entity):
+    __slots__ = ("group_id", "story_posts")
+    TYPE_NAME = "MediaPostGroup"
+    FIELDS = __slots__
+
+    def __init__(self, group_id: int = MISSING, story_posts: List[int] = MISSING):
+        self.group_id = group_id
+        self.story_posts = story_posts
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MediaPostGroup":
+        # Slots set directly: about twice as fast as going through __init__
+        obj = _new(cls)
+        get = data.get
+        obj.group_id = get("group_id", MISSING)
+        obj.story_posts = get("story_posts", MISSING)
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {}
+        if self.group_id is not MISSING:
+            data["group_id"] = self.group_id
+        if self.story_posts is not MISSING:
+            data["story_posts"] = self.story_posts
+        return data
+
+class StoryPosts(Entity):
+    __slots__ = ("story_id", "posts")
+    TYPE_NAME = "StoryPosts"
+    FIELDS = __slots__
+
+    def __init__(self, story_id: int = MISSING, posts: List[int] = MISSING):
+        self.story_id = story_id
+        self.posts = posts
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StoryPosts":
+        # Slots set directly: about twice as fast as going through __init__
+        obj = _new(cls)
+        get = data.get
+        obj.story_id = get("story_id", MISSING)
+        obj.posts = get("posts", MISSING)
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {}
+        if self.story_id is not MISSING:
+            data["story_id"] = self.story_id
+        if self.posts is not MISSING:
+            data["posts"] = self.posts
+        return data
+
+class SocialMediaPost(Entity):
+    __slots__ = ("post_id", "user_name", "content_text")
+    TYPE_NAME = "SocialMediaPost"
+    FIELDS = __slots__
+
+    def __init__(self, post_id: int = MISSING, user_name: str = MISSING, content_text: str = MISSING):
+        self.post_id = post_id
+        self.user_name = user_name
+        self.content_text = content_text
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SocialMediaPost":
+        # Slots set directly: about twice as fast as going through __init__
+        obj = _new(cls)
+        get = data.get
+        obj.post_id = get("post_id", MISSING)
+        obj.user_name = get("user_name", MISSING)
+        obj.content_text = get("content_text", MISSING)
+        return obj
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {}
+        if self.post_id is not MISSING:
+            data["post_id"] = self.post_id
+        if self.user_name is not MISSING:
+            data["user_name"] = self.user_name
+        if self.content_text is not MISSING:
+            data["content_text"] = self.content_text
+        return data
+
+ENTITY_CLASSES = {
+    "StoryGroup": StoryGroup,
+    "Story": Story,
+    "MediaPostGroup": MediaPostGroup,
+    "StoryPosts": StoryPosts,
+    "SocialMediaPost": SocialMediaPost,
+}
+
+def from_dicts(type_name: str, entries: List[Dict[str, Any]]) -> List[Entity]:
+    """Entities of a type from its entry dicts"""
+    return list(map(ENTITY_CLASSES[type_name].from_dict, entries))
+
+def to_dicts(objects: List[Entity]) -> List[Dict[str, Any]]:
+    """Entry dicts of entities, in the order of their schema fields"""
+    return [obj.to_dict() for obj in objects]
\ No newline at end of file
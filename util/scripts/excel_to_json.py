@@ -1,9 +1,22 @@
 #!/usr/bin/env python3
 import openpyxl
 import json
+import datetime
+import hashlib
+import io
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import sys
 
+from dataset import share_dataset
+
+TRUE_STRINGS = frozenset(["true", "1", "yes", "y"])
+
 def convert_value(value_str: str, target_type: str):
     """Convert a string value to the target type"""
     value_str = value_str.strip()
@@ -22,346 +35,788 @@ def convert_value(value_str: str, target_type: str):
             return 0.0
     elif target_type == "bool":
         lower = value_str.lower()
-        return lower in ["true", "1", "yes", "y"]
+        return lower in TRUE_STRINGS
     else:
         # string or unknown type
         return value_str
 
-def excel_to_json(excel_path: str, output_path: str):
-    wb = openpyxl.load_workbook(excel_path)
-    all_data = {}
-
-    if "StoryGroup" in wb.sheetnames:
-        ws = wb["StoryGroup"]
-        headers = [cell.value for cell in ws[1]]
-        storygroup_data = []
-
-        # Build field type mapping
-        field_types = {
-            "group_id": "int",
-            "stories": "array<int>",
-        }
+# Cell converters. Values openpyxl already returns with the right type are
+# passed through; everything else takes the same path as convert_value(str(value)).
 
-        for row in ws.iter_rows(min_row=3, values_only=True):
-            if all(cell is None for cell in row):
-                continue
-
-            entry = {}
-            for header, value in zip(headers, row):
-                if value is not None and header in field_types:
-                    field_type = field_types[header]
-
-                    # Handle array types
-                    if field_type.startswith("array<"):
-                        # TODO: this is really stupid
-                        inner_type = field_type[6:-1]
-                        if isinstance(value, list):
-                            # Already a list (shouldn't happen in Excel, but handle it)
-                            if inner_type in ["int", "float", "bool"]:
-                                entry[header] = [convert_value(str(item), inner_type) for item in value]
-                            else:
-                                entry[header] = value
-                        else:
-                            # Convert comma-separated string to list with proper types
-                            value_str = str(value)
-                            raw_list = [x.strip() for x in value_str.split(",") if x.strip()]
-
-                            # Convert each element to the correct type
-                            if inner_type == "int":
-                                entry[header] = [convert_value(x, "int") for x in raw_list]
-                            elif inner_type == "float":
-                                entry[header] = [convert_value(x, "float") for x in raw_list]
-                            elif inner_type == "bool":
-                                entry[header] = [convert_value(x, "bool") for x in raw_list]
-                            else:
-                                # string or custom type
-                                entry[header] = raw_list
-
-                    # Handle basic types
-                    elif field_type == "int":
-                        entry[header] = convert_value(str(value), "int")
-                    elif field_type == "float":
-                        entry[header] = convert_value(str(value), "float")
-                    elif field_type == "bool":
-                        entry[header] = convert_value(str(value), "bool")
-
-                    # All other types: convert to string
-                    else:
-                        entry[header] = str(value) if not isinstance(value, (list, dict)) else value
-
-
-            if entry:
-                storygroup_data.append(entry)
-
-        all_data["StoryGroup"] = storygroup_data
-
-    if "Story" in wb.sheetnames:
-        ws = wb["Story"]
-        headers = [cell.value for cell in ws[1]]
-        story_data = []
-
-        # Build field type mapping
-        field_types = {
-            "story_id": "int",
-            "news_headline": "string",
-            "news_content": "string",
-            "news_fake": "bool",
-        }
-
-        for row in ws.iter_rows(min_row=3, values_only=True):
-            if all(cell is None for cell in row):
+def _to_int(value):
+    if type(value) is int:
+        return value
+    if type(value) is str:
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    return convert_value(str(value), "int")
+
+def _to_float(value):
+    if type(value) is float:
+        return value
+    if type(value) is int:
+        return float(value)
+    if type(value) is str:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return convert_value(str(value), "float")
+
+def _to_bool(value):
+    if type(value) is bool:
+        return value
+    return str(value).strip().lower() in TRUE_STRINGS
+
+def _to_str(value):
+    if type(value) is str:
+        return value
+    return str(value) if not isinstance(value, (list, dict)) else value
+
+def _split_list(value) -> list:
+    """Comma-separated cell to a list of stripped, non-empty items"""
+    return [x.strip() for x in str(value).split(",") if x.strip()]
+
+def _to_int_array(value):
+    if type(value) is int:
+        # A single id is stored as a number cell
+        return [value]
+    if isinstance(value, list):
+        return [_to_int(item) for item in value]
+    return [_to_int(x) for x in _split_list(value)]
+
+def _to_float_array(value):
+    if isinstance(value, list):
+        return [_to_float(item) for item in value]
+    return [_to_float(x) for x in _split_list(value)]
+
+def _to_bool_array(value):
+    if isinstance(value, list):
+        return [_to_bool(item) for item in value]
+    return [_to_bool(x) for x in _split_list(value)]
+
+def _to_str_array(value):
+    if isinstance(value, list):
+        return value
+    return _split_list(value)
+
+SHEET_CONVERTERS = {
+    "StoryGroup": {
+        "group_id": _to_int,
+        "stories": _to_int_array,
+    },
+    "Story": {
+        "story_id": _to_int,
+        "news_headline": _to_str,
+        "news_content": _to_str,
+        "news_fake": _to_bool,
+    },
+    "MediaPostGroup": {
+        "group_id": _to_int,
+        "story_posts": _to_int_array,
+    },
+    "StoryPosts": {
+        "story_id": _to_int,
+        "posts": _to_int_array,
+    },
+    "SocialMediaPost": {
+        "post_id": _to_int,
+        "user_name": _to_str,
+        "content_text": _to_str,
+    },
+}
+
+def compile_decoder(headers, converters: dict):
+    """Bind each column position to its converter once, from the header row"""
+    columns = tuple(
+        (idx, header, converters[header])
+        for idx, header in enumerate(headers)
+        if header in converters
+    )
+
+    def decode(row) -> dict:
+        entry = {}
+        row_len = len(row)
+        for idx, header, convert in columns:
+            if idx < row_len:
+                value = row[idx]
+                if value is not None:
+                    entry[header] = convert(value)
+        return entry
+
+    return decode
+
+def iter_entries(ws, converters: dict):
+    """Decode the data rows of a sheet (row 1 = headers, row 2 = descriptions)"""
+    rows = ws.iter_rows(values_only=True)
+    decode = compile_decoder(next(rows, ()), converters)
+    next(rows, None)
+
+    for row in rows:
+        # Empty rows decode to an empty entry and are skipped
+        entry = decode(row)
+        if entry:
+            yield entry
+
+# Raw xlsx access (zipfile + iterparse), used for sheet hashes and by --reader fast.
+# Cell values are cast the way openpyxl's read-only mode does it, so both readers
+# feed the same values into the row decoders.
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_DOC_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_ROW_TAG = _NS_MAIN + "row"
+_CELL_TAG = _NS_MAIN + "c"
+_VALUE_TAG = _NS_MAIN + "v"
+_FORMULA_TAG = _NS_MAIN + "f"
+_INLINE_TAG = _NS_MAIN + "is"
+_TEXT_TAG = _NS_MAIN + "t"
+_RUN_TAG = _NS_MAIN + "r"
+_SI_TAG = _NS_MAIN + "si"
+
+# Built-in number formats openpyxl reads as dates or times
+_BUILTIN_DATE_FORMATS = {
+    14: "mm-dd-yy", 15: "d-mmm-yy", 16: "d-mmm", 17: "mmm-yy", 18: "h:mm AM/PM",
+    19: "h:mm:ss AM/PM", 20: "h:mm", 21: "h:mm:ss", 22: "m/d/yy h:mm",
+    45: "mm:ss", 46: "[h]:mm:ss", 47: "mmss.0",
+}
+_FORMAT_STRIP_RE = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_DATE_TOKEN_RE = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+_TIMEDELTA_RE = re.compile(r"\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?", re.I)
+
+_WINDOWS_EPOCH = datetime.datetime(1899, 12, 30)
+_MAC_EPOCH = datetime.datetime(1904, 1, 1)
+
+def _part_rels(zf, part: str) -> list:
+    """(id, type, target part) for every relationship of a part in the zip"""
+    folder, _, name = part.rpartition("/")
+    rels_path = f"{folder}/_rels/{name}.rels" if folder else f"_rels/{name}.rels"
+    root = ET.fromstring(zf.read(rels_path))
+    rels = []
+    for rel in root.iter(_NS_PKG_REL + "Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target[1:]
+        elif folder:
+            target = f"{folder}/{target}"
+        rels.append((rel.get("Id"), rel.get("Type", ""), target))
+    return rels
+
+def workbook_parts(zf) -> tuple:
+    """Return (workbook part, {sheet name: worksheet part}, {relationship kind: part})"""
+    workbook_part = next(target for _, rel_type, target in _part_rels(zf, "")
+                         if rel_type.endswith("/officeDocument"))
+    rels = _part_rels(zf, workbook_part)
+    targets = {rel_id: target for rel_id, _, target in rels}
+    related = {rel_type.rsplit("/", 1)[-1]: target for _, rel_type, target in rels}
+
+    sheets = {}
+    for sheet in ET.fromstring(zf.read(workbook_part)).iter(_NS_MAIN + "sheet"):
+        sheets[sheet.get("name")] = targets[sheet.get(_NS_DOC_REL + "id")]
+    return workbook_part, sheets, related
+
+def _text_content(node) -> str:
+    """Plain text of an <si>/<is> node: its <t> plus the <t> of every rich text run"""
+    snippets = []
+    for child in node:
+        if child.tag == _TEXT_TAG:
+            if child.text is not None:
+                snippets.append(child.text)
+        elif child.tag == _RUN_TAG:
+            text = child.find(_TEXT_TAG)
+            if text is not None and text.text is not None:
+                snippets.append(text.text)
+    return "".join(snippets)
+
+def _read_date_styles(styles_xml: bytes) -> tuple:
+    """(date style ids, timedelta style ids) from the cellXfs number formats"""
+    root = ET.fromstring(styles_xml)
+    custom = {int(fmt.get("numFmtId")): fmt.get("formatCode")
+              for fmt in root.iter(_NS_MAIN + "numFmt")}
+    dates, timedeltas = set(), set()
+    cell_xfs = root.find(_NS_MAIN + "cellXfs")
+    for idx, xf in enumerate(cell_xfs if cell_xfs is not None else ()):
+        fmt_id = int(xf.get("numFmtId", 0))
+        fmt = custom[fmt_id] if fmt_id in custom else _BUILTIN_DATE_FORMATS.get(fmt_id)
+        if fmt is None:
+            continue
+        fmt = fmt.split(";")[0]
+        if _DATE_TOKEN_RE.search(_FORMAT_STRIP_RE.sub("", fmt)):
+            dates.add(idx)
+        if _TIMEDELTA_RE.search(fmt):
+            timedeltas.add(idx)
+    return dates, timedeltas
+
+def _date1904(zf, workbook_part: str) -> bool:
+    """Whether the workbook counts dates from 1904 rather than 1900"""
+    properties = ET.fromstring(zf.read(workbook_part)).find(_NS_MAIN + "workbookPr")
+    return properties is not None and properties.get("date1904") in ("1", "true")
+
+def _from_excel(value, epoch, timedelta: bool):
+    """Excel serial to datetime/time/timedelta, as openpyxl.utils.datetime.from_excel"""
+    if timedelta:
+        td = datetime.timedelta(days=value)
+        if td.microseconds:
+            td = datetime.timedelta(seconds=td.total_seconds() // 1,
+                                    microseconds=round(td.microseconds, -3))
+        return td
+
+    day, fraction = divmod(value, 1)
+    diff = datetime.timedelta(milliseconds=round(fraction * 86400 * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        mins, seconds = divmod(diff.seconds, 60)
+        hours, mins = divmod(mins, 60)
+        return datetime.time(hours, mins, seconds, diff.microseconds)
+    if 0 < value < 60 and epoch == _WINDOWS_EPOCH:
+        day += 1
+    return epoch + datetime.timedelta(days=day) + diff
+
+_COLUMN_INDEX = {}
+
+def _column_index(ref: str) -> int:
+    """1-based column of a cell reference such as AB12"""
+    letters = ref.rstrip("0123456789")
+    idx = _COLUMN_INDEX.get(letters)
+    if idx is None:
+        idx = 0
+        for ch in letters.upper():
+            idx = idx * 26 + ord(ch) - 64
+        _COLUMN_INDEX[letters] = idx
+    return idx
+
+# Sheet data is read in batches of whole rows, this many bytes at a time
+_ROW_BATCH_SIZE = 1 << 20
+_ROOT_TAG_RE = re.compile(rb"<([A-Za-z_][\w.:-]*)[^>]*>")
+_SHEET_DATA_RE = re.compile(rb"<((?:[\w.-]+:)?)sheetData\b[^>]*?(/?)>")
+_ENCODING_RE = re.compile(rb"""<\?xml[^>]*encoding\s*=\s*["']([^"']*)""")
+_ENTITY_RE = re.compile(r"&(?:#([0-9]+)|#x([0-9a-fA-F]+)|(lt|gt|amp|quot|apos));")
+_ENTITIES = {"lt": "<", "gt": ">", "amp": "&", "quot": '"', "apos": "'"}
+
+def _entity(match) -> str:
+    number, hex_number, name = match.groups()
+    if number:
+        return chr(int(number))
+    return chr(int(hex_number, 16)) if hex_number else _ENTITIES[name]
+
+def _xml_text(raw: bytes) -> str:
+    """Character data as an XML parser reports it: line ends normalised, references expanded"""
+    text = raw.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    if "&" in text:
+        text = _ENTITY_RE.sub(_entity, text)
+    return text
+
+# A shared string of plain text, without runs
+_PLAIN_SI_RE = re.compile(rb'<si><t(?: xml:space="preserve")?>([^<]*)</t></si>|<si><t/></si>|<si/>')
+
+def _read_shared_strings(data: bytes) -> list:
+    """The shared strings table, read like the plain cells of a sheet when every
+    string is plain text, else parsed"""
+    root = _ROOT_TAG_RE.search(data)
+    encoding = _ENCODING_RE.match(data)
+    if root is not None and not (encoding and encoding.group(1).lower() not in (b"utf-8", b"utf8")):
+        body = data[root.end():]
+        if b"<!" not in data and b"<?" not in body:
+            texts = _PLAIN_SI_RE.findall(body)
+            if len(texts) == body.count(b"<si"):
+                return [_xml_text(text).replace("x005F_", "") for text in texts]
+
+    strings = []
+    for _, node in ET.iterparse(io.BytesIO(data)):
+        if node.tag == _SI_TAG:
+            strings.append(_text_content(node).replace("x005F_", ""))
+            node.clear()
+    return strings
+
+# Column of the letters of a plain cell, as bytes
+_PLAIN_COLUMN_INDEX = {}
+_ROW_PATTERNS = {}
+
+def _row_patterns(prefix: bytes) -> tuple:
+    """(row start, plain cell) patterns of a worksheet whose elements are written
+    with prefix. A plain cell is written the way Excel, LibreOffice and openpyxl
+    write values: r, then maybe s and t, then nothing, a <v> or an inline string
+    of plain text."""
+    patterns = _ROW_PATTERNS.get(prefix)
+    if patterns is None:
+        p = re.escape(prefix)
+        patterns = (
+            re.compile(rb'<' + p + rb'row r="([0-9]+)"'),
+            re.compile(rb'<' + p + rb'c r="([A-Z]+)[0-9]+"(?: s="([0-9]+)")?(?: t="([A-Za-z]+)")?'
+                       rb'\s*(?:/>|>(?:<' + p + rb'v>([^<]*)</' + p + rb'v>|(<' + p + rb'is><' + p
+                       + rb't(?: xml:space="preserve")?>([^<]*)</' + p + rb't></' + p + rb'is>))?</' + p + rb'c>)'),
+        )
+        _ROW_PATTERNS[prefix] = patterns
+    return patterns
+
+def _batch_rows(batch: bytes, prefix: bytes):
+    """(row ref, [(column letters, style, type, value, inline string, its text)])
+    per row of a batch of sheet data, or None if a row or cell of it is not in
+    the plain form"""
+    row_re, cell_re = _row_patterns(prefix)
+    row_tag, cell_tag = b"<" + prefix + b"row", b"<" + prefix + b"c"
+    rows = []
+    # Every piece but the last ends with a row that may have cells; rows closed
+    # on the spot before it have none
+    *pieces, tail = batch.split(b"</" + prefix + b"row>")
+    for piece in pieces:
+        refs = row_re.findall(piece)
+        cells = cell_re.findall(piece)
+        if not refs or len(refs) != piece.count(row_tag) or len(cells) != piece.count(cell_tag):
+            return None
+        rows.extend((ref, []) for ref in refs[:-1])
+        rows.append((refs[-1], cells))
+    refs = row_re.findall(tail)
+    if len(refs) != tail.count(row_tag) or cell_tag in tail:
+        return None
+    rows.extend((ref, []) for ref in refs)
+    return rows
+
+def _parse_rows(start: bytes, source):
+    """<row> elements of a worksheet read on from start"""
+    parser = ET.XMLPullParser(events=("end",))
+    data = start
+    while data:
+        parser.feed(data)
+        for _, element in parser.read_events():
+            if element.tag == _ROW_TAG:
+                yield element
+        data = source.read(_ROW_BATCH_SIZE)
+    parser.close()
+
+
+def _sheet_batches(zf, part: str):
+    """Batches of whole rows of a worksheet, each as (rows of _batch_rows, None)
+    or, for rows not in the plain form, as (None, <row> elements)"""
+    with zf.open(part) as source:
+        head = b""
+        sheet_data = None
+        while sheet_data is None:
+            chunk = source.read(_ROW_BATCH_SIZE)
+            if not chunk:
+                break
+            head += chunk
+            sheet_data = _SHEET_DATA_RE.search(head)
+
+        root = _ROOT_TAG_RE.search(head)
+        encoding = _ENCODING_RE.match(head)
+        if (root is None or b"<!DOCTYPE" in head[:root.start()]
+                or (encoding and encoding.group(1).lower() not in (b"utf-8", b"utf8"))):
+            # Declarations or an encoding the plain form is not read with: parse the whole sheet
+            with zf.open(part) as reread:
+                yield None, (element for _, element in ET.iterparse(reread) if element.tag == _ROW_TAG)
+            return
+        if sheet_data is None or sheet_data.group(2):
+            return
+
+        prefix = sheet_data.group(1)
+        row_close = b"</" + prefix + b"row>"
+        buffer = head[sheet_data.end():]
+        while True:
+            chunk = source.read(_ROW_BATCH_SIZE)
+            buffer += chunk
+            if b"<!" in buffer or b"<?" in buffer:
+                # Comments, CDATA and processing instructions may hide a row end: parse the rest
+                yield None, _parse_rows(root.group(0) + sheet_data.group(0) + buffer, source)
+                return
+            if chunk:
+                cut = buffer.rfind(row_close)
+                if cut < 0:
+                    continue
+                cut += len(row_close)
+            else:
+                cut = buffer.find(b"</" + prefix + b"sheetData")
+                if cut < 0:
+                    cut = len(buffer)
+
+            batch = buffer[:cut]
+            rows = _batch_rows(batch, prefix)
+            if rows is not None:
+                yield rows, None
+            else:
+                # Parsed inside the worksheet's own root element, for its namespaces
+                wrapped = root.group(0) + batch + b"</" + root.group(1) + b">"
+                yield None, ET.fromstring(wrapped).iter(_ROW_TAG)
+            if not chunk:
+                return
+            buffer = buffer[cut:]
+
+
+class FastWorksheet:
+    def __init__(self, workbook, part: str):
+        self.workbook = workbook
+        self.part = part
+
+    def iter_rows(self, values_only: bool = True):
+        """Value tuples from row 1 on; missing rows come out empty"""
+        row_counter = 0
+        for rows, elements in _sheet_batches(self.workbook.zf, self.part):
+            if rows is not None:
+                rows = ((ref, self._plain_values(cells)) for ref, cells in rows)
+            else:
+                rows = ((element.get("r"), self._element_values(element)) for element in elements)
+
+            for row_ref, values in rows:
+                row_idx = int(row_ref) if row_ref else row_counter + 1
+                while row_counter + 1 < row_idx:
+                    row_counter += 1
+                    yield ()
+                row_counter = row_idx
+                yield values
+
+    def _plain_values(self, cells) -> tuple:
+        """Value tuple of the cells _batch_rows read"""
+        wb = self.workbook
+        strings = wb.shared_strings
+        date_styles = wb.date_styles
+        columns = _PLAIN_COLUMN_INDEX
+        values = []
+        for letters, style, data_type, raw, inline, text in cells:
+            if data_type == b"inlineStr":
+                if not inline:
+                    continue
+                value = _xml_text(text)
+            elif not raw:
                 continue
-
-            entry = {}
-            for header, value in zip(headers, row):
-                if value is not None and header in field_types:
-                    field_type = field_types[header]
-
-                    # Handle array types
-                    if field_type.startswith("array<"):
-                        # TODO: this is really stupid
-                        inner_type = field_type[6:-1]
-                        if isinstance(value, list):
-                            # Already a list (shouldn't happen in Excel, but handle it)
-                            if inner_type in ["int", "float", "bool"]:
-                                entry[header] = [convert_value(str(item), inner_type) for item in value]
-                            else:
-                                entry[header] = value
-                        else:
-                            # Convert comma-separated string to list with proper types
-                            value_str = str(value)
-                            raw_list = [x.strip() for x in value_str.split(",") if x.strip()]
-
-                            # Convert each element to the correct type
-                            if inner_type == "int":
-                                entry[header] = [convert_value(x, "int") for x in raw_list]
-                            elif inner_type == "float":
-                                entry[header] = [convert_value(x, "float") for x in raw_list]
-                            elif inner_type == "bool":
-                                entry[header] = [convert_value(x, "bool") for x in raw_list]
-                            else:
-                                # string or custom type
-                                entry[header] = raw_list
-
-                    # Handle basic types
-                    elif field_type == "int":
-                        entry[header] = convert_value(str(value), "int")
-                    elif field_type == "float":
-                        entry[header] = convert_value(str(value), "float")
-                    elif field_type == "bool":
-                        entry[header] = convert_value(str(value), "bool")
-
-                    # All other types: convert to string
-                    else:
-                        entry[header] = str(value) if not isinstance(value, (list, dict)) else value
-
-
-            if entry:
-                story_data.append(entry)
-
-        all_data["Story"] = story_data
-
-    if "MediaPostGroup" in wb.sheetnames:
-        ws = wb["MediaPostGroup"]
-        headers = [cell.value for cell in ws[1]]
-        mediapostgroup_data = []
-
-        # Build field type mapping
-        field_types = {
-            "group_id": "int",
-            "story_posts": "array<int>",
-        }
-
-        for row in ws.iter_rows(min_row=3, values_only=True):
-            if all(cell is None for cell in row):
+            elif data_type == b"s":
+                value = strings[int(raw)]
+            elif data_type == b"n" or not data_type:
+                value = float(raw) if (b"." in raw or b"E" in raw or b"e" in raw) else int(raw)
+                if date_styles:
+                    style = int(style or 0)
+                    if style in date_styles:
+                        try:
+                            value = _from_excel(value, wb.epoch, style in wb.timedelta_styles)
+                        except (OverflowError, ValueError):
+                            value = "#VALUE!"
+            elif data_type == b"b":
+                value = bool(int(raw))
+            elif data_type == b"d":
+                value = datetime.datetime.fromisoformat(_xml_text(raw))
+            else:
+                value = _xml_text(raw)
+
+            col = columns.get(letters)
+            if col is None:
+                col = columns[letters] = _column_index(letters.decode())
+            if col > len(values):
+                values.extend([None] * (col - len(values)))
+            values[col - 1] = value
+        return tuple(values)
+
+    def _element_values(self, element) -> tuple:
+        """Value tuple of a parsed <row> element"""
+        wb = self.workbook
+        strings = wb.shared_strings
+        date_styles = wb.date_styles
+        values = []
+        col = 0
+        for cell in element:
+            if cell.tag != _CELL_TAG:
                 continue
+            ref = cell.get("r")
+            col = _column_index(ref) if ref else col + 1
+            data_type = cell.get("t", "n")
+            value = None if data_type == "inlineStr" else (cell.findtext(_VALUE_TAG) or None)
+
+            formula = cell.find(_FORMULA_TAG)
+            if formula is not None:
+                # Formula text, like openpyxl without data_only (shared formulas are not expanded)
+                value = "=" + (formula.text or "")
+            elif value is not None:
+                if data_type == "n":
+                    value = float(value) if ("." in value or "E" in value or "e" in value) else int(value)
+                    if date_styles:
+                        style = int(cell.get("s", 0))
+                        if style in date_styles:
+                            try:
+                                value = _from_excel(value, wb.epoch, style in wb.timedelta_styles)
+                            except (OverflowError, ValueError):
+                                value = "#VALUE!"
+                elif data_type == "s":
+                    value = strings[int(value)]
+                elif data_type == "b":
+                    value = bool(int(value))
+                elif data_type == "d":
+                    value = datetime.datetime.fromisoformat(value)
+            elif data_type == "inlineStr":
+                inline = cell.find(_INLINE_TAG)
+                if inline is not None:
+                    value = _text_content(inline)
+
+            if value is not None:
+                if col > len(values):
+                    values.extend([None] * (col - len(values)))
+                values[col - 1] = value
+        element.clear()
+        return tuple(values)
+
+class FastWorkbook:
+    """Just enough of a read-only openpyxl workbook for iter_entries"""
+    def __init__(self, excel_path: str):
+        self.zf = zipfile.ZipFile(excel_path)
+        workbook_part, self.sheet_parts, related = workbook_parts(self.zf)
+        self.sheetnames = list(self.sheet_parts)
+
+        self.shared_strings = []
+        if "sharedStrings" in related:
+            self.shared_strings = _read_shared_strings(self.zf.read(related["sharedStrings"]))
+
+        self.date_styles, self.timedelta_styles = set(), set()
+        if "styles" in related:
+            self.date_styles, self.timedelta_styles = _read_date_styles(self.zf.read(related["styles"]))
+
+        self.epoch = _MAC_EPOCH if _date1904(self.zf, workbook_part) else _WINDOWS_EPOCH
+
+    def __getitem__(self, name: str) -> FastWorksheet:
+        return FastWorksheet(self, self.sheet_parts[name])
+
+    def close(self):
+        self.zf.close()
+
+READERS = ("openpyxl", "fast")
+
+def open_workbook(excel_path: str, reader: str = "openpyxl", read_only: bool = True):
+    if reader == "fast":
+        return FastWorkbook(excel_path)
+    return openpyxl.load_workbook(excel_path, read_only=read_only)
+
+# Sheets are decoded and written in this order, whichever path is taken
+SHEET_ORDER = [
+    "StoryGroup",
+    "Story",
+    "MediaPostGroup",
+    "StoryPosts",
+    "SocialMediaPost",
+]
+
+def _decode_sheet(excel_path: str, type_name: str, reader: str = "openpyxl"):
+    """Worker: open the workbook read-only itself and decode one sheet"""
+    wb = open_workbook(excel_path, reader)
+    try:
+        if type_name not in wb.sheetnames:
+            return None
+        return list(iter_entries(wb[type_name], SHEET_CONVERTERS[type_name]))
+    finally:
+        wb.close()
+
+def _iter_sheets_parallel(excel_path: str, jobs: int, reader: str = "openpyxl"):
+    """Yield (type_name, entries) in SHEET_ORDER while workers decode the rest"""
+    with ProcessPoolExecutor(max_workers=min(jobs, len(SHEET_ORDER))) as executor:
+        futures = [(type_name, executor.submit(_decode_sheet, excel_path, type_name, reader))
+                   for type_name in SHEET_ORDER]
+        for type_name, future in futures:
+            entries = future.result()
+            if entries is not None:
+                yield type_name, entries
+
+def _decode_sheets(excel_path: str, type_names: list, jobs: int = 1, reader: str = "openpyxl") -> dict:
+    """Decode only the given sheets, serially or in worker processes"""
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(type_names))) as executor:
+            futures = {type_name: executor.submit(_decode_sheet, excel_path, type_name, reader)
+                       for type_name in type_names}
+            return {type_name: future.result() for type_name, future in futures.items()}
+
+    wb = open_workbook(excel_path, reader)
+    try:
+        return {type_name: list(iter_entries(wb[type_name], SHEET_CONVERTERS[type_name]))
+                for type_name in type_names}
+    finally:
+        wb.close()
+
+def _iter_sheets(wb):
+    for type_name in SHEET_ORDER:
+        if type_name in wb.sheetnames:
+            yield type_name, iter_entries(wb[type_name], SHEET_CONVERTERS[type_name])
+
+def _write_streaming(sheets, output_path: str):
+    """Write the same bytes as json.dump(indent=2), one entry at a time"""
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("{")
+        first_type = True
+        for type_name, entries in sheets:
+            f.write("\n  " if first_type else ",\n  ")
+            f.write(json.dumps(type_name, ensure_ascii=False) + ": [")
+            first_type = False
+
+            first_entry = True
+            for entry in entries:
+                f.write("\n    " if first_entry else ",\n    ")
+                # JSON strings never contain raw newlines, so re-indenting is safe
+                f.write(json.dumps(entry, indent=2, ensure_ascii=False).replace("\n", "\n    "))
+                first_entry = False
+            f.write("]" if first_entry else "\n  ]")
+
+        f.write("}" if first_type else "\n}")
+
+# Sidecar cache: per-sheet content hash and decoded entries from the last run
+CACHE_SUFFIX = ".xlsxcache"
+CACHE_VERSION = 2
+SCHEMA_HASH = "d881c1e0b51e64c7"
+# Entries decoded by another version of this script are not reused
+CODE_HASH = hashlib.blake2b(Path(__file__).read_bytes(), digest_size=8).hexdigest()
+
+_SI_RE = re.compile(rb"<(?:\w+:)?si>(.*?)</(?:\w+:)?si>", re.S)
+_SHARED_REF_RE = re.compile(rb' t="s"[^>]*>\s*<(?:\w+:)?v>(\d+)<')
+
+def sheet_hashes(excel_path: str) -> dict:
+    """Content hash per sheet, read straight from the xlsx zip"""
+    with zipfile.ZipFile(excel_path) as zf:
+        workbook_part, sheets, related = workbook_parts(zf)
+        strings = _SI_RE.findall(zf.read(related["sharedStrings"])) if "sharedStrings" in related else []
+        # How the cells decode depends on the workbook too: which styles are date
+        # or time formats, and the date epoch
+        date_styles, timedelta_styles = (_read_date_styles(zf.read(related["styles"]))
+                                         if "styles" in related else (set(), set()))
+        formats = repr((sorted(date_styles), sorted(timedelta_styles),
+                        _date1904(zf, workbook_part))).encode("ascii")
+
+        hashes = {}
+        for name, part in sheets.items():
+            data = zf.read(part)
+            # Only cell content counts, not views, selections or column widths
+            sheet_data = data[data.find(b"sheetData"):data.rfind(b"sheetData")]
+            # Cells only hold shared string indices, and saving renumbers the table,
+            # so hash the strings themselves in place of their indices
+            parts = _SHARED_REF_RE.split(sheet_data)
+            parts[1::2] = [strings[int(idx)] if int(idx) < len(strings) else b""
+                           for idx in parts[1::2]]
+            parts.append(formats)
+            hashes[name] = hashlib.blake2b(b"\0".join(parts), digest_size=16).hexdigest()
+    return hashes
+
+def _file_digest(path: str):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def _load_cache(cache_path: str, with_entries: bool = True) -> dict:
+    """Header line (hashes, output digest), then one [type, entries] line per sheet.
+    Empty if missing, unreadable or written by another schema or script."""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.loads(f.readline())
+            if (not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION
+                    or cache.get("schema") != SCHEMA_HASH or cache.get("code") != CODE_HASH):
+                return {}
+            if with_entries:
+                cache["entries"] = dict(json.loads(line) for line in f)
+    except (OSError, ValueError, TypeError):
+        return {}
+    return cache
+
+def _excel_to_json_cached(excel_path: str, output_path: str, jobs: int = 1, reader: str = "openpyxl"):
+    """Re-decode only the sheets whose content hash changed since the last run"""
+    cache_path = str(output_path) + CACHE_SUFFIX
+    hashes = sheet_hashes(excel_path)
+    cache = _load_cache(cache_path, with_entries=False)
+    cached_hashes = cache.get("hashes", {})
+
+    type_names = [type_name for type_name in SHEET_ORDER if type_name in hashes]
+    stale = [type_name for type_name in type_names
+             if cached_hashes.get(type_name) != hashes[type_name]]
+
+    if not stale and cache.get("output") == _file_digest(output_path):
+        print(f"All {len(type_names)} sheet(s) unchanged, {output_path} is up to date")
+        return
+
+    cached_entries = _load_cache(cache_path).get("entries", {}) if len(stale) < len(type_names) else {}
+    # Sheets the header lists but whose entries did not make it into the file
+    stale = [type_name for type_name in type_names if type_name in stale or type_name not in cached_entries]
+    decoded = _decode_sheets(excel_path, stale, jobs, reader) if stale else {}
 
-            entry = {}
-            for header, value in zip(headers, row):
-                if value is not None and header in field_types:
-                    field_type = field_types[header]
-
-                    # Handle array types
-                    if field_type.startswith("array<"):
-                        # TODO: this is really stupid
-                        inner_type = field_type[6:-1]
-                        if isinstance(value, list):
-                            # Already a list (shouldn't happen in Excel, but handle it)
-                            if inner_type in ["int", "float", "bool"]:
-                                entry[header] = [convert_value(str(item), inner_type) for item in value]
-                            else:
-                                entry[header] = value
-                        else:
-                            # Convert comma-separated string to list with proper types
-                            value_str = str(value)
-                            raw_list = [x.strip() for x in value_str.split(",") if x.strip()]
-
-                            # Convert each element to the correct type
-                            if inner_type == "int":
-                                entry[header] = [convert_value(x, "int") for x in raw_list]
-                            elif inner_type == "float":
-                                entry[header] = [convert_value(x, "float") for x in raw_list]
-                            elif inner_type == "bool":
-                                entry[header] = [convert_value(x, "bool") for x in raw_list]
-                            else:
-                                # string or custom type
-                                entry[header] = raw_list
-
-                    # Handle basic types
-                    elif field_type == "int":
-                        entry[header] = convert_value(str(value), "int")
-                    elif field_type == "float":
-                        entry[header] = convert_value(str(value), "float")
-                    elif field_type == "bool":
-                        entry[header] = convert_value(str(value), "bool")
-
-                    # All other types: convert to string
-                    else:
-                        entry[header] = str(value) if not isinstance(value, (list, dict)) else value
-
-
-            if entry:
-                mediapostgroup_data.append(entry)
-
-        all_data["MediaPostGroup"] = mediapostgroup_data
-
-    if "StoryPosts" in wb.sheetnames:
-        ws = wb["StoryPosts"]
-        headers = [cell.value for cell in ws[1]]
-        storyposts_data = []
-
-        # Build field type mapping
-        field_types = {
-            "story_id": "int",
-            "posts": "array<int>",
-        }
-
-        for row in ws.iter_rows(min_row=3, values_only=True):
-            if all(cell is None for cell in row):
-                continue
+    all_data = {}
+    for type_name in type_names:
+        all_data[type_name] = decoded[type_name] if type_name in decoded else cached_entries[type_name]
+
+    content = json.dumps(all_data, indent=2, ensure_ascii=False).encode("utf-8")
+    with open(output_path, "wb") as f:
+        f.write(content)
+    share_dataset(output_path, all_data)
+
+    header = {
+        "version": CACHE_VERSION,
+        "schema": SCHEMA_HASH,
+        "code": CODE_HASH,
+        "output": hashlib.blake2b(content, digest_size=16).hexdigest(),
+        "hashes": {type_name: hashes[type_name] for type_name in type_names},
+    }
+    # Written aside and moved in place, so a killed run never leaves half a cache
+    partial = f"{cache_path}.{os.getpid()}.tmp"
+    with open(partial, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        for type_name, entries in all_data.items():
+            f.write(json.dumps([type_name, entries], ensure_ascii=False) + "\n")
+    os.replace(partial, cache_path)
+
+    print(f"Reused {len(type_names) - len(stale)} cached sheet(s), decoded {len(stale)}")
+
+def excel_to_json(excel_path: str, output_path: str, stream: bool = False, jobs: int = 1,
+                  cache: bool = False, reader: str = "openpyxl"):
+    if cache:
+        _excel_to_json_cached(excel_path, output_path, jobs, reader)
+        print(f"Converted {excel_path} to {output_path}")
+        return
+
+    if jobs > 1:
+        sheets = _iter_sheets_parallel(excel_path, jobs, reader)
+        if stream:
+            _write_streaming(sheets, output_path)
+        else:
+            all_data = dict(sheets)
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(all_data, f, indent=2, ensure_ascii=False)
+            share_dataset(output_path, all_data)
+        print(f"Converted {excel_path} to {output_path}")
+        return
+
+    if stream:
+        # Read-only worksheets hand out rows lazily, so memory stays flat
+        wb = open_workbook(excel_path, reader)
+        try:
+            _write_streaming(_iter_sheets(wb), output_path)
+        finally:
+            wb.close()
+        print(f"Converted {excel_path} to {output_path}")
+        return
 
-            entry = {}
-            for header, value in zip(headers, row):
-                if value is not None and header in field_types:
-                    field_type = field_types[header]
-
-                    # Handle array types
-                    if field_type.startswith("array<"):
-                        # TODO: this is really stupid
-                        inner_type = field_type[6:-1]
-                        if isinstance(value, list):
-                            # Already a list (shouldn't happen in Excel, but handle it)
-                            if inner_type in ["int", "float", "bool"]:
-                                entry[header] = [convert_value(str(item), inner_type) for item in value]
-                            else:
-                                entry[header] = value
-                        else:
-                            # Convert comma-separated string to list with proper types
-                            value_str = str(value)
-                            raw_list = [x.strip() for x in value_str.split(",") if x.strip()]
-
-                            # Convert each element to the correct type
-                            if inner_type == "int":
-                                entry[header] = [convert_value(x, "int") for x in raw_list]
-                            elif inner_type == "float":
-                                entry[header] = [convert_value(x, "float") for x in raw_list]
-                            elif inner_type == "bool":
-                                entry[header] = [convert_value(x, "bool") for x in raw_list]
-                            else:
-                                # string or custom type
-                                entry[header] = raw_list
-
-                    # Handle basic types
-                    elif field_type == "int":
-                        entry[header] = convert_value(str(value), "int")
-                    elif field_type == "float":
-                        entry[header] = convert_value(str(value), "float")
-                    elif field_type == "bool":
-                        entry[header] = convert_value(str(value), "bool")
-
-                    # All other types: convert to string
-                    else:
-                        entry[header] = str(value) if not isinstance(value, (list, dict)) else value
-
-
-            if entry:
-                storyposts_data.append(entry)
-
-        all_data["StoryPosts"] = storyposts_data
-
-    if "SocialMediaPost" in wb.sheetnames:
-        ws = wb["SocialMediaPost"]
-        headers = [cell.value for cell in ws[1]]
-        socialmediapost_data = []
-
-        # Build field type mapping
-        field_types = {
-            "post_id": "int",
-            "user_name": "string",
-            "content_text": "string",
-        }
-
-        for row in ws.iter_rows(min_row=3, values_only=True):
-            if all(cell is None for cell in row):
-                continue
+    wb = open_workbook(excel_path, reader, read_only=False)
+    all_data = {}
 
-            entry = {}
-            for header, value in zip(headers, row):
-                if value is not None and header in field_types:
-                    field_type = field_types[header]
-
-                    # Handle array types
-                    if field_type.startswith("array<"):
-                        # TODO: this is really stupid
-                        inner_type = field_type[6:-1]
-                        if isinstance(value, list):
-                            # Already a list (shouldn't happen in Excel, but handle it)
-                            if inner_type in ["int", "float", "bool"]:
-                                entry[header] = [convert_value(str(item), inner_type) for item in value]
-                            else:
-                                entry[header] = value
-                        else:
-                            # Convert comma-separated string to list with proper types
-                            value_str = str(value)
-                            raw_list = [x.strip() for x in value_str.split(",") if x.strip()]
-
-                            # Convert each element to the correct type
-                            if inner_type == "int":
-                                entry[header] = [convert_value(x, "int") for x in raw_list]
-                            elif inner_type == "float":
-                                entry[header] = [convert_value(x, "float") for x in raw_list]
-                            elif inner_type == "bool":
-                                entry[header] = [convert_value(x, "bool") for x in raw_list]
-                            else:
-                                # string or custom type
-                                entry[header] = raw_list
-
-                    # Handle basic types
-                    elif field_type == "int":
-                        entry[header] = convert_value(str(value), "int")
-                    elif field_type == "float":
-                        entry[header] = convert_value(str(value), "float")
-                    elif field_type == "bool":
-                        entry[header] = convert_value(str(value), "bool")
-
-                    # All other types: convert to string
-                    else:
-                        entry[header] = str(value) if not isinstance(value, (list, dict)) else value
-
-
-            if entry:
-                socialmediapost_data.append(entry)
-
-        all_data["SocialMediaPost"] = socialmediapost_data
+    for type_name, entries in _iter_sheets(wb):
+        all_data[type_name] = list(entries)
 
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(all_data, f, indent=2, ensure_ascii=False)
+    share_dataset(output_path, all_data)
 
     print(f"Converted {excel_path} to {output_path}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python excel_to_json.py <input.xlsx> <output.json>")
-        sys.exit(1)
-
-    excel_to_json(sys.argv[1], sys.argv[2])
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Convert the content workbook to JSON")
+    parser.add_argument("input", help="input .xlsx workbook")
+    parser.add_argument("output", help="output .json file")
+    parser.add_argument("--stream", action="store_true",
+                        help="read-only workbook, entries written as they are decoded")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="decode sheets in N worker processes")
+    parser.add_argument("--cache", action="store_true",
+                        help=f"only re-decode sheets that changed, using <output>{CACHE_SUFFIX}")
+    parser.add_argument("--reader", choices=READERS, default="openpyxl",
+                        help="workbook reader; 'fast' parses the xlsx XML directly")
+    parser.add_argument("--validate", action="store_true",
+                        help="validate the output afterwards, reusing the converted data")
+    args = parser.parse_args()
+
+    excel_to_json(args.input, args.output, stream=args.stream, jobs=args.jobs, cache=args.cache,
+                  reader=args.reader)
+
+    if args.validate:
+        from validate_data import DataValidator
+        sys.exit(0 if DataValidator().validate_files([args.output]) else 1)
\ No newline at end of file
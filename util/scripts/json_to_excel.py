@@ -1,8 +1,44 @@
 #!/usr/bin/env python3
 import openpyxl
-import json
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+import math
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import sys
+import argparse
+
+from dataset import load_dataset
+
+FIELD_TYPES = {
+    "StoryGroup": {
+        "group_id": "int",
+        "stories": "array<int>",
+    },
+    "Story": {
+        "story_id": "int",
+        "news_headline": "string",
+        "news_content": "string",
+        "news_fake": "bool",
+    },
+    "MediaPostGroup": {
+        "group_id": "int",
+        "story_posts": "array<int>",
+    },
+    "StoryPosts": {
+        "story_id": "int",
+        "posts": "array<int>",
+    },
+    "SocialMediaPost": {
+        "post_id": "int",
+        "user_name": "string",
+        "content_text": "string",
+    },
+}
 
 def format_value(value, field_type: str):
     if field_type.startswith("array<"):
@@ -14,89 +50,278 @@ def format_value(value, field_type: str):
     else:
         return value
 
-def json_to_excel(json_path: str, excel_path: str, output_path: str):
-    with open(json_path, "r", encoding="utf-8") as f:
-        json_data = json.load(f)
+def _format_array(value):
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value)
+    return str(value)
 
-    wb = openpyxl.load_workbook(excel_path)
+def _format_bool(value):
+    return "TRUE" if value else "FALSE"
 
-    if "StoryGroup" in wb.sheetnames and "StoryGroup" in json_data:
-        ws = wb["StoryGroup"]
-        headers = [cell.value for cell in ws[1]]
+def _formatter(field_type: str):
+    """Single-argument equivalent of format_value for one field type"""
+    if field_type.startswith("array<"):
+        return _format_array
+    elif field_type == "bool":
+        return _format_bool
+    return None
 
-        field_types = {
-            "group_id": "int",
-            "stories": "array<int>",
-        }
+def compile_row_encoder(headers, field_types: dict):
+    """Build row(entry) -> list of cell values in header order, for entry dicts
+    or the entity objects built from them"""
+    columns = [(header, _formatter(field_types[header]) if header in field_types else None,
+                header in field_types)
+               for header in headers]
 
-        for row_idx, entry in enumerate(json_data["StoryGroup"], start=3):
-            for col_idx, header in enumerate(headers, start=1):
-                if header in entry and header in field_types:
-                    value = entry[header]
-                    formatted_value = format_value(value, field_types[header])
-                    ws.cell(row=row_idx, column=col_idx, value=formatted_value)
+    def encode(entry: dict) -> list:
+        row = []
+        for header, fmt, known in columns:
+            if known and header in entry:
+                value = entry[header]
+                row.append(fmt(value) if fmt is not None else value)
+            else:
+                row.append(None)
+        return row
 
-    if "Story" in wb.sheetnames and "Story" in json_data:
-        ws = wb["Story"]
-        headers = [cell.value for cell in ws[1]]
+    return encode
 
-        field_types = {
-            "story_id": "int",
-            "news_headline": "string",
-            "news_content": "string",
-            "news_fake": "bool",
-        }
+def _copy_header_cell(ws, cell):
+    out = WriteOnlyCell(ws, value=cell.value)
+    if cell.has_style:
+        out.font = copy(cell.font)
+        out.fill = copy(cell.fill)
+        out.border = copy(cell.border)
+        out.alignment = copy(cell.alignment)
+        out.number_format = cell.number_format
+    return out
 
-        for row_idx, entry in enumerate(json_data["Story"], start=3):
-            for col_idx, header in enumerate(headers, start=1):
-                if header in entry and header in field_types:
-                    value = entry[header]
-                    formatted_value = format_value(value, field_types[header])
-                    ws.cell(row=row_idx, column=col_idx, value=formatted_value)
+def _json_to_excel_streaming(json_data: dict, excel_path: str, output_path: str):
+    """Copy the template's header rows into write-only sheets and append entries in bulk"""
+    template = openpyxl.load_workbook(excel_path)
+    wb = openpyxl.Workbook(write_only=True)
 
-    if "MediaPostGroup" in wb.sheetnames and "MediaPostGroup" in json_data:
-        ws = wb["MediaPostGroup"]
-        headers = [cell.value for cell in ws[1]]
+    for src in template.worksheets:
+        ws = wb.create_sheet(src.title)
+        # Column and sheet view settings must be in place before the first row
+        for key, dim in src.column_dimensions.items():
+            if dim.width:
+                ws.column_dimensions[key].width = dim.width
+        if src.freeze_panes:
+            ws.freeze_panes = src.freeze_panes
 
-        field_types = {
-            "group_id": "int",
-            "story_posts": "array<int>",
-        }
+        header_rows = [list(row) for row in src.iter_rows(min_row=1, max_row=2)]
+        for row in header_rows:
+            ws.append([_copy_header_cell(ws, cell) for cell in row])
 
-        for row_idx, entry in enumerate(json_data["MediaPostGroup"], start=3):
-            for col_idx, header in enumerate(headers, start=1):
-                if header in entry and header in field_types:
-                    value = entry[header]
-                    formatted_value = format_value(value, field_types[header])
-                    ws.cell(row=row_idx, column=col_idx, value=formatted_value)
+        entries = json_data.get(src.title)
+        if entries is None or src.title not in FIELD_TYPES:
+            continue
+        encode = compile_row_encoder([cell.value for cell in header_rows[0]], FIELD_TYPES[src.title])
+        for entry in entries:
+            ws.append(encode(entry))
 
-    if "StoryPosts" in wb.sheetnames and "StoryPosts" in json_data:
-        ws = wb["StoryPosts"]
-        headers = [cell.value for cell in ws[1]]
+    template.close()
+    wb.save(output_path)
 
-        field_types = {
-            "story_id": "int",
-            "posts": "array<int>",
-        }
+# XML engine: each sheet's rows are rendered straight to SpreadsheetML, in worker
+# processes if asked, and zipped into a copy of the template package. The template
+# keeps its styles, header rows and sheet settings; only sheetData and the shared
+# string table change.
 
-        for row_idx, entry in enumerate(json_data["StoryPosts"], start=3):
-            for col_idx, header in enumerate(headers, start=1):
-                if header in entry and header in field_types:
-                    value = entry[header]
-                    formatted_value = format_value(value, field_types[header])
-                    ws.cell(row=row_idx, column=col_idx, value=formatted_value)
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_DOC_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_SST_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"
+_SST_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
 
-    if "SocialMediaPost" in wb.sheetnames and "SocialMediaPost" in json_data:
-        ws = wb["SocialMediaPost"]
-        headers = [cell.value for cell in ws[1]]
+_TEMPLATE_SI_RE = re.compile(rb"<si>.*?</si>|<si/>", re.S)
+_DATA_ROW_RE = re.compile(r'<row r="(?:[3-9]|\d{2,})"')
+_DIMENSION_RE = re.compile(r'<dimension ref="[^"]*"\s*/>')
+
+def _part_rels(zf, part: str) -> list:
+    """(id, type, target part) for every relationship of a part in the zip"""
+    folder, _, name = part.rpartition("/")
+    rels_path = f"{folder}/_rels/{name}.rels" if folder else f"_rels/{name}.rels"
+    root = ET.fromstring(zf.read(rels_path))
+    rels = []
+    for rel in root.iter(_NS_PKG_REL + "Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target[1:]
+        elif folder:
+            target = f"{folder}/{target}"
+        rels.append((rel.get("Id"), rel.get("Type", ""), target))
+    return rels
+
+def _template_parts(zf) -> tuple:
+    """Return (workbook part, {sheet name: worksheet part}, shared strings part or None)"""
+    workbook_part = next(target for _, rel_type, target in _part_rels(zf, "")
+                         if rel_type.endswith("/officeDocument"))
+    rels = _part_rels(zf, workbook_part)
+    targets = {rel_id: target for rel_id, _, target in rels}
+    sst_part = next((target for _, rel_type, target in rels if rel_type == _SST_REL_TYPE), None)
+
+    sheets = {}
+    for sheet in ET.fromstring(zf.read(workbook_part)).iter("{" + _NS_MAIN + "}sheet"):
+        sheets[sheet.get("name")] = targets[sheet.get(_NS_DOC_REL + "id")]
+    return workbook_part, sheets, sst_part
+
+def _escape_text(text: str) -> str:
+    if ILLEGAL_CHARACTERS_RE.search(text):
+        raise ValueError(f"{text!r} contains characters that cannot be used in worksheets")
+    return (text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            .replace("\r", "&#13;"))
+
+def _render_si(text: str) -> str:
+    if text[:1].isspace() or text[-1:].isspace():
+        return f'<si><t xml:space="preserve">{_escape_text(text)}</t></si>'
+    return f"<si><t>{_escape_text(text)}</t></si>"
+
+def _count_strings(headers: list, field_types: dict, entries: list) -> int:
+    """Number of distinct strings _render_sheet puts in the shared strings for a sheet"""
+    encode = compile_row_encoder(headers, field_types)
+    strings = set()
+    for entry in entries:
+        strings.update(value for value in encode(entry) if isinstance(value, str))
+    return len(strings)
+
+def _render_sheet(offset: int, sheet_xml: str, headers: list, field_types: dict, entries: list) -> tuple:
+    """Render one sheet, its new strings numbered from offset on; returns
+    (worksheet xml, <si> items for its new strings, their count)"""
+    encode = compile_row_encoder(headers, field_types)
+    rows = [encode(entry) for entry in entries]
+    strings = {}
+    for row in rows:
+        for value in row:
+            if isinstance(value, str) and value not in strings:
+                strings[value] = len(strings)
+
+    letters = [get_column_letter(col) for col in range(1, len(headers) + 1)]
+    out = []
+    for row_idx, row in enumerate(rows, start=3):
+        out.append(f'<row r="{row_idx}">')
+        for letter, value in zip(letters, row):
+            if value is None:
+                continue
+            if isinstance(value, str):
+                out.append(f'<c r="{letter}{row_idx}" t="s"><v>{strings[value] + offset}</v></c>')
+            elif isinstance(value, bool):
+                out.append(f'<c r="{letter}{row_idx}" t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, float) and not math.isfinite(value):
+                # No number in a worksheet is NaN or infinite: an empty value, as openpyxl writes it
+                out.append(f'<c r="{letter}{row_idx}" t="n"><v/></c>')
+            elif isinstance(value, (int, float)):
+                out.append(f'<c r="{letter}{row_idx}"><v>{value!r}</v></c>')
+            else:
+                raise ValueError(f"Cannot convert {value!r} to Excel")
+        out.append("</row>")
+
+    # Keep the template's header rows, drop anything it had below them
+    sheet_xml = sheet_xml.replace("<sheetData/>", "<sheetData></sheetData>")
+    head, tail = sheet_xml.split("</sheetData>", 1)
+    data_start = _DATA_ROW_RE.search(head)
+    if data_start:
+        head = head[:data_start.start()]
+    dimension = f"A1:{letters[-1] if letters else 'A'}{max(2, len(rows) + 2)}"
+    head = _DIMENSION_RE.sub(f'<dimension ref="{dimension}"/>', head, count=1)
+
+    sheet = "".join([head, *out, "</sheetData>", tail]).encode("utf-8")
+    return sheet, "".join(_render_si(text) for text in strings).encode("utf-8"), len(strings)
+
+def _json_to_excel_xml(json_data: dict, excel_path: str, output_path: str, jobs: int = 1):
+    """Render the sheets as XML parts (in parallel with jobs > 1) and zip them up"""
+    headers = {}
+    template_wb = openpyxl.load_workbook(excel_path, read_only=True)
+    for name in template_wb.sheetnames:
+        first_row = next(template_wb[name].iter_rows(max_row=1, values_only=True), ())
+        headers[name] = list(first_row)
+    template_wb.close()
 
-        field_types = {
-            "post_id": "int",
-            "user_name": "string",
-            "content_text": "string",
-        }
+    with zipfile.ZipFile(excel_path) as template:
+        workbook_part, sheet_parts, sst_part = _template_parts(template)
+        template_si = _TEMPLATE_SI_RE.findall(template.read(sst_part)) if sst_part else []
+
+        names = [name for name in sheet_parts if name in json_data and name in FIELD_TYPES]
+        sheets = [(template.read(sheet_parts[name]).decode("utf-8"), headers[name], FIELD_TYPES[name],
+                   json_data[name])
+                  for name in names]
+
+        # A sheet's strings are numbered after the template's and those of all sheets before it
+        offset = len(template_si)
+        if jobs > 1 and len(names) > 1:
+            # Counted here first, so no sheet waits on another's worker
+            offsets = []
+            for _, sheet_headers, field_types, entries in sheets:
+                offsets.append(offset)
+                offset += _count_strings(sheet_headers, field_types, entries)
+            with ProcessPoolExecutor(max_workers=min(jobs, len(names))) as executor:
+                futures = [executor.submit(_render_sheet, sheet_offset, *sheet)
+                           for sheet_offset, sheet in zip(offsets, sheets)]
+                results = [future.result() for future in futures]
+        else:
+            results = []
+            for sheet in sheets:
+                results.append(_render_sheet(offset, *sheet))
+                offset += results[-1][2]
+
+        rendered = {sheet_parts[name]: sheet for name, (sheet, _, _) in zip(names, results)}
+        unique_count = len(template_si) + sum(count for _, _, count in results)
+        sst = b"".join([
+            f'{_XML_HEADER}<sst xmlns="{_NS_MAIN}" uniqueCount="{unique_count}">'.encode("utf-8"),
+            *template_si, *(si for _, si, _ in results), b"</sst>",
+        ])
+
+        workbook_folder, _, workbook_name = workbook_part.rpartition("/")
+        workbook_rels = f"{workbook_folder}/_rels/{workbook_name}.rels"
+        new_sst_part = sst_part or f"{workbook_folder}/sharedStrings.xml"
+
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as out:
+            for name in template.namelist():
+                if name in rendered:
+                    data = rendered[name]
+                elif name == sst_part:
+                    data = sst
+                elif sst_part is None and name == "[Content_Types].xml":
+                    data = template.read(name).replace(b"</Types>", (
+                        f'<Override PartName="/{new_sst_part}" ContentType="{_SST_CONTENT_TYPE}"/></Types>'
+                    ).encode("utf-8"))
+                elif sst_part is None and name == workbook_rels:
+                    data = template.read(name).replace(b"</Relationships>", (
+                        f'<Relationship Id="rIdSharedStrings" Type="{_SST_REL_TYPE}" '
+                        f'Target="sharedStrings.xml"/></Relationships>'
+                    ).encode("utf-8"))
+                else:
+                    data = template.read(name)
+                out.writestr(name, data)
+            if sst_part is None:
+                out.writestr(new_sst_part, sst)
+
+ENGINES = ("openpyxl", "xml")
+
+def json_to_excel(json_path: str, excel_path: str, output_path: str, stream: bool = False,
+                  engine: str = "openpyxl", jobs: int = 1):
+    json_data = load_dataset(json_path).data
+
+    if engine == "xml":
+        _json_to_excel_xml(json_data, excel_path, output_path, jobs)
+        print(f"Populated {output_path} with data from {json_path}")
+        return
+
+    if stream:
+        _json_to_excel_streaming(json_data, excel_path, output_path)
+        print(f"Populated {output_path} with data from {json_path}")
+        return
+
+    wb = openpyxl.load_workbook(excel_path)
+
+    for type_name, field_types in FIELD_TYPES.items():
+        if type_name not in wb.sheetnames or type_name not in json_data:
+            continue
+        ws = wb[type_name]
+        headers = [cell.value for cell in ws[1]]
 
-        for row_idx, entry in enumerate(json_data["SocialMediaPost"], start=3):
+        for row_idx, entry in enumerate(json_data[type_name], start=3):
             for col_idx, header in enumerate(headers, start=1):
                 if header in entry and header in field_types:
                     value = entry[header]
@@ -107,8 +332,17 @@ def json_to_excel(json_path: str, excel_path: str, output_path: str):
     print(f"Populated {output_path} with data from {json_path}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python json_to_excel.py <input.json> <template.xlsx> <output.xlsx>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Fill the Excel template with data from a JSON file")
+    parser.add_argument("input", help="input .json")
+    parser.add_argument("template", help="template .xlsx")
+    parser.add_argument("output", help="output .xlsx")
+    parser.add_argument("--stream", action="store_true",
+                        help="write rows through write-only worksheets to keep memory flat")
+    parser.add_argument("--engine", choices=ENGINES, default="openpyxl",
+                        help="'xml' renders sheet XML directly and zips it into a copy of the template")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="with --engine xml, render sheets in N worker processes")
+    args = parser.parse_args()
 
-    json_to_excel(sys.argv[1], sys.argv[2], sys.argv[3])
\ No newline at end of file
+    json_to_excel(args.input, args.template, args.output, stream=args.stream, engine=args.engine,
+                  jobs=args.jobs)
\ No newline at end of file
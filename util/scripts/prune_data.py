@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Reachability pruning for exported JSON data
+Keeps the entries of the root types and whatever they reach through references,
+and drops the rest: drafts left in the workbook that nothing links to
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+from collections import deque
+from typing import Dict, List, Any, Set, Tuple
+
+from columns import OffsetColumn, missing
+from dataset import REFERENCES, Dataset, load_dataset, share_dataset
+
+# Types kept whole: marked `root: true` in the schema, or not referenced by any type
+ROOT_TYPES = [
+    "StoryGroup",
+    "MediaPostGroup",
+]
+
+def reachable(data: Dict[str, Any]) -> Dict[str, Set[int]]:
+    """Positions of the entries of each type reached from the root types, by a
+    breadth-first walk over references. Each entry and reference is visited once.
+    Positions rather than the id lookups of Dataset, so that every entry sharing
+    a referenced id is kept, for the validator to report."""
+    lists = {type_name: entries for type_name, entries in data.items()
+             if type_name in REFERENCES and isinstance(entries, list)}
+
+    # (type, field) -> {value: positions}, for the fields references point at
+    targets: Dict[Tuple[str, str], Dict[Any, List[int]]] = {}
+    for references in REFERENCES.values():
+        for _, target_type, target_field, _ in references:
+            if (target_type, target_field) in targets or target_type not in lists:
+                continue
+            index = targets[(target_type, target_field)] = {}
+            for position, entry in enumerate(lists[target_type]):
+                if isinstance(entry, dict):
+                    try:
+                        index.setdefault(entry.get(target_field), []).append(position)
+                    except TypeError:
+                        pass
+
+    reached: Dict[str, Set[int]] = {type_name: set() for type_name in lists}
+    queue = deque()
+    for type_name in ROOT_TYPES:
+        for position in range(len(lists.get(type_name, ()))):
+            reached[type_name].add(position)
+            queue.append((type_name, position))
+
+    while queue:
+        type_name, position = queue.popleft()
+        entry = lists[type_name][position]
+        if not isinstance(entry, dict):
+            continue
+        for field_name, target_type, target_field, is_many in REFERENCES[type_name]:
+            index = targets.get((target_type, target_field))
+            value = entry.get(field_name)
+            if index is None or value is None:
+                continue
+            for ref_id in (value if is_many and isinstance(value, list) else [value]):
+                try:
+                    positions = index.get(ref_id, ())
+                except TypeError:
+                    continue
+                for target_position in positions:
+                    if target_position not in reached[target_type]:
+                        reached[target_type].add(target_position)
+                        queue.append((target_type, target_position))
+
+    return reached
+
+def prune(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Tuple[int, int]]]:
+    """The data without unreachable entries, and (kept, total) per pruned type.
+    Keys the schema does not know, and types that are not lists, are kept as they are."""
+    reached = reachable(data)
+    pruned = {}
+    counts = {}
+    for type_name, entries in data.items():
+        if type_name not in reached:
+            pruned[type_name] = entries
+            continue
+        kept = reached[type_name]
+        pruned[type_name] = [entry for position, entry in enumerate(entries) if position in kept]
+        counts[type_name] = (len(kept), len(entries))
+    return pruned, counts
+
+def dangling(dataset: Dataset) -> Dict[Tuple[str, str], int]:
+    """Number of ids per reference field with no entry to point to, checked over
+    whole columns. Pruning keeps these: they reach nothing."""
+    counts = {}
+    for type_name, references in REFERENCES.items():
+        if not dataset.entries(type_name):
+            continue
+        table = dataset.columns(type_name)
+        for field_name, target_type, target_field, _ in references:
+            column = table[field_name]
+            if isinstance(column, OffsetColumn):
+                values = column.values
+            elif table.packed(field_name):
+                values = column
+            else:
+                # Not all of one type: only ids that are set and hashable
+                values = [value for value in column if value is not None]
+            try:
+                count = len(missing(values, dataset.index(target_type, target_field)))
+            except TypeError:
+                continue
+            if count:
+                counts[(type_name, field_name)] = count
+    return counts
+
+def prune_file(input_path: str, output_path: str, dry_run: bool = False) -> None:
+    """Prune a JSON data file and print what was dropped"""
+    dataset = load_dataset(input_path)
+    size = os.path.getsize(input_path)
+
+    pruned, counts = prune(dataset.data)
+    if all(kept == total for kept, total in counts.values()):
+        # Nothing to drop: keep the file as it was written
+        content = None
+        pruned_size = size
+    else:
+        content = json.dumps(pruned, indent=2, ensure_ascii=False).encode("utf-8")
+        pruned_size = len(content)
+
+    for type_name, (kept, total) in counts.items():
+        print(f"  {type_name:20s} {kept:8d} / {total:8d} kept, {total - kept} unreachable")
+    for (type_name, field_name), count in dangling(dataset).items():
+        print(f"  {type_name + '.' + field_name:20s} {count:8d} reference(s) to missing entries")
+    print(f"  {'size':20s} {pruned_size:8d} / {size:8d} bytes "
+          f"({(pruned_size - size) / max(size, 1):+.1%})")
+
+    if dry_run:
+        return
+    if content is not None:
+        with open(output_path, "wb") as f:
+            f.write(content)
+        share_dataset(output_path, pruned)
+    elif not os.path.exists(output_path) or not os.path.samefile(input_path, output_path):
+        shutil.copyfile(input_path, output_path)
+        share_dataset(output_path, dataset.data)
+    print(f"Pruned {input_path} to {output_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop entries the root types do not reach through references",
+                                     epilog="Example: python prune_data.py data.json data.pruned.json")
+    parser.add_argument("input", help="input .json file, as written by excel_to_json")
+    parser.add_argument("output", nargs="?", help="output .json file (default: overwrite the input)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only print what would be dropped")
+    parser.add_argument("--validate", action="store_true",
+                        help="validate the output afterwards, without reading it again")
+    args = parser.parse_args()
+
+    output = args.output or args.input
+    try:
+        prune_file(args.input, output, dry_run=args.dry_run)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.validate:
+        from validate_data import DataValidator
+        success = DataValidator().validate_files([args.input if args.dry_run else output])
+        sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
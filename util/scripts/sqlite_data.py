@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+SQLite store for the content data
+Loads JSON data files or the workbook into a database laid out from the schema,
+checks references and uniqueness there as indexed SQL, and exports the game JSON.
+The checks report what validate_data reports for the same file, with its error
+codes and messages, for data that passes its field checks: values the validator
+converts or rejects, such as "7" for an int, are compared as stored here.
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from itertools import count, repeat
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Tuple
+
+from dataset import ID_FIELDS, REFERENCES, load_dataset
+from validate_data import REFERENCE_CHECKS, UNIQUE_KEYS, format_error
+
+# type -> ((field, schema type), ...) in schema order
+FIELDS = {
+    "StoryGroup": (
+        ("group_id", "int"),
+        ("stories", "array<int>"),
+    ),
+    "Story": (
+        ("story_id", "int"),
+        ("news_headline", "string"),
+        ("news_content", "string"),
+        ("news_fake", "bool"),
+    ),
+    "MediaPostGroup": (
+        ("group_id", "int"),
+        ("story_posts", "array<int>"),
+    ),
+    "StoryPosts": (
+        ("story_id", "int"),
+        ("posts", "array<int>"),
+    ),
+    "SocialMediaPost": (
+        ("post_id", "int"),
+        ("user_name", "string"),
+        ("content_text", "string"),
+    ),
+}
+
+# (type, field) of the array fields, each with a junction table of its elements:
+# references_many fields join their targets through it
+JUNCTIONS = [(type_name, field) for type_name, fields in FIELDS.items()
+             for field, field_type in fields if field_type.startswith("array<")]
+
+def junction_table(type_name: str, field: str) -> str:
+    return f"{type_name}__{field}"
+
+def ddl() -> List[str]:
+    """CREATE statements for the tables and their lookup indexes. Columns carry no
+    declared type, so values are stored as they were given; arrays are kept as
+    JSON text. _row, the primary key, is the position of the entry in its list."""
+    statements = [
+        'CREATE TABLE "_lists" ("type" TEXT PRIMARY KEY, "position" INTEGER NOT NULL)',
+    ]
+    indexed = set()
+    for type_name, fields in FIELDS.items():
+        columns = [('"_row" INTEGER PRIMARY KEY', "entry position")]
+        columns += [(f'"{field}"', field_type) for field, field_type in fields]
+        body = "\n".join(f'    {column}{"," if position < len(columns) - 1 else ""}  -- {comment}'
+                         for position, (column, comment) in enumerate(columns))
+        statements.append(f'CREATE TABLE "{type_name}" (\n{body}\n)')
+        for key in UNIQUE_KEYS[type_name]:
+            if key.kind != "elements":
+                indexed.add((type_name, key.fields))
+        for field, target_type, target_field, is_many in REFERENCES[type_name]:
+            indexed.add((target_type, (target_field,)))
+            if not is_many:
+                indexed.add((type_name, (field,)))
+
+    for type_name, field in JUNCTIONS:
+        table = junction_table(type_name, field)
+        statements.append(
+            f'CREATE TABLE "{table}" (\n'
+            f'    "_row" INTEGER NOT NULL REFERENCES "{type_name}"("_row"),\n'
+            f'    "_position" INTEGER NOT NULL,\n'
+            f'    "value",\n'
+            f'    PRIMARY KEY ("_row", "_position")\n'
+            f') WITHOUT ROWID')
+        statements.append(f'CREATE INDEX "{table}_value" ON "{table}"("value", "_row")')
+
+    for type_name, fields in sorted(indexed):
+        columns = ", ".join(f'"{field}"' for field in fields)
+        statements.append(f'CREATE INDEX "{type_name}_{"_".join(fields)}" ON "{type_name}"({columns})')
+    return statements
+
+def unique_index_ddl() -> List[str]:
+    """CREATE UNIQUE INDEX statements for the unique fields and keys of the schema.
+    Run by load once the data has no duplicates, so that later writes keep it so."""
+    statements = []
+    for type_name, keys in UNIQUE_KEYS.items():
+        for key in keys:
+            if key.kind == "elements":
+                continue
+            columns = ", ".join(f'"{field}"' for field in key.fields)
+            statements.append(f'CREATE UNIQUE INDEX IF NOT EXISTS "{type_name}_{"_".join(key.fields)}_unique" '
+                              f'ON "{type_name}"({columns})')
+    return statements
+
+# Types SQLite stores as they are; bools become 0 and 1
+_STORABLE = {int, float, str, bool, type(None)}
+# One encoder for every value: json.dumps() with options builds one per call
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+def _column_value(value: Any) -> Any:
+    """A value as stored: arrays, objects and other JSON values without an SQLite
+    type as JSON text"""
+    return value if type(value) in _STORABLE else _encode(value)
+
+def _iter_rows(type_name: str, entries: List[Any]) -> Iterator[list]:
+    fields = [field for field, _ in FIELDS[type_name]]
+    arrays = [column for column, (_, field_type) in enumerate(FIELDS[type_name], 1)
+              if field_type.startswith("array<")]
+    for position, entry in enumerate(entries):
+        if isinstance(entry, dict):
+            row = [position, *map(entry.get, fields)]
+            for column in arrays:
+                if row[column] is not None:
+                    row[column] = _encode(row[column])
+            if not _STORABLE.issuperset(map(type, row)):
+                row = list(map(_column_value, row))
+            yield row
+
+def _iter_elements(entries: List[Any], field: str) -> Iterator[tuple]:
+    for position, entry in enumerate(entries):
+        value = entry.get(field) if isinstance(entry, dict) else None
+        if isinstance(value, list):
+            if not _STORABLE.issuperset(map(type, value)):
+                value = list(map(_column_value, value))
+            yield from zip(repeat(position), count(), value)
+
+def read_data(input_path: str) -> Dict[str, Any]:
+    """{type: entries} from a JSON data file or, for .xlsx, the workbook"""
+    if Path(input_path).suffix.lower() == ".xlsx":
+        from excel_to_json import open_workbook, _iter_sheets
+        wb = open_workbook(input_path, "fast")
+        try:
+            return {type_name: list(entries) for type_name, entries in _iter_sheets(wb)}
+        finally:
+            wb.close()
+    return load_dataset(input_path).data
+
+def load(db_path: str, input_path: str) -> None:
+    """Replace the database with the data of a JSON file or workbook, in one
+    transaction. Indexes are built after the rows are in."""
+    start = time.perf_counter()
+    data = read_data(input_path)
+    if not isinstance(data, dict):
+        raise ValueError(f"{input_path} does not hold an object of type lists")
+
+    Path(db_path).unlink(missing_ok=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        statements = ddl()
+        tables = [statement for statement in statements if statement.startswith("CREATE TABLE")]
+        indexes = [statement for statement in statements if not statement.startswith("CREATE TABLE")]
+        with conn:
+            for statement in tables:
+                conn.execute(statement)
+            for position, (type_name, entries) in enumerate(data.items()):
+                if type_name not in FIELDS or not isinstance(entries, list):
+                    continue
+                conn.execute('INSERT INTO "_lists" VALUES (?, ?)', (type_name, position))
+                placeholders = ", ".join("?" * (len(FIELDS[type_name]) + 1))
+                conn.executemany(f'INSERT INTO "{type_name}" VALUES ({placeholders})',
+                                 _iter_rows(type_name, entries))
+                for junction_type, field in JUNCTIONS:
+                    if junction_type == type_name:
+                        conn.executemany(f'INSERT INTO "{junction_table(type_name, field)}" VALUES (?, ?, ?)',
+                                         _iter_elements(entries, field))
+            for statement in indexes:
+                conn.execute(statement)
+
+        counts = {type_name: conn.execute(f'SELECT count(*) FROM "{type_name}"').fetchone()[0]
+                  for (type_name,) in conn.execute('SELECT "type" FROM "_lists" ORDER BY "position"')}
+        print(f"Loaded {sum(counts.values())} entries from {input_path} into {db_path} "
+              f"in {time.perf_counter() - start:.2f} s")
+        for type_name, count in counts.items():
+            print(f"  {type_name:20s} {count:10d}")
+
+        if not uniqueness_errors(conn, db_path):
+            with conn:
+                for statement in unique_index_ddl():
+                    conn.execute(statement)
+            print("Unique indexes created")
+        else:
+            print("Duplicate values found, unique indexes not created (see validate)")
+    finally:
+        conn.close()
+
+def uniqueness_errors(conn: sqlite3.Connection, db_path: str) -> List[tuple]:
+    """Entries repeating a unique value of an earlier entry, as validator error
+    tuples in validator order: "not_unique" for single fields, by entry, then
+    "duplicate" with where the value was first seen for keys of several fields and
+    array elements. Each key is one self-join over its index."""
+    single = []
+    duplicates = []
+    for type_name, keys in UNIQUE_KEYS.items():
+        type_single = []
+        for position, key in enumerate(keys):
+            if key.kind == "elements":
+                table = junction_table(type_name, key.fields[0])
+                # An array may repeat an element of its own
+                rows = conn.execute(
+                    f'SELECT j."_row", j."value", (SELECT min(k."_row") FROM "{table}" k '
+                    f'WHERE k."value" = j."value") FROM "{table}" j '
+                    f'WHERE j."value" IS NOT NULL AND EXISTS ('
+                    f'SELECT 1 FROM "{table}" k WHERE k."value" = j."value" AND k."_row" < j."_row") '
+                    f'ORDER BY j."_row", j."_position"')
+                duplicates.extend((type_name, row, key.label, "duplicate", (value, db_path, first), db_path)
+                                  for row, value, first in rows)
+                continue
+
+            columns = ", ".join(f't."{field}"' for field in key.fields)
+            present = " AND ".join(f't."{field}" IS NOT NULL' for field in key.fields)
+            same = " AND ".join(f'u."{field}" = t."{field}"' for field in key.fields)
+            # Where the value was first seen is only looked up for the duplicates
+            rows = conn.execute(
+                f'SELECT t."_row", (SELECT min(u."_row") FROM "{type_name}" u WHERE {same}), {columns} '
+                f'FROM "{type_name}" t WHERE {present} AND EXISTS ('
+                f'SELECT 1 FROM "{type_name}" u WHERE {same} AND u."_row" < t."_row") '
+                f'ORDER BY t."_row"')
+            for row, first, *values in rows:
+                if key.kind == "field":
+                    type_single.append((row, position, (type_name, row, key.label, "not_unique", values[0],
+                                                        db_path)))
+                else:
+                    duplicates.append((type_name, row, key.label, "duplicate", (tuple(values), db_path, first),
+                                       db_path))
+        # The validator checks single fields entry by entry, in field order
+        type_single.sort(key=lambda item: item[:2])
+        single.extend(error for _, _, error in type_single)
+    return single + duplicates
+
+def reference_errors(conn: sqlite3.Connection) -> List[tuple]:
+    """References with no entry to point to, as validator error tuples in
+    validator order: the REFERENCE_CHECKS groups, each by entry, then field.
+    As in the validator, ids are what references point to, and the references of
+    entries without an id are not checked. Each reference field is one anti-join
+    over the index of its target."""
+    errors = []
+    for type_name, checks in REFERENCE_CHECKS:
+        id_field = ID_FIELDS[type_name]
+        if not id_field:
+            continue
+        group = []
+        for position, check in enumerate(checks):
+            if check.is_many:
+                table = junction_table(type_name, check.field_name)
+                referenced = 'j."value"'
+                source = (f'SELECT s."_row", j."_position", s."{id_field}", {referenced} FROM "{table}" j '
+                          f'JOIN "{type_name}" s ON s."_row" = j."_row"')
+            else:
+                referenced = f's."{check.field_name}"'
+                source = f'SELECT s."_row", 0, s."{id_field}", {referenced} FROM "{type_name}" s'
+            target_field = ID_FIELDS[check.target_type]
+            # A type without ids has nothing to point to
+            found = (f'EXISTS (SELECT 1 FROM "{check.target_type}" t WHERE t."{target_field}" = {referenced})'
+                     if target_field else "0")
+            rows = conn.execute(f'{source} WHERE s."{id_field}" IS NOT NULL AND {referenced} IS NOT NULL '
+                                f'AND NOT {found}')
+            group.extend((row, position, element, (type_name, obj_id, check.field_name, check.code, value, None))
+                         for row, element, obj_id, value in rows)
+        group.sort(key=lambda item: item[:3])
+        errors.extend(error for *_, error in group)
+    return errors
+
+def validate(db_path: str) -> bool:
+    """Check the uniqueness and reference constraints of a loaded database"""
+    start = time.perf_counter()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        errors = uniqueness_errors(conn, db_path) + reference_errors(conn)
+    finally:
+        conn.close()
+    print(f"Checked {db_path} in {time.perf_counter() - start:.2f} s")
+
+    print("\n" + "=" * 60)
+    if errors:
+        print(f"\n✗ {len(errors)} Error(s):")
+        for error in errors:
+            print(f"  • {format_error(error)}")
+        print("\n" + "=" * 60)
+        print("VALIDATION FAILED")
+        return False
+    print("\n✓ VALIDATION PASSED")
+    print("=" * 60)
+    return True
+
+def _stored_value(value: Any, field_type: str) -> Any:
+    """A column value back in its JSON form: arrays decoded, bools as true/false.
+    Values the validator would reject may not come back exactly as loaded."""
+    if field_type.startswith("array<") and isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    if field_type == "bool" and type(value) is int:
+        return bool(value)
+    return value
+
+def export(db_path: str, output_path: str) -> None:
+    """Write the database as a game JSON file, types in the order they were loaded
+    and entries in _row order, leaving out fields without a value"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        data = {}
+        for (type_name,) in conn.execute('SELECT "type" FROM "_lists" ORDER BY "position"'):
+            fields = FIELDS[type_name]
+            columns = ", ".join(f'"{field}"' for field, _ in fields)
+            entries = data[type_name] = []
+            for row in conn.execute(f'SELECT {columns} FROM "{type_name}" ORDER BY "_row"'):
+                entries.append({field: _stored_value(value, field_type)
+                                for (field, field_type), value in zip(fields, row) if value is not None})
+    finally:
+        conn.close()
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    print(f"Exported {db_path} to {output_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load content data into SQLite, check it there and export it back")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("ddl", help="print the CREATE statements")
+    load_parser = commands.add_parser("load", help="load a .json data file or the .xlsx workbook")
+    load_parser.add_argument("database", help="SQLite database, replaced")
+    load_parser.add_argument("input", help="input .json or .xlsx")
+    validate_parser = commands.add_parser("validate", help="check uniqueness and references")
+    validate_parser.add_argument("database", help="SQLite database")
+    export_parser = commands.add_parser("export", help="write the game JSON")
+    export_parser.add_argument("database", help="SQLite database")
+    export_parser.add_argument("output", help="output .json file")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "ddl":
+            print(";\n\n".join(ddl() + unique_index_ddl()) + ";")
+        elif args.command == "load":
+            load(args.database, args.input)
+        elif args.command == "validate":
+            sys.exit(0 if validate(args.database) else 1)
+        else:
+            export(args.database, args.output)
+    except (OSError, ValueError, OverflowError, sqlite3.Error) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
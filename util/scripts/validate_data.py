@@ -3,419 +3,1208 @@
 Standalone JSON data validator
 Validates data files against the schema without requiring Godot
 """
+import argparse
+import contextlib
+import gc
+import hashlib
+import io
 import json
+import pickle
+import re
 import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress, repeat
 from pathlib import Path
-from typing import Dict, List, Any, Set, Tuple
+from typing import Dict, List, Any, Set, Tuple, NamedTuple, Optional, Callable
+
+from columns import missing
+from dataset import load_dataset, forget_dataset
+
+# Validation plans, one per type: the id field used for cross references and one
+# (field, kind, required, unique, checks) step per field, in schema order.
+# Checks run in constraint order: ("min", n), ("max", n), ("max_length", n), ("enum", values)
+VALIDATION_PLANS = {
+    "StoryGroup": ("group_id", [
+        ('group_id', 'int', 'missing', True, []),
+        ('stories', 'array', 'empty', False, []),
+    ]),
+    "Story": ("story_id", [
+        ('story_id', 'int', 'missing', True, []),
+        ('news_headline', None, 'blank', False, [('max_length', 200)]),
+        ('news_content', None, 'blank', False, [('max_length', 1000)]),
+        ('news_fake', 'bool', 'missing', False, []),
+    ]),
+    "MediaPostGroup": ("group_id", [
+        ('group_id', 'int', 'missing', True, []),
+        ('story_posts', 'array', 'empty', False, []),
+    ]),
+    "StoryPosts": ("story_id", [
+        ('story_id', 'int', 'missing', False, []),
+        ('posts', 'array', 'empty', False, []),
+    ]),
+    "SocialMediaPost": ("post_id", [
+        ('post_id', 'int', 'missing', True, []),
+        ('user_name', None, 'blank', False, [('max_length', 50)]),
+        ('content_text', None, 'blank', False, [('max_length', 500)]),
+    ]),
+}
+
+TRUE_STRINGS = frozenset(["true", "1", "yes", "y"])
+
+# Errors are kept as (type, index, field, code, value, file) tuples and only
+# turned into text through these templates when they are printed
+ERROR_MESSAGES = {
+    "file_not_found": "File not found: {file}",
+    "invalid_json": "Invalid JSON in {file}: {value}",
+    "not_list": "{type} must be a list in {file}",
+    "not_dict": "{type}[{index}] must be a dictionary in {file}",
+    "required": "{type}[{index}].{field} is required in {file}",
+    "not_int": "{type}[{index}].{field} must be an integer in {file}",
+    "not_float": "{type}[{index}].{field} must be a float in {file}",
+    "not_bool": "{type}[{index}].{field} must be a boolean in {file}",
+    "not_array": "{type}[{index}].{field} must be an array in {file}",
+    "not_unique": "{type}[{index}].{field} '{value}' is not unique in {file}",
+    "duplicate": "{type}[{index}].{field} '{value}' in {file} was first seen at {type}[{first_index}] in {first_file}",
+    "min": "{type}[{index}].{field} must be >= {bound} in {file}",
+    "max": "{type}[{index}].{field} must be <= {bound} in {file}",
+    "max_length": "{type}[{index}].{field} exceeds max length {bound} in {file}",
+    "enum": "{type}[{index}].{field} must be one of {bound} in {file}",
+    "missing_reference": "{type}.{index}.{field} references missing {target}.{value}",
+    "missing_external_reference": "{type}.{index}.{field} references missing external {target}.{value}",
+}
+
+class ReferenceCheck(NamedTuple):
+    field_name: str
+    target_type: str
+    is_many: bool
+    code: str
+
+# The cross-reference pass, as (type, checks) groups: the internal references of
+# each type, then the external ones, reported as such. Fields in schema order.
+REFERENCE_CHECKS = [
+    ("StoryGroup", (
+        ReferenceCheck("stories", "Story", True, "missing_reference"),
+    )),
+    ("MediaPostGroup", (
+        ReferenceCheck("group_id", "StoryGroup", False, "missing_reference"),
+        ReferenceCheck("story_posts", "StoryPosts", True, "missing_reference"),
+    )),
+    ("StoryPosts", (
+        ReferenceCheck("story_id", "Story", False, "missing_reference"),
+        ReferenceCheck("posts", "SocialMediaPost", True, "missing_reference"),
+    )),
+]
+
+# (type, field) -> referenced type
+REFERENCE_TARGETS = {(type_name, check.field_name): check.target_type
+                     for type_name, checks in REFERENCE_CHECKS for check in checks}
+
+# Types kept whole: marked `root: true` in the schema, or not referenced by any
+# type. Nothing has to refer to their entries.
+ROOT_TYPES = frozenset([
+    "StoryGroup",
+    "MediaPostGroup",
+])
+
+class UniqueKey(NamedTuple):
+    label: str
+    kind: str
+    fields: tuple
+
+# Unique keys per type: "field" for a single field, "fields" for a combination of
+# fields and "elements" for the elements of an array field, unique across all the
+# entries of the type. Single fields come first, in schema order.
+UNIQUE_KEYS = {
+    "StoryGroup": (
+        UniqueKey('group_id', 'field', ('group_id',)),
+        UniqueKey('stories[]', 'elements', ('stories',)),
+    ),
+    "Story": (
+        UniqueKey('story_id', 'field', ('story_id',)),
+    ),
+    "MediaPostGroup": (
+        UniqueKey('group_id', 'field', ('group_id',)),
+    ),
+    "StoryPosts": (
+        UniqueKey('posts[]', 'elements', ('posts',)),
+    ),
+    "SocialMediaPost": (
+        UniqueKey('post_id', 'field', ('post_id',)),
+        UniqueKey('(user_name, content_text)', 'fields', ('user_name', 'content_text')),
+    ),
+}
+
+_CONVERTERS = {"int": (int, "not_int"), "float": (float, "not_float")}
+_TYPE_CODES = {"bool": "not_bool", "array": "not_array"}
+
+# The one value type a column may hold for a block to skip the per-entry loop
+_CLEAN_TYPES = {"int": int, "float": float, "bool": bool, "array": list, None: str}
+
+class PlanStep(NamedTuple):
+    field_name: str
+    kind: Optional[str]
+    convert: Optional[Callable]
+    exact_type: Optional[type]
+    required: Optional[str]
+    type_code: Optional[str]
+    unique: bool
+    checks: tuple
+    clean_types: set
+
+def compile_plan(spec: tuple) -> tuple:
+    """Turn a VALIDATION_PLANS entry into (id field, steps) with converters and
+    lookup structures precomputed"""
+    id_field, fields = spec
+    steps = []
+    for field_name, kind, required, unique, checks in fields:
+        convert, exact_type, type_code = None, None, _TYPE_CODES.get(kind)
+        if kind in _CONVERTERS:
+            convert, type_code = _CONVERTERS[kind]
+            exact_type = convert
+
+        compiled_checks = []
+        for op, bound in checks:
+            if op == "enum":
+                # The set serves whole-column checks; the value itself keeps the
+                # exact `in` semantics for unhashable values
+                try:
+                    bound = (frozenset(bound) if not isinstance(bound, str) else None, bound)
+                except TypeError:
+                    bound = (None, bound)
+            compiled_checks.append((op, bound))
+
+        steps.append(PlanStep(field_name, kind, convert, exact_type, required, type_code, unique,
+                              tuple(compiled_checks), {_CLEAN_TYPES[kind]}))
+    return id_field, tuple(steps)
+
+_NONE_TYPE = type(None)
+
+BLOCK_SIZE = 512
+
+def clean_block_columns(steps: tuple, seen_sets: list, block: list):
+    """Whole-column checks of a block of entries. Returns {field: values} if the
+    per-entry plan would report nothing and change nothing for the block, else None.
+    Uniqueness sets are only updated for clean blocks."""
+    columns = {}
+    seen_updates = []
+    try:
+        for step, seen in zip(steps, seen_sets):
+            required = step.required
+            column = list(map(dict.get, block, repeat(step.field_name)))
+            columns[step.field_name] = column
+
+            values = column
+            value_types = set(map(type, column))
+            if _NONE_TYPE in value_types:
+                if required is not None:
+                    return None
+                value_types.discard(_NONE_TYPE)
+                if not value_types:
+                    continue
+                values = [value for value in column if value is not None]
+
+            if value_types != step.clean_types:
+                return None
+            if required == "blank" and "" in map(str.strip, values):
+                return None
+            if required == "empty" and [] in values:
+                return None
+
+            if seen is not None:
+                unique = set(values)
+                if len(unique) != len(values) or not seen.isdisjoint(unique):
+                    return None
+                seen_updates.append((seen, unique))
+
+            for op, bound in step.checks:
+                if op == "min":
+                    if min(values) < bound:
+                        return None
+                elif op == "max":
+                    if max(values) > bound:
+                        return None
+                elif op == "max_length":
+                    if max(map(len, values)) > bound:
+                        return None
+                elif bound[0] is None or not bound[0].issuperset(values):
+                    return None
+    except TypeError:
+        # Entries that are not dicts, unorderable or unhashable values: leave them
+        # to the per-entry plan
+        return None
+
+    for seen, unique in seen_updates:
+        seen |= unique
+    return columns
+
+PLANS = {type_name: compile_plan(spec) for type_name, spec in VALIDATION_PLANS.items()}
+
+def _check_bound(type_name: str, field: str, op: str):
+    for step in PLANS[type_name][1]:
+        if step.field_name == field:
+            for check_op, bound in step.checks:
+                if check_op == op:
+                    return bound[1] if op == "enum" else bound
+    return None
+
+def format_error(error: tuple) -> str:
+    """Text of an error tuple, as printed in the results"""
+    type_name, index, field, code, value, file_path = error
+    bound = _check_bound(type_name, field, code) if code in ("min", "max", "max_length", "enum") else None
+    first_file = first_index = None
+    if code == "duplicate":
+        value, first_file, first_index = value
+    return ERROR_MESSAGES[code].format(type=type_name, index=index, field=field, value=value,
+                                       file=file_path, bound=bound,
+                                       target=REFERENCE_TARGETS.get((type_name, field)),
+                                       first_file=first_file, first_index=first_index)
+
+class ErrorLimitReached(Exception):
+    """Raised inside DataValidator once max_errors errors have been collected"""
+
+# Fields read for the unique keys of each type
+UNIQUE_KEY_FIELDS = {type_name: tuple(dict.fromkeys(field for key in keys for field in key.fields))
+                     for type_name, keys in UNIQUE_KEYS.items()}
+
+# Where a value was first seen, packed as file number << _FILE_SHIFT | index
+_FILE_SHIFT = 32
+
+def unique_columns(type_name: str, entries: list, columns: Optional[dict] = None) -> tuple:
+    """Column of each unique key of a type over entries, None where an entry has no
+    value. Field columns already taken from the entries can be passed in."""
+    if columns is None:
+        columns = {field: [entry.get(field) if type(entry) is dict else None for entry in entries]
+                   for field in UNIQUE_KEY_FIELDS[type_name]}
+    key_columns = []
+    for key in UNIQUE_KEYS[type_name]:
+        if key.kind == "fields":
+            # Hashed tuples; a key with a missing part is not indexed
+            key_columns.append([None if None in values else values
+                                for values in zip(*[columns[field] for field in key.fields])])
+        else:
+            key_columns.append(columns[key.fields[0]])
+    return tuple(key_columns)
+
+class UniqueIndex:
+    """The values of every unique key across the files of a run, each mapped to
+    where it was first seen. A value seen before is recorded as a "duplicate"
+    error, except that duplicates of a single field within a file are left to the
+    per-file checks. An array may repeat an element of its own."""
 
-class DataValidator:
     def __init__(self):
-        self.errors: List[str] = []
+        self.files: List[str] = []
+        self.first_seen: Dict[Tuple[str, str], Dict[Any, int]] = {}
+        self.duplicates: List[Tuple] = []
+
+    def add_file(self, path: str, uniques: Dict[str, tuple]) -> None:
+        """Index the next file's unique columns, given as {type: columns in
+        UNIQUE_KEYS order}. One dict probe per value or element."""
+        base = len(self.files) << _FILE_SHIFT
+        self.files.append(path)
+        for type_name, columns in uniques.items():
+            for key, column in zip(UNIQUE_KEYS[type_name], columns):
+                setdefault = self.first_seen.setdefault((type_name, key.label), {}).setdefault
+                if key.kind == "elements":
+                    values = ((location, element) for location, value in enumerate(column, base)
+                              if type(value) is list for element in value)
+                else:
+                    values = enumerate(column, base)
+                # Within this file, single fields are checked per file already
+                single = key.kind == "field"
+                for location, value in values:
+                    if value is None:
+                        continue
+                    try:
+                        first = setdefault(value, location)
+                    except TypeError:
+                        # Unhashable values cannot be indexed
+                        continue
+                    if first < (base if single else location):
+                        first_file, first_index = divmod(first, 1 << _FILE_SHIFT)
+                        self.duplicates.append((type_name, location - base, key.label, "duplicate",
+                                                (value, self.files[first_file], first_index), path))
+
+class ReferenceIndex:
+    """Reverse references, collected by the cross-reference pass as two parallel
+    columns per reference field: the ids referenced and the ids of the entries
+    referencing them. Collecting is linear in the number of references; the
+    target id -> referrers maps are built from the columns on first use."""
+
+    def __init__(self):
+        # (source type, field) -> (target type, target ids, source ids)
+        self.relations: Dict[Tuple[str, str], Tuple[str, list, list]] = {}
+        self._referrers: Dict[str, Dict[Any, list]] = {}
+
+    def relation(self, source_type: str, field: str, target_type: str) -> Tuple[list, list]:
+        """The (target ids, source ids) columns of one reference field, to be extended"""
+        _, targets, sources = self.relations.setdefault((source_type, field), (target_type, [], []))
+        return targets, sources
+
+    def sources(self, target_type: str) -> List[str]:
+        """The "Type.field" references pointing at a type"""
+        return [f"{source_type}.{field}" for (source_type, field), (target, _, _) in self.relations.items()
+                if target == target_type]
+
+    def referrers(self, target_type: str, target_id: Any) -> List[Tuple[str, str, Any]]:
+        """(source type, field, source id) of every reference to an entry"""
+        index = self._referrers.get(target_type)
+        if index is None:
+            index = self._referrers[target_type] = defaultdict(list)
+            for (source_type, field), (target, targets, sources) in self.relations.items():
+                if target == target_type:
+                    for referenced, source_id in zip(targets, sources):
+                        try:
+                            index[referenced].append((source_type, field, source_id))
+                        except TypeError:
+                            # Unhashable, so not an id
+                            pass
+        return index.get(target_id, [])
+
+    def count(self, target_type: str, target_id: Any) -> int:
+        """How many references point to an entry"""
+        return len(self.referrers(target_type, target_id))
+
+    def total(self, target_type: str) -> int:
+        """How many references point at a type"""
+        return sum(len(targets) for target, targets, _ in self.relations.values() if target == target_type)
+
+    def orphans(self, target_type: str, ids) -> List[Any]:
+        """The ids no reference points to"""
+        referenced = set()
+        for target, targets, _ in self.relations.values():
+            if target == target_type:
+                try:
+                    referenced.update(targets)
+                except TypeError:
+                    referenced.update(id_keys(targets))
+        return [obj_id for obj_id in ids if obj_id not in referenced]
+
+# Sidecar cache (--cache): for each run of entries that passed every field check,
+# its span of the file text, a hash of that span and what the uniqueness and
+# cross-reference checks still need from it. Matching spans are neither decoded
+# nor checked again.
+CACHE_SUFFIX = ".validcache"
+CACHE_VERSION = 1
+SCHEMA_HASH = "d881c1e0b51e64c7"
+
+_PREFIX_LENGTH = 32
+
+# Fields kept for entries reused from the cache
+REFERENCE_FIELDS = {type_name: tuple(field for source, field in REFERENCE_TARGETS if source == type_name)
+                    for type_name in VALIDATION_PLANS}
+
+class CachedBlock(NamedTuple):
+    length: int
+    prefix: str
+    digest: bytes
+    count: int
+    ids: Optional[list]
+    uniques: tuple
+    references: tuple
+
+class EntryRun(NamedTuple):
+    entries: list
+    starts: list
+    ends: list
+
+_scan_once = json.JSONDecoder().scan_once
+_skip_whitespace = json.decoder.WHITESPACE.match
+_next_value = re.compile(r"[ \t\n\r]*,[ \t\n\r]*").match
+
+def _decode(text: str, pos: int) -> tuple:
+    try:
+        return _scan_once(text, pos)
+    except StopIteration as e:
+        raise ValueError(f"Expecting value at {e.value}") from None
+
+def _span_digest(span: str) -> bytes:
+    return hashlib.blake2b(span.encode("utf-8"), digest_size=16).digest()
+
+def _matches(text: str, pos: int, block: CachedBlock) -> bool:
+    return (text.startswith(block.prefix, pos)
+            and _span_digest(text[pos:pos + block.length]) == block.digest)
+
+def load_cache(cache_path: str) -> dict:
+    """{type: [CachedBlock]} from a sidecar, empty if missing or out of date"""
+    try:
+        with open(cache_path, "rb") as f:
+            cache = pickle.load(f)
+        if cache["version"] != CACHE_VERSION or cache["schema"] != SCHEMA_HASH:
+            return {}
+        return {type_name: [CachedBlock._make(block) for block in blocks]
+                for type_name, blocks in cache["types"].items()}
+    except Exception:
+        return {}
+
+def save_cache(cache_path: str, blocks: dict) -> None:
+    cache = {"version": CACHE_VERSION, "schema": SCHEMA_HASH,
+             "types": {type_name: [tuple(block) for block in type_blocks]
+                       for type_name, type_blocks in blocks.items()}}
+    with open(cache_path, "wb") as f:
+        pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+
+def cache_block(span: str, count: int, id_field: str, columns: dict, uniques: tuple,
+                reference_fields: tuple) -> CachedBlock:
+    """CachedBlock of the span of count entries that passed as a clean block"""
+    return CachedBlock(len(span), span[:_PREFIX_LENGTH], _span_digest(span), count,
+                       columns[id_field] if id_field else None, uniques,
+                       tuple(columns[field] for field in reference_fields))
+
+def _all_found(values, keys) -> bool:
+    """Whether every referenced id is in keys, checked over the whole column at
+    once. Unhashable ids are left to the entry by entry check."""
+    try:
+        return not missing(values, keys)
+    except TypeError:
+        return False
+
+def id_keys(ids: list) -> dict:
+    """The ids of a type as dict keys, in first-seen order. Unhashable ids, already
+    reported as of the wrong type, are left out."""
+    try:
+        return dict.fromkeys(ids)
+    except TypeError:
+        keys = {}
+        for obj_id in ids:
+            try:
+                keys[obj_id] = None
+            except TypeError:
+                pass
+        return keys
+
+def reference_columns(entries: list, reference_fields: tuple) -> tuple:
+    """Columns of the reference fields of entries"""
+    return tuple([entry.get(field) for entry in entries] for field in reference_fields)
+
+class TypeReferences:
+    """All the cross-reference pass needs of the entries of a type in a file: the
+    ids of those with one, in file order, and a column of their values for each
+    field of REFERENCE_FIELDS. Every path through a file records its entries here,
+    decoded, checked from columns or reused from the cache."""
+
+    def __init__(self, type_name: str, ids: Optional[list] = None, columns: Optional[tuple] = None):
+        self.fields = REFERENCE_FIELDS[type_name]
+        self.ids = ids if ids is not None else []
+        self.columns = columns if columns is not None else tuple([] for _ in self.fields)
+
+    def add_entries(self, entries: list, id_field: str) -> None:
+        """Add the dict entries of a block that have an id"""
+        entries = [entry for entry in entries if isinstance(entry, dict) and entry.get(id_field) is not None]
+        self.add_columns([entry[id_field] for entry in entries], reference_columns(entries, self.fields))
+
+    def add_columns(self, ids: list, columns: tuple) -> None:
+        """Add a block given as columns, its ids None for entries without one"""
+        if None in ids:
+            present = [obj_id is not None for obj_id in ids]
+            ids = list(compress(ids, present))
+            columns = tuple(list(compress(column, present)) for column in columns)
+        self.ids.extend(ids)
+        for column, values in zip(self.columns, columns):
+            column.extend(values)
+
+    def column(self, field: str) -> list:
+        return self.columns[self.fields.index(field)]
+
+def reuse_block(block: CachedBlock, unique_sets: list) -> bool:
+    """Uniqueness check of a cached block against the values seen so far, as done
+    for a clean block. The sets are only updated if it passes."""
+    updates = []
+    for seen, column in zip(unique_sets, block.uniques):
+        unique = set(column)
+        unique.discard(None)
+        if len(unique) != len(column) - column.count(None) or not seen.isdisjoint(unique):
+            return False
+        updates.append((seen, unique))
+    for seen, unique in updates:
+        seen |= unique
+    return True
+
+def _scan_entries(text: str, pos: int, cached: list) -> tuple:
+    """Entries of the list at text[pos] as segments: EntryRuns of freshly decoded
+    entries and (start, CachedBlock) pairs for spans matching a cached block.
+    Raises ValueError on anything unexpected."""
+    segments = []
+    run = EntryRun([], [], [])
+    expected = 0
+    by_prefix = {}
+    for i, block in enumerate(cached):
+        by_prefix.setdefault(block.prefix, []).append(i)
+
+    pos = _skip_whitespace(text, pos + 1).end()
+    if text.startswith("]", pos):
+        return segments, pos + 1
+
+    try:
+        while True:
+            match = None
+            if cached:
+                if expected < len(cached) and _matches(text, pos, cached[expected]):
+                    match = expected
+                else:
+                    for i in by_prefix.get(text[pos:pos + _PREFIX_LENGTH], ()):
+                        if _matches(text, pos, cached[i]):
+                            match = i
+                            break
+
+            if match is None:
+                entry, end = _scan_once(text, pos)
+                run.entries.append(entry)
+                run.starts.append(pos)
+                run.ends.append(end)
+            else:
+                block = cached[match]
+                if run.entries:
+                    segments.append(run)
+                    run = EntryRun([], [], [])
+                segments.append((pos, block))
+                end = pos + block.length
+                expected = match + 1
+
+            separator = _next_value(text, end)
+            if separator is None:
+                break
+            pos = separator.end()
+    except StopIteration as e:
+        raise ValueError(f"Expecting value at {e.value}") from None
+
+    pos = _skip_whitespace(text, end).end()
+    if not text.startswith("]", pos):
+        raise ValueError(f"Unexpected data at {pos}")
+    if run.entries:
+        segments.append(run)
+    return segments, pos + 1
+
+def scan_document(text: str, cached: dict) -> tuple:
+    """Split a data file into plain values and the segments of each type list.
+    Raises ValueError where the file does not parse as a JSON object, leaving
+    the exact error to json.loads."""
+    data, sections = {}, {}
+    pos = _skip_whitespace(text, 0).end()
+    if not text.startswith("{", pos):
+        raise ValueError("Not an object")
+
+    pos = _skip_whitespace(text, pos + 1).end()
+    if text.startswith("}", pos):
+        pos += 1
+    else:
+        while True:
+            if not text.startswith('"', pos):
+                raise ValueError(f"Unexpected data at {pos}")
+            key, pos = _decode(text, pos)
+            pos = _skip_whitespace(text, pos).end()
+            if not text.startswith(":", pos):
+                raise ValueError(f"Unexpected data at {pos}")
+            pos = _skip_whitespace(text, pos + 1).end()
+
+            # Later keys win, as with json.loads
+            data.pop(key, None)
+            sections.pop(key, None)
+            if key in PLANS and text.startswith("[", pos):
+                sections[key], pos = _scan_entries(text, pos, cached.get(key, ()))
+            else:
+                data[key], pos = _decode(text, pos)
+
+            pos = _skip_whitespace(text, pos).end()
+            if text.startswith(",", pos):
+                pos = _skip_whitespace(text, pos + 1).end()
+            elif text.startswith("}", pos):
+                pos += 1
+                break
+            else:
+                raise ValueError(f"Unexpected data at {pos}")
+
+    if _skip_whitespace(text, pos).end() != len(text):
+        raise ValueError(f"Extra data at {pos}")
+    return data, sections
+
+def decode_span(text: str, start: int, length: int) -> EntryRun:
+    """The entries of a cached span, decoded"""
+    run = EntryRun([], [], [])
+    pos, stop = start, start + length
+    while pos < stop:
+        entry, end = _decode(text, pos)
+        run.entries.append(entry)
+        run.starts.append(pos)
+        run.ends.append(end)
+        separator = _next_value(text, end)
+        pos = separator.end() if separator is not None else stop
+    return run
+
+STREAM_CHUNK_SIZE = 1 << 20
+
+class JsonStream:
+    """Reads JSON text from a file one value at a time with the json C scanner,
+    holding only the text not consumed yet. Syntax errors are raised as
+    json.JSONDecodeError with their position in the whole file."""
+
+    def __init__(self, f, chunk_size: int = STREAM_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        # Characters and newlines dropped from the front of the buffer so far
+        self.offset = 0
+        self.lines = 0
+        self.last_newline = -1
+
+    def _fill(self) -> bool:
+        """Drop the consumed text and read more. False once the file is exhausted."""
+        if self.eof:
+            return False
+        consumed = self.pos
+        newline = self.buffer.rfind("\n", 0, consumed)
+        if newline >= 0:
+            self.lines += self.buffer.count("\n", 0, consumed)
+            self.last_newline = self.offset + newline
+        self.offset += consumed
+
+        # Read at least as much as is left over, so a value longer than a chunk
+        # is rescanned a logarithmic number of times
+        chunk = self.f.read(max(self.chunk_size, len(self.buffer) - consumed))
+        self.buffer = self.buffer[consumed:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def peek(self) -> str:
+        """Next character after whitespace, "" at the end of the file"""
+        while True:
+            self.pos = _skip_whitespace(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def value(self) -> Any:
+        """Decode the next value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _scan_once(self.buffer, self.pos)
+                # A value running up to the end of the buffer (a number) may go on
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except StopIteration as e:
+                if self.eof:
+                    raise self.error("Expecting value", e.value) from None
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise self.error(e.msg, e.pos) from None
+            self._fill()
+
+    def array_values(self):
+        """Yield the values of the array starting at the next character"""
+        self.pos += 1
+        if self.peek() == "]":
+            self.pos += 1
+            return
+
+        while True:
+            # Values and separators that lie wholly inside the buffer go straight
+            # through the scanner; the one at the edge and any error take value()
+            self.peek()
+            buffer, pos = self.buffer, self.pos
+            try:
+                while True:
+                    value, end = _scan_once(buffer, pos)
+                    separator = _next_value(buffer, end)
+                    if separator is None or separator.end() >= len(buffer):
+                        break
+                    pos = self.pos = separator.end()
+                    yield value
+            except (StopIteration, json.JSONDecodeError):
+                pass
+
+            yield self.value()
+            if self.peek() == "]":
+                self.pos += 1
+                return
+            self.expect(",", "Expecting ',' delimiter")
+
+    def expect(self, char: str, message: str) -> None:
+        if self.peek() != char:
+            raise self.error(message)
+        self.pos += 1
+
+    def error(self, message: str, pos: Optional[int] = None) -> json.JSONDecodeError:
+        """The error json.loads would raise for the whole file"""
+        pos = self.pos if pos is None else pos
+        newline = self.buffer.rfind("\n", 0, pos)
+        lineno = self.lines + self.buffer.count("\n", 0, pos) + 1
+        colno = pos - newline if newline >= 0 else self.offset + pos - self.last_newline
+        error = json.JSONDecodeError(message, self.buffer, pos)
+        error.args = (f"{message}: line {lineno} column {colno} (char {self.offset + pos})",)
+        error.pos, error.lineno, error.colno = self.offset + pos, lineno, colno
+        return error
+
+class DataValidator:
+    def __init__(self, max_errors: Optional[int] = None, fail_fast: bool = False, cache: bool = False,
+                 jobs: int = 1, stream: bool = False):
+        self.errors: List[Tuple] = []
         self.warnings: List[str] = []
-        self.all_objects: Dict[str, Dict[Any, Any]] = {}
+        # Entries of each type for the cross-reference pass, from the last file holding the type
+        self.type_references: Dict[str, TypeReferences] = {}
+        # Unique columns of the file being validated, for the uniqueness index
+        self.file_uniques: Dict[str, tuple] = {}
+        self.unique_index = UniqueIndex()
+        self.reference_index = ReferenceIndex()
+        self.max_errors = 1 if fail_fast else max_errors
+        self.stopped_early = False
+        self._error_limit = self.max_errors if self.max_errors is not None else sys.maxsize
+        self.cache = cache
+        self.jobs = jobs
+        self.stream = stream
+        # Whether _run_plan converted a value of the entries in place
+        self.converted = False
 
     def validate_files(self, file_paths: List[str]) -> bool:
         """Validate multiple JSON files and their cross-references"""
         print(f"Validating {len(file_paths)} file(s)...")
 
-        for path in file_paths:
-            self._load_and_validate_file(path)
-
-        self._validate_cross_references()
+        try:
+            if self.jobs > 1 and len(file_paths) > 1:
+                self._validate_files_parallel(file_paths)
+            else:
+                for path in file_paths:
+                    self._load_and_validate_file(path)
+                    self.unique_index.add_file(path, self.file_uniques)
+
+            self._validate_uniqueness()
+            self._validate_cross_references()
+        except ErrorLimitReached:
+            self.stopped_early = True
+            del self.errors[self._error_limit:]
 
         return self._print_results()
 
+    def _validate_files_parallel(self, file_paths: List[str]) -> None:
+        """Validate files in worker processes, then merge their results in file order"""
+        with ProcessPoolExecutor(max_workers=min(self.jobs, len(file_paths))) as executor:
+            futures = [executor.submit(_validate_file_job, path, self.max_errors, self.cache,
+                                       self.stream)
+                       for path in file_paths]
+            for path, future in zip(file_paths, futures):
+                try:
+                    errors, warnings, output, index, uniques = future.result()
+                except Exception:
+                    errors = None
+                if errors is None or len(self.errors) + len(errors) >= self._error_limit:
+                    # The worker failed or the error limit falls inside this file:
+                    # validate it here, to stop exactly where a serial run would
+                    for pending in futures:
+                        pending.cancel()
+                    self._load_and_validate_file(path)
+                    self.unique_index.add_file(path, self.file_uniques)
+                    continue
+
+                sys.stdout.write(output)
+                self.errors.extend(errors)
+                self.warnings.extend(warnings)
+                for type_name, (ids, columns) in index.items():
+                    self.type_references[type_name] = TypeReferences(type_name, ids, columns)
+                self.unique_index.add_file(path, uniques)
+
+    def _add_error(self, error: tuple) -> None:
+        self.errors.append(error)
+        if len(self.errors) >= self._error_limit:
+            raise ErrorLimitReached()
+
+    def error_messages(self) -> List[str]:
+        return [format_error(error) for error in self.errors]
+
     def _load_and_validate_file(self, path: str) -> None:
         """Load and validate a single file"""
         print(f"\nValidating: {path}")
+        self.file_uniques = {}
 
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if not (self.stream or self.cache):
+                # Shared with the other tools of this process, so a file written
+                # or read by an earlier stage is not parsed again
+                dataset = load_dataset(path)
+                data = dataset.data
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    if self.stream:
+                        self._validate_stream(path, JsonStream(f))
+                        return
+                    text = f.read()
         except FileNotFoundError:
-            self.errors.append(f"File not found: {path}")
+            self._add_error((None, None, None, "file_not_found", None, path))
             return
         except json.JSONDecodeError as e:
-            self.errors.append(f"Invalid JSON in {path}: {e}")
+            self._add_error((None, None, None, "invalid_json", str(e), path))
             return
 
-        if "StoryGroup" in data:
-            self._validate_StoryGroup(data["StoryGroup"], path)
-        if "Story" in data:
-            self._validate_Story(data["Story"], path)
-        if "MediaPostGroup" in data:
-            self._validate_MediaPostGroup(data["MediaPostGroup"], path)
-        if "StoryPosts" in data:
-            self._validate_StoryPosts(data["StoryPosts"], path)
-        if "SocialMediaPost" in data:
-            self._validate_SocialMediaPost(data["SocialMediaPost"], path)
-
-    def _validate_StoryGroup(self, entries: List[Dict], file_path: str) -> None:
-        """Validate StoryGroup entries"""
-        if not isinstance(entries, list):
-            self.errors.append(f"StoryGroup must be a list in {file_path}")
+        if self.cache:
+            self._validate_cached_file(path, text)
             return
 
-        type_objects = {}
-        seen_group_id = set()
-
-        for idx, entry in enumerate(entries):
-            if not isinstance(entry, dict):
-                self.errors.append(f"StoryGroup[{idx}] must be a dictionary in {file_path}")
-                continue
-
-
-            # Validate group_id
-            value = entry.get("group_id")
-
-            if value is None:
-                self.errors.append(f"StoryGroup[{idx}].group_id is required in {file_path}")
-
-            if value is not None:
-                try:
-                    value = int(value)
-                    entry["group_id"] = value
-                except (ValueError, TypeError):
-                    self.errors.append(f"StoryGroup[{idx}].group_id must be an integer in {file_path}")
-
-            if value is not None:
-                if value in seen_group_id:
-                    self.errors.append(f"StoryGroup[{idx}].group_id '{value}' is not unique in {file_path}")
-                seen_group_id.add(value)
-
-
-            # Validate stories
-            value = entry.get("stories")
-
-            if value is None or (isinstance(value, list) and len(value) == 0):
-                self.errors.append(f"StoryGroup[{idx}].stories is required in {file_path}")
-
-            if value is not None and not isinstance(value, list):
-                self.errors.append(f"StoryGroup[{idx}].stories must be an array in {file_path}")
-
-
-
-
-
-
-            # Store for cross-reference validation
-            id_field = entry.get("group_id")
-            if id_field is not None:
-                type_objects[id_field] = entry
-
-        self.all_objects["StoryGroup"] = type_objects
-        print(f"  Validated {len(entries)} StoryGroup entries")
-
-    def _validate_Story(self, entries: List[Dict], file_path: str) -> None:
-        """Validate Story entries"""
-        if not isinstance(entries, list):
-            self.errors.append(f"Story must be a list in {file_path}")
+        self.converted = False
+        try:
+            for type_name in PLANS:
+                if type_name in data:
+                    self._validate_type(type_name, data[type_name], path)
+        finally:
+            # Later stages see the converted values: the lookups built from the
+            # values as read are stale
+            if self.converted:
+                dataset.invalidate()
+
+    def _validate_stream(self, path: str, stream: JsonStream) -> None:
+        """Validate the type lists of a file as they are read. Errors come in file
+        order, and a syntax error is reported after those of the entries before it;
+        the ids of a file only count for cross references once it has been read in full."""
+        if stream.peek() != "{":
+            data = stream.value()
+            if stream.peek() != "":
+                raise stream.error("Extra data")
+            for type_name in PLANS:
+                if type_name in data:
+                    self._validate_type(type_name, data[type_name], path)
             return
 
-        type_objects = {}
-        seen_story_id = set()
-
-        for idx, entry in enumerate(entries):
-            if not isinstance(entry, dict):
-                self.errors.append(f"Story[{idx}] must be a dictionary in {file_path}")
-                continue
-
-
-            # Validate story_id
-            value = entry.get("story_id")
-
-            if value is None:
-                self.errors.append(f"Story[{idx}].story_id is required in {file_path}")
-
-            if value is not None:
-                try:
-                    value = int(value)
-                    entry["story_id"] = value
-                except (ValueError, TypeError):
-                    self.errors.append(f"Story[{idx}].story_id must be an integer in {file_path}")
-
-            if value is not None:
-                if value in seen_story_id:
-                    self.errors.append(f"Story[{idx}].story_id '{value}' is not unique in {file_path}")
-                seen_story_id.add(value)
-
-
-            # Validate news_headline
-            value = entry.get("news_headline")
-
-            if value is None or (isinstance(value, str) and not value.strip()):
-                self.errors.append(f"Story[{idx}].news_headline is required in {file_path}")
-
-
-
-
-
-            if value is not None and isinstance(value, str) and len(value) > 200:
-                self.errors.append(f"Story[{idx}].news_headline exceeds max length 200 in {file_path}")
-
-
-            # Validate news_content
-            value = entry.get("news_content")
-
-            if value is None or (isinstance(value, str) and not value.strip()):
-                self.errors.append(f"Story[{idx}].news_content is required in {file_path}")
-
-
-
-
-
-            if value is not None and isinstance(value, str) and len(value) > 1000:
-                self.errors.append(f"Story[{idx}].news_content exceeds max length 1000 in {file_path}")
-
-
-            # Validate news_fake
-            value = entry.get("news_fake")
-
-            if value is None:
-                self.errors.append(f"Story[{idx}].news_fake is required in {file_path}")
-
-            if value is not None and not isinstance(value, bool):
-                if isinstance(value, str):
-                    entry["news_fake"] = value.lower() in ['true', '1', 'yes', 'y']
-                elif isinstance(value, int):
-                    entry["news_fake"] = value != 0
-                else:
-                    self.errors.append(f"Story[{idx}].news_fake must be a boolean in {file_path}")
-
-
-
-            # Store for cross-reference validation
-            id_field = entry.get("story_id")
-            if id_field is not None:
-                type_objects[id_field] = entry
-
-        self.all_objects["Story"] = type_objects
-        print(f"  Validated {len(entries)} Story entries")
-
-    def _validate_MediaPostGroup(self, entries: List[Dict], file_path: str) -> None:
-        """Validate MediaPostGroup entries"""
-        if not isinstance(entries, list):
-            self.errors.append(f"MediaPostGroup must be a list in {file_path}")
+        file_references = {}
+        file_uniques = {}
+        stream.pos += 1
+        try:
+            if stream.peek() == "}":
+                stream.pos += 1
+            else:
+                while True:
+                    if stream.peek() != '"':
+                        raise stream.error("Expecting property name enclosed in double quotes")
+                    key = stream.value()
+                    stream.expect(":", "Expecting ':' delimiter")
+                    if key in PLANS and stream.peek() == "[":
+                        file_references[key], file_uniques[key] = self._validate_stream_entries(key, stream,
+                                                                                                path)
+                    else:
+                        value = stream.value()
+                        if key in PLANS:
+                            self._validate_type(key, value, path)
+
+                    if stream.peek() == "}":
+                        stream.pos += 1
+                        break
+                    stream.expect(",", "Expecting ',' delimiter")
+        except ErrorLimitReached:
+            # Keep what a serial run would have stored before stopping
+            self.type_references.update(file_references)
+            raise
+        if stream.peek() != "":
+            raise stream.error("Extra data")
+        self.type_references.update(file_references)
+        self.file_uniques.update(file_uniques)
+
+    def _validate_stream_entries(self, type_name: str, stream: JsonStream, file_path: str) -> tuple:
+        """_validate_type over a list read from a stream. Returns its TypeReferences
+        and its unique columns; the entries themselves are not kept."""
+        id_field, steps = PLANS[type_name]
+        seen_sets = [set() if step.unique else None for step in steps]
+        uniques = tuple([] for _ in UNIQUE_KEYS[type_name])
+        references = TypeReferences(type_name)
+        index = 0
+
+        def check(block: list) -> None:
+            columns = clean_block_columns(steps, seen_sets, block)
+            if columns is None:
+                self._run_plan(type_name, steps, seen_sets, block, index, file_path)
+                block_uniques = unique_columns(type_name, block)
+            else:
+                block_uniques = unique_columns(type_name, block, columns)
+            for values, column in zip(uniques, block_uniques):
+                values.extend(column)
+            self._add_references(references, id_field, block, columns)
+
+        block = []
+        for entry in stream.array_values():
+            block.append(entry)
+            if len(block) == BLOCK_SIZE:
+                check(block)
+                index += len(block)
+                block = []
+        if block:
+            check(block)
+            index += len(block)
+
+        print(f"  Validated {index} {type_name} entries")
+        return references, uniques
+
+    def _validate_cached_file(self, path: str, text: str) -> None:
+        """Validate a file, skipping the field checks of spans unchanged since the
+        last run, then record the clean spans for the next one"""
+        cache_path = str(path) + CACHE_SUFFIX
+        # The scan allocates an object per decoded value; collecting while they
+        # pile up costs more than the decoding itself
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            data, sections = scan_document(text, load_cache(cache_path))
+        except ValueError:
+            sections = None
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        if sections is None:
+            # Not a layout the scan follows: validate it in full, without a cache
+            try:
+                data = json.loads(text)
+            except json.JSONDecodeError as e:
+                self._add_error((None, None, None, "invalid_json", str(e), path))
+                return
+            for type_name in PLANS:
+                if type_name in data:
+                    self._validate_type(type_name, data[type_name], path)
             return
 
-        type_objects = {}
-        seen_group_id = set()
-
-        for idx, entry in enumerate(entries):
-            if not isinstance(entry, dict):
-                self.errors.append(f"MediaPostGroup[{idx}] must be a dictionary in {file_path}")
-                continue
-
-
-            # Validate group_id
-            value = entry.get("group_id")
-
-            if value is None:
-                self.errors.append(f"MediaPostGroup[{idx}].group_id is required in {file_path}")
-
-            if value is not None:
-                try:
-                    value = int(value)
-                    entry["group_id"] = value
-                except (ValueError, TypeError):
-                    self.errors.append(f"MediaPostGroup[{idx}].group_id must be an integer in {file_path}")
-
-            if value is not None:
-                if value in seen_group_id:
-                    self.errors.append(f"MediaPostGroup[{idx}].group_id '{value}' is not unique in {file_path}")
-                seen_group_id.add(value)
-
-
-
-
-
-            # Validate story_posts
-            value = entry.get("story_posts")
-
-            if value is None or (isinstance(value, list) and len(value) == 0):
-                self.errors.append(f"MediaPostGroup[{idx}].story_posts is required in {file_path}")
-
-            if value is not None and not isinstance(value, list):
-                self.errors.append(f"MediaPostGroup[{idx}].story_posts must be an array in {file_path}")
-
-
-
-
-
-
-            # Store for cross-reference validation
-            id_field = entry.get("group_id")
-            if id_field is not None:
-                type_objects[id_field] = entry
-
-        self.all_objects["MediaPostGroup"] = type_objects
-        print(f"  Validated {len(entries)} MediaPostGroup entries")
-
-    def _validate_StoryPosts(self, entries: List[Dict], file_path: str) -> None:
-        """Validate StoryPosts entries"""
+        blocks = {}
+        reused = 0
+        for type_name in PLANS:
+            if type_name in sections:
+                blocks[type_name] = []
+                reused += self._validate_sections(type_name, sections[type_name], text, path,
+                                                  blocks[type_name])
+            elif type_name in data:
+                self._validate_type(type_name, data[type_name], path)
+
+        save_cache(cache_path, blocks)
+        print(f"  Reused the checks of {reused} unchanged entries")
+
+    def _validate_type(self, type_name: str, entries: List[Dict], file_path: str) -> None:
+        """Run the validation plan of a type over its entries, block by block"""
         if not isinstance(entries, list):
-            self.errors.append(f"StoryPosts must be a list in {file_path}")
+            self._add_error((type_name, None, None, "not_list", None, file_path))
             return
 
-        type_objects = {}
-
-        for idx, entry in enumerate(entries):
-            if not isinstance(entry, dict):
-                self.errors.append(f"StoryPosts[{idx}] must be a dictionary in {file_path}")
-                continue
-
-
-            # Validate story_id
-            value = entry.get("story_id")
-
-            if value is None:
-                self.errors.append(f"StoryPosts[{idx}].story_id is required in {file_path}")
-
-            if value is not None:
-                try:
-                    value = int(value)
-                    entry["story_id"] = value
-                except (ValueError, TypeError):
-                    self.errors.append(f"StoryPosts[{idx}].story_id must be an integer in {file_path}")
-
-
-
-
-
-
-            # Validate posts
-            value = entry.get("posts")
-
-            if value is None or (isinstance(value, list) and len(value) == 0):
-                self.errors.append(f"StoryPosts[{idx}].posts is required in {file_path}")
-
-            if value is not None and not isinstance(value, list):
-                self.errors.append(f"StoryPosts[{idx}].posts must be an array in {file_path}")
-
-
-
-
-
-
-            # Store for cross-reference validation
-            id_field = entry.get("story_id")
-            if id_field is not None:
-                type_objects[id_field] = entry
-
-        self.all_objects["StoryPosts"] = type_objects
-        print(f"  Validated {len(entries)} StoryPosts entries")
-
-    def _validate_SocialMediaPost(self, entries: List[Dict], file_path: str) -> None:
-        """Validate SocialMediaPost entries"""
-        if not isinstance(entries, list):
-            self.errors.append(f"SocialMediaPost must be a list in {file_path}")
+        id_field, steps = PLANS[type_name]
+        # Uniqueness is checked per file here, and across files by the unique index
+        seen_sets = [set() if step.unique else None for step in steps]
+        references = TypeReferences(type_name)
+
+        for start in range(0, len(entries), BLOCK_SIZE):
+            block = entries[start:start + BLOCK_SIZE]
+            columns = clean_block_columns(steps, seen_sets, block)
+            if columns is None:
+                self._run_plan(type_name, steps, seen_sets, block, start, file_path)
+            self._add_references(references, id_field, block, columns)
+
+        self.type_references[type_name] = references
+        self.file_uniques[type_name] = unique_columns(type_name, entries)
+        print(f"  Validated {len(entries)} {type_name} entries")
+
+    def _validate_sections(self, type_name: str, segments: list, text: str, file_path: str,
+                           blocks: list) -> int:
+        """_validate_type over scanned segments. Clean runs of fresh entries are
+        appended to blocks. Returns the number of entries reused from the cache."""
+        id_field, steps = PLANS[type_name]
+        seen_sets = [set() if step.unique else None for step in steps]
+        unique_sets = [seen for seen in seen_sets if seen is not None]
+        reference_fields = REFERENCE_FIELDS[type_name]
+        uniques = tuple([] for _ in UNIQUE_KEYS[type_name])
+        references = TypeReferences(type_name)
+        index = 0
+        reused = 0
+
+        for segment in segments:
+            if not isinstance(segment, EntryRun):
+                start, block = segment
+                if reuse_block(block, unique_sets):
+                    if id_field:
+                        references.add_columns(block.ids, block.references)
+                    blocks.append(block)
+                    for values, column in zip(uniques, block.uniques):
+                        values.extend(column)
+                    index += block.count
+                    reused += block.count
+                    continue
+                # A duplicate involves the block: decode it for the per-entry errors
+                segment = decode_span(text, start, block.length)
+
+            for first in range(0, len(segment.entries), BLOCK_SIZE):
+                entries = segment.entries[first:first + BLOCK_SIZE]
+                columns = clean_block_columns(steps, seen_sets, entries)
+                if columns is None:
+                    self._run_plan(type_name, steps, seen_sets, entries, index, file_path)
+                    block_uniques = unique_columns(type_name, entries)
+                else:
+                    span = text[segment.starts[first]:segment.ends[first + len(entries) - 1]]
+                    block_uniques = unique_columns(type_name, entries, columns)
+                    blocks.append(cache_block(span, len(entries), id_field, columns, block_uniques,
+                                              reference_fields))
+                for values, column in zip(uniques, block_uniques):
+                    values.extend(column)
+                self._add_references(references, id_field, entries, columns)
+                index += len(entries)
+
+        self.type_references[type_name] = references
+        self.file_uniques[type_name] = uniques
+        print(f"  Validated {index} {type_name} entries")
+        return reused
+
+    def _add_references(self, references: TypeReferences, id_field: str, block: list,
+                        columns: Optional[dict]) -> None:
+        """Record the entries of a block for the cross-reference pass, from its
+        columns if it passed as clean, else from the entries as the plan left them"""
+        if not id_field:
             return
+        if columns is None:
+            references.add_entries(block, id_field)
+        else:
+            references.add_columns(columns[id_field], tuple(map(columns.__getitem__, references.fields)))
 
-        type_objects = {}
-        seen_post_id = set()
+    def _run_plan(self, type_name: str, steps: tuple, seen_sets: list, entries: List, start: int,
+                  file_path: str) -> None:
+        """Check entries one by one, recording errors and converting values in place"""
+        errors = self.errors
+        error_limit = self._error_limit
 
-        for idx, entry in enumerate(entries):
+        for idx, entry in enumerate(entries, start):
             if not isinstance(entry, dict):
-                self.errors.append(f"SocialMediaPost[{idx}] must be a dictionary in {file_path}")
+                self._add_error((type_name, idx, None, "not_dict", None, file_path))
                 continue
 
-
-            # Validate post_id
-            value = entry.get("post_id")
-
-            if value is None:
-                self.errors.append(f"SocialMediaPost[{idx}].post_id is required in {file_path}")
-
-            if value is not None:
-                try:
-                    value = int(value)
-                    entry["post_id"] = value
-                except (ValueError, TypeError):
-                    self.errors.append(f"SocialMediaPost[{idx}].post_id must be an integer in {file_path}")
-
-            if value is not None:
-                if value in seen_post_id:
-                    self.errors.append(f"SocialMediaPost[{idx}].post_id '{value}' is not unique in {file_path}")
-                seen_post_id.add(value)
-
-
-            # Validate user_name
-            value = entry.get("user_name")
-
-            if value is None or (isinstance(value, str) and not value.strip()):
-                self.errors.append(f"SocialMediaPost[{idx}].user_name is required in {file_path}")
-
-
-
-
-
-            if value is not None and isinstance(value, str) and len(value) > 50:
-                self.errors.append(f"SocialMediaPost[{idx}].user_name exceeds max length 50 in {file_path}")
-
-
-            # Validate content_text
-            value = entry.get("content_text")
-
-            if value is None or (isinstance(value, str) and not value.strip()):
-                self.errors.append(f"SocialMediaPost[{idx}].content_text is required in {file_path}")
-
-
-
-
-
-            if value is not None and isinstance(value, str) and len(value) > 500:
-                self.errors.append(f"SocialMediaPost[{idx}].content_text exceeds max length 500 in {file_path}")
-
-
-            # Store for cross-reference validation
-            id_field = entry.get("post_id")
-            if id_field is not None:
-                type_objects[id_field] = entry
-
-        self.all_objects["SocialMediaPost"] = type_objects
-        print(f"  Validated {len(entries)} SocialMediaPost entries")
-
+            get = entry.get
+            for step, seen in zip(steps, seen_sets):
+                field_name, kind, convert, exact_type, required, type_code, _, checks, _ = step
+                value = get(field_name)
+                if value is None:
+                    if required is not None:
+                        errors.append((type_name, idx, field_name, "required", None, file_path))
+                    continue
+
+                if required == "blank":
+                    if isinstance(value, str) and not value.strip():
+                        errors.append((type_name, idx, field_name, "required", None, file_path))
+                elif required == "empty":
+                    if isinstance(value, list) and len(value) == 0:
+                        errors.append((type_name, idx, field_name, "required", None, file_path))
+
+                if convert is not None:
+                    if type(value) is not exact_type:
+                        try:
+                            value = convert(value)
+                            entry[field_name] = value
+                            self.converted = True
+                        except (ValueError, TypeError):
+                            errors.append((type_name, idx, field_name, type_code, value, file_path))
+                elif kind == "bool":
+                    if not isinstance(value, bool):
+                        if isinstance(value, str):
+                            entry[field_name] = value.lower() in TRUE_STRINGS
+                            self.converted = True
+                        elif isinstance(value, int):
+                            entry[field_name] = value != 0
+                            self.converted = True
+                        else:
+                            errors.append((type_name, idx, field_name, type_code, value, file_path))
+                elif kind == "array":
+                    if not isinstance(value, list):
+                        errors.append((type_name, idx, field_name, type_code, value, file_path))
+
+                if seen is not None:
+                    try:
+                        if value in seen:
+                            errors.append((type_name, idx, field_name, "not_unique", value, file_path))
+                        seen.add(value)
+                    except TypeError:
+                        # Unhashable, so already reported as of the wrong type
+                        pass
+
+                for op, bound in checks:
+                    if op == "min":
+                        failed = value < bound
+                    elif op == "max":
+                        failed = value > bound
+                    elif op == "max_length":
+                        failed = isinstance(value, str) and len(value) > bound
+                    else:
+                        try:
+                            failed = value not in (bound[0] if bound[0] is not None else bound[1])
+                        except TypeError:
+                            failed = value not in bound[1]
+                    if failed:
+                        errors.append((type_name, idx, field_name, op, value, file_path))
+
+            if len(errors) >= error_limit:
+                raise ErrorLimitReached()
 
     def _validate_cross_references(self) -> None:
-        """Validate references between types"""
+        """Validate references between types, indexing each one in reverse, then
+        warn about entries nothing refers to"""
         print("\nValidating cross-references...")
+        keys = {type_name: id_keys(references.ids) for type_name, references in self.type_references.items()}
 
-        # StoryGroup internal references
-        if "StoryGroup" in self.all_objects:
-            for obj_id, obj in self.all_objects["StoryGroup"].items():
-                # stories -> Story.story_id
-                value = obj.get("stories")
-                if value:
-                    for ref_id in value:
-                        if ref_id not in self.all_objects.get("Story", {}):
-                            self.errors.append(f"StoryGroup.{obj_id}.stories references missing Story.{ref_id}")
-        # MediaPostGroup internal references
-        if "MediaPostGroup" in self.all_objects:
-            for obj_id, obj in self.all_objects["MediaPostGroup"].items():
-                # group_id -> StoryGroup.group_id
-                value = obj.get("group_id")
-                if value is not None and value not in self.all_objects.get("StoryGroup", {}):
-                    self.errors.append(f"MediaPostGroup.{obj_id}.group_id references missing StoryGroup.{value}")
-                # story_posts -> StoryPosts.story_id
-                value = obj.get("story_posts")
-                if value:
-                    for ref_id in value:
-                        if ref_id not in self.all_objects.get("StoryPosts", {}):
-                            self.errors.append(f"MediaPostGroup.{obj_id}.story_posts references missing StoryPosts.{ref_id}")
-        # StoryPosts internal references
-        if "StoryPosts" in self.all_objects:
-            for obj_id, obj in self.all_objects["StoryPosts"].items():
-                # story_id -> Story.story_id
-                value = obj.get("story_id")
-                if value is not None and value not in self.all_objects.get("Story", {}):
-                    self.errors.append(f"StoryPosts.{obj_id}.story_id references missing Story.{value}")
-                # posts -> SocialMediaPost.post_id
-                value = obj.get("posts")
-                if value:
-                    for ref_id in value:
-                        if ref_id not in self.all_objects.get("SocialMediaPost", {}):
-                            self.errors.append(f"StoryPosts.{obj_id}.posts references missing SocialMediaPost.{ref_id}")
+        for type_name, checks in REFERENCE_CHECKS:
+            if type_name in self.type_references:
+                self._check_references(type_name, checks, keys)
+
+        for type_name in PLANS:
+            sources = self.reference_index.sources(type_name)
+            if type_name in ROOT_TYPES or not sources or type_name not in keys:
+                continue
+            ids = keys[type_name]
+            orphans = self.reference_index.orphans(type_name, ids)
+            print(f"  {type_name}: {len(ids)} entries, {self.reference_index.total(type_name)} references, "
+                  f"{len(orphans)} unreferenced")
+            for obj_id in orphans:
+                self.warnings.append(f"{type_name}.{obj_id} is not referenced by {' or '.join(sources)}")
+
+    def _check_references(self, type_name: str, checks: tuple, keys: Dict[str, dict]) -> None:
+        """Run one group of REFERENCE_CHECKS over the entries of a type, adding
+        their references to the reference index. keys holds the ids of each type.
+        Every entry with an id is checked, even where entries share an id."""
+        references = self.type_references[type_name]
+        ids = references.ids
+        columns = [references.column(check.field_name) for check in checks]
+
+        found = True
+        for check, column in zip(checks, columns):
+            targets, sources = self.reference_index.relation(type_name, check.field_name, check.target_type)
+            start = len(targets)
+            if check.is_many:
+                for obj_id, value in zip(ids, column):
+                    # Anything but an array was reported as such and references nothing
+                    if value and isinstance(value, list):
+                        targets.extend(value)
+                        sources.extend(repeat(obj_id, len(value)))
+            else:
+                present = [value is not None for value in column]
+                targets.extend(compress(column, present))
+                sources.extend(compress(ids, present))
+            # Membership of the whole reference column first; entries are only gone
+            # through one by one, for errors in entry order, if an id is missing
+            found = _all_found(targets[start:], keys.get(check.target_type, {})) and found
+        if found:
+            return
 
+        table = [(check, column, keys.get(check.target_type, {})) for check, column in zip(checks, columns)]
+        for row, obj_id in enumerate(ids):
+            for check, column, target_keys in table:
+                value = column[row]
+                if check.is_many:
+                    if not value or not isinstance(value, list):
+                        continue
+                elif value is None:
+                    continue
+                else:
+                    value = (value,)
+                for ref_id in value:
+                    try:
+                        found = ref_id in target_keys
+                    except TypeError:
+                        # Unhashable, so not an id
+                        found = False
+                    if not found:
+                        self._add_error((type_name, obj_id, check.field_name, check.code, ref_id, None))
+
+    def _validate_uniqueness(self) -> None:
+        """Report unique values that an earlier file already had"""
+        print("\nValidating uniqueness across files...")
+        for error in self.unique_index.duplicates:
+            self._add_error(error)
 
     def _print_results(self) -> bool:
         """Print validation results and return success status"""
@@ -427,9 +1216,12 @@ class DataValidator:
                 print(f"  - {warning}")
 
         if self.errors:
-            print(f"\n✗ {len(self.errors)} Error(s):")
+            if self.stopped_early:
+                print(f"\n✗ Stopped after {len(self.errors)} Error(s), remaining checks skipped:")
+            else:
+                print(f"\n✗ {len(self.errors)} Error(s):")
             for error in self.errors:
-                print(f"  • {error}")
+                print(f"  • {format_error(error)}")
             print("\n" + "=" * 60)
             print("VALIDATION FAILED")
             return False
@@ -441,17 +1233,47 @@ class DataValidator:
             print("=" * 60)
             return True
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python validate_data.py <file1.json> [file2.json] ...")
-        print("\nExample:")
-        print("  python validate_data.py papers.json media_posts.json")
-        sys.exit(1)
+def _validate_file_job(path: str, max_errors: Optional[int], cache: bool, stream: bool) -> tuple:
+    """Validate one file in a worker process. Returns its errors, warnings and
+    printed output, {type: (ids, reference columns)} for the cross-reference pass
+    and {type: unique columns} for the unique index."""
+    validator = DataValidator(max_errors=max_errors, cache=cache, stream=stream)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            validator._load_and_validate_file(path)
+        except ErrorLimitReached:
+            pass
+    # Nothing else in a worker uses the file, and the worker outlives it
+    forget_dataset(path)
 
-    validator = DataValidator()
-    file_paths = sys.argv[1:]
+    index = {type_name: (references.ids, references.columns)
+             for type_name, references in validator.type_references.items()}
+    return validator.errors, validator.warnings, output.getvalue(), index, validator.file_uniques
 
-    success = validator.validate_files(file_paths)
+def main():
+    parser = argparse.ArgumentParser(description="Validate JSON data files against the schema",
+                                     epilog="Example: python validate_data.py papers.json media_posts.json")
+    parser.add_argument("files", nargs="+", help="JSON data files")
+    parser.add_argument("--max-errors", type=int, metavar="N",
+                        help="stop validating after N errors")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="stop at the first error")
+    reading = parser.add_mutually_exclusive_group()
+    reading.add_argument("--cache", action="store_true",
+                         help=f"skip the field checks of entries unchanged since the last run "
+                              f"(kept in <file>{CACHE_SUFFIX})")
+    reading.add_argument("--stream", action="store_true",
+                         help="read files incrementally, keeping only ids and references in memory; "
+                              "errors are listed in file order")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="validate files in N worker processes")
+    args = parser.parse_args()
+
+    validator = DataValidator(max_errors=args.max_errors, fail_fast=args.fail_fast, cache=args.cache,
+                              jobs=args.jobs, stream=args.stream)
+
+    success = validator.validate_files(args.files)
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
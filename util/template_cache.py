@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Precompiled Jinja templates for the generator
+Each template is compiled once to a Python module named by the hash of its source
+and imported from there afterwards, with its bytecode in __pycache__: a warm run
+neither parses the template nor compiles the module
+"""
+import hashlib
+import importlib.util
+import os
+import py_compile
+import re
+from pathlib import Path
+from typing import Any, List, Optional
+
+import jinja2
+from jinja2 import Environment, FileSystemLoader
+
+# Next to the templates, ignored by git
+COMPILED_DIR_NAME = ".compiled"
+
+
+class PrecompiledLoader(FileSystemLoader):
+    """FileSystemLoader that loads templates from the modules compiled in
+    compiled_path, compiling those missing or out of date first. A module is
+    out of date when the template source, the jinja2 version or the options the
+    environment parses with have changed: all are in its file name hash."""
+
+    def __init__(self, searchpath: Any, compiled_path: Any):
+        super().__init__(searchpath)
+        self.compiled_path = Path(compiled_path)
+
+    def module_path(self, environment: Environment, name: str, source: str) -> Path:
+        options = (jinja2.__version__, environment.trim_blocks, environment.lstrip_blocks,
+                   environment.keep_trailing_newline, environment.newline_sequence)
+        digest = hashlib.sha256(f"{options!r}\n{source}".encode("utf-8")).hexdigest()[:16]
+        return self.compiled_path / f"{re.sub(r'[^0-9A-Za-z]', '_', name)}_{digest}.py"
+
+    def load(self, environment: Environment, name: str, globals: Optional[dict] = None):
+        source, filename, _ = self.get_source(environment, name)
+        module_path = self.module_path(environment, name, source)
+
+        if not module_path.exists():
+            code = environment.compile(source, name, filename, raw=True, defer_init=True)
+            self.compiled_path.mkdir(parents=True, exist_ok=True)
+            # Modules of earlier versions of the template, and their bytecode
+            stem = module_path.stem[:-16]
+            for stale in self.compiled_path.glob(f"{stem}{'?' * 16}.py"):
+                Path(importlib.util.cache_from_source(str(stale))).unlink(missing_ok=True)
+                stale.unlink()
+            # Written aside and moved in place, so a parallel run never imports half a module
+            partial = module_path.with_suffix(f".{os.getpid()}.tmp")
+            partial.write_text(code, "utf-8")
+            os.replace(partial, module_path)
+
+        # Written here rather than left to the import, which skips it under
+        # PYTHONDONTWRITEBYTECODE; a new Python version gets its own file
+        if not os.path.exists(importlib.util.cache_from_source(str(module_path))):
+            py_compile.compile(str(module_path), doraise=True)
+
+        spec = importlib.util.spec_from_file_location(module_path.stem, module_path)
+        module = importlib.util.module_from_spec(spec)  # pyright: ignore[reportArgumentType]
+        spec.loader.exec_module(module)  # pyright: ignore[reportOptionalMemberAccess]
+        template = environment.template_class.from_module_dict(
+            environment, module.__dict__, environment.make_globals(globals)
+        )
+        # Render errors point at the template source rather than the compiled module
+        template.filename = filename
+        return template
+
+
+def compile_templates(environment: Environment) -> List[str]:
+    """Compile every template of an environment ahead of time, and return their names"""
+    # Not the compiled modules, which are under the template directory too
+    names = environment.list_templates(extensions=["j2"])
+    for name in names:
+        environment.get_template(name)
+    return names
+
+
+if __name__ == "__main__":
+    import sys
+    from generate_from_schema import SchemaGenerator
+
+    if len(sys.argv) < 2:
+        print("Usage: python template_cache.py <schema.yaml> [templates_dir]")
+        sys.exit(1)
+
+    generator = SchemaGenerator(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "templates")
+    for name in compile_templates(generator.env):
+        print(f"  {name}")
+    print(f"Compiled templates to {generator.env.loader.compiled_path}")  # pyright: ignore
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+UTIL_DIR = Path(__file__).resolve().parent.parent
+
+# The generator and its helpers, and the generated scripts, import their siblings
+sys.path[:0] = [str(UTIL_DIR), str(UTIL_DIR / "scripts")]
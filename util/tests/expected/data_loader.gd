@@ -0,0 +1,185 @@
+class_name DataLoader
+extends RefCounted
+
+
+static var Shelf_array:Array[GeneratedDataClasses.Shelf] = []
+static var Book_array:Array[GeneratedDataClasses.Book] = []
+
+# Lookups kept after loading: {id: object} for types with a unique id field, and
+# {value: Array of objects} for the fields listed under `index:` in the schema,
+# where an array field is indexed by each of its elements
+static var Shelf_by_shelf_id:Dictionary = {}
+static var Book_by_book_id:Dictionary = {}
+static var Book_by_shelf_id:Dictionary = {}
+static var Book_by_tags:Dictionary = {}
+
+static func _clear() -> void:
+	"""Empty the arrays and lookups, so that loading again does not keep the objects of the last load"""
+	Shelf_array.clear()
+	Shelf_by_shelf_id.clear()
+	Book_array.clear()
+	Book_by_book_id.clear()
+	Book_by_shelf_id.clear()
+	Book_by_tags.clear()
+
+static func _load_data(json_path: String, external_data: Dictionary = {}) -> Dictionary:
+	""" [WARN] Do not use this function directly! """
+	var file = FileAccess.open(json_path, FileAccess.READ)
+	if not file:
+		push_error("Failed to open: " + json_path)
+		return {}
+
+	var json_text = file.get_as_text()
+	file.close()
+
+	var json = JSON.new()
+	var error = json.parse(json_text)
+	if error != OK:
+		push_error("JSON parse error: " + json.get_error_message())
+		return {}
+
+	var data = json.data
+	var result = {}
+	var all_objects = {}
+
+	if data.has("Shelf"):
+		var shelf_list: Array[GeneratedDataClasses.Shelf] = []
+		var shelf_by_id = {}
+		for entry in data["Shelf"]:
+			var obj := GeneratedDataClasses.Shelf.new(entry)
+			var errors = obj.validate()
+			if errors.size() > 0:
+				push_warning("Validation errors: " + str(errors))
+			shelf_list.append(obj)
+			Shelf_array.append(obj)
+			if entry.has("shelf_id"):
+				var id_val:int = entry["shelf_id"]
+				shelf_by_id[id_val] = obj
+				Shelf_by_shelf_id[id_val] = obj
+		result["Shelf"] = shelf_list
+		all_objects["Shelf"] = shelf_by_id
+
+	if data.has("Book"):
+		var book_list: Array[GeneratedDataClasses.Book] = []
+		var book_by_id = {}
+		for entry in data["Book"]:
+			var obj := GeneratedDataClasses.Book.new(entry)
+			var errors = obj.validate()
+			if errors.size() > 0:
+				push_warning("Validation errors: " + str(errors))
+			book_list.append(obj)
+			Book_array.append(obj)
+			if entry.has("book_id"):
+				var id_val:int = entry["book_id"]
+				book_by_id[id_val] = obj
+				Book_by_book_id[id_val] = obj
+			if obj.shelf_id != null:
+				Book_by_shelf_id.get_or_add(obj.shelf_id, []).append(obj)
+			if obj.tags != null:
+				for value in obj.tags:
+					Book_by_tags.get_or_add(value, []).append(obj)
+		result["Book"] = book_list
+		all_objects["Book"] = book_by_id
+
+	var ref_errors = _validate_references(all_objects, external_data)
+	if ref_errors.size() > 0:
+		for err in ref_errors:
+			push_warning("Reference error: " + err)
+
+	# Resolve all references automatically
+	_resolve_all_references(result, all_objects)
+	
+	return result
+
+static func _resolve_all_references(result: Dictionary, all_objects: Dictionary) -> void:
+	"""Automatically resolve all ID references to object references"""
+
+	# Resolve references in Shelf
+	if result.has("Shelf"):
+		for obj in result["Shelf"]:
+			# Resolve book_ids -> Array[Book]
+			if obj.book_ids != null and all_objects.has("Book"):
+				for ref_id in obj.book_ids:
+					var resolved_obj = all_objects["Book"].get(ref_id)
+					if resolved_obj:
+						obj.book_ids_resolved.append(resolved_obj)
+	
+	# Resolve references in Book
+	if result.has("Book"):
+		for obj in result["Book"]:
+			# Resolve shelf_id -> Shelf
+			if obj.shelf_id != null and all_objects.has("Shelf"):
+				obj.shelf_id_resolved = all_objects["Shelf"].get(obj.shelf_id)
+	
+
+static func _validate_references(all_objects: Dictionary, _external_data: Dictionary) -> Array[String]:
+	var errors: Array[String] = []
+	
+	# Shelf internal references
+	if all_objects.has("Shelf"):
+		for obj in all_objects["Shelf"].values():
+			# book_ids -> Book.book_id
+			if obj.book_ids != null:
+				for ref_id in obj.book_ids:
+					if not all_objects.get("Book", {}).has(ref_id):
+						errors.append("Shelf." + str(obj.shelf_id) + ".book_ids references missing Book." + str(ref_id))
+	
+	# Book internal references
+	if all_objects.has("Book"):
+		for obj in all_objects["Book"].values():
+			# shelf_id -> Shelf.shelf_id
+			if obj.shelf_id != null:
+				if not all_objects.get("Shelf", {}).has(obj.shelf_id):
+					errors.append("Book." + str(obj.book_id) + ".shelf_id references missing Shelf." + str(obj.shelf_id))
+	
+	return errors
+
+static var full_data:Dictionary = {}
+
+static func _check_uniqueness(type_name: String, objects: Array, path: String, first_seen: Dictionary) -> void:
+	"""Warn about unique values seen before, in this file or an earlier one, with where they were first seen"""
+	if type_name == "Shelf":
+		var seen_shelf_id: Dictionary = first_seen.get_or_add("Shelf.shelf_id", {})
+		for i in objects.size():
+			var value = objects[i].shelf_id
+			if value == null:
+				continue
+			var location = "%s[%d]" % [path, i]
+			var first = seen_shelf_id.get_or_add(value, location)
+			if first != location:
+				push_warning("Uniqueness error: Shelf[%d].shelf_id '%s' in %s was first seen at %s" % [i, str(value), path, first])
+	if type_name == "Book":
+		var seen_book_id: Dictionary = first_seen.get_or_add("Book.book_id", {})
+		for i in objects.size():
+			var value = objects[i].book_id
+			if value == null:
+				continue
+			var location = "%s[%d]" % [path, i]
+			var first = seen_book_id.get_or_add(value, location)
+			if first != location:
+				push_warning("Uniqueness error: Book[%d].book_id '%s' in %s was first seen at %s" % [i, str(value), path, first])
+
+static func load_multiple_files(file_paths: Array[String]) -> void:
+	_clear()
+	var combined = {}
+	var external_lookup = {}
+	# "Type.field" -> {value: "path[index]" where it was first seen}
+	var first_seen = {}
+	
+	for path in file_paths:
+		var data = _load_data(path, external_lookup)
+		for type_name in data.keys():
+			_check_uniqueness(type_name, data[type_name], path, first_seen)
+			if not combined.has(type_name):
+				combined[type_name] = []
+			combined[type_name].append_array(data[type_name])
+			
+			var lookup = {}
+			for obj in data[type_name]:
+				if type_name == "Shelf" and "shelf_id" in obj:
+					lookup[obj.shelf_id] = obj
+				if type_name == "Book" and "book_id" in obj:
+					lookup[obj.book_id] = obj
+			external_lookup[type_name] = lookup
+	
+	full_data = combined
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import re
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from conftest import UTIL_DIR
+from generate_from_schema import SchemaError, SchemaGenerator
+
+# What the templates render for SCHEMA; rewritten by running the tests with UPDATE_EXPECTED=1
+EXPECTED_DATA_LOADER = Path(__file__).parent / "expected" / "data_loader.gd"
+
+SCHEMA = """
+types:
+  Shelf:
+    fields:
+      shelf_id:
+        type: int
+        constraints:
+          - unique
+          - required
+      book_ids:
+        type: array<int>
+        constraints:
+          - references_many: Book.book_id
+
+  Book:
+    index:
+      - shelf_id
+      - tags
+    fields:
+      book_id:
+        type: int
+        constraints:
+          - unique
+          - required
+      shelf_id:
+        type: int
+        constraints:
+          - references: Shelf.shelf_id
+      tags:
+        type: array<string>
+"""
+
+
+def render_data_loader(tmp_path, schema: str = SCHEMA) -> str:
+    schema_path = tmp_path / "schema.yaml"
+    schema_path.write_text(textwrap.dedent(schema), "utf-8")
+    generator = SchemaGenerator(str(schema_path), str(UTIL_DIR / "templates"), str(tmp_path / "compiled"))
+    output_path = tmp_path / "data_loader.gd"
+    generator.generate_data_loader(output_path)
+    return output_path.read_text("utf-8")
+
+
+def function_body(source: str, name: str) -> str:
+    match = re.search(rf"^static func {name}\(.*?(?=^static |\Z)", source, re.M | re.S)
+    assert match, f"{name} not found"
+    return match.group(0)
+
+
+def test_matches_expected_output(tmp_path):
+    source = render_data_loader(tmp_path)
+    if os.environ.get("UPDATE_EXPECTED"):
+        EXPECTED_DATA_LOADER.write_text(source, "utf-8")
+    assert source == EXPECTED_DATA_LOADER.read_text("utf-8")
+
+
+def test_lookups_are_declared(tmp_path):
+    source = render_data_loader(tmp_path)
+    declared = re.findall(r"^static var (\w+_by_\w+):Dictionary = \{\}$", source, re.M)
+    # Unique ids, then the index fields of each type
+    assert declared == ["Shelf_by_shelf_id", "Book_by_book_id", "Book_by_shelf_id", "Book_by_tags"]
+
+
+def test_lookups_are_filled(tmp_path):
+    body = function_body(render_data_loader(tmp_path), "_load_data")
+    assert "Shelf_by_shelf_id[id_val] = obj" in body
+    assert "Book_by_book_id[id_val] = obj" in body
+    assert "Book_by_shelf_id.get_or_add(obj.shelf_id, []).append(obj)" in body
+    # An array field is indexed by each of its elements
+    assert re.search(r"for value in obj\.tags:\n\t+Book_by_tags\.get_or_add\(value, \[\]\)\.append\(obj\)",
+                     body)
+    assert "Shelf_by_book_ids" not in body
+
+
+def test_lookups_are_cleared_before_loading(tmp_path):
+    source = render_data_loader(tmp_path)
+    clear = function_body(source, "_clear")
+    for name in ("Shelf_array", "Book_array", "Shelf_by_shelf_id", "Book_by_book_id", "Book_by_shelf_id",
+                 "Book_by_tags"):
+        assert f"\t{name}.clear()" in clear
+    load = function_body(source, "load_multiple_files")
+    assert load.splitlines()[1] == "\t_clear()"
+
+
+def test_non_unique_id_has_no_id_lookup(tmp_path):
+    schema = SCHEMA.replace("          - unique\n          - required\n      shelf_id:\n        type: int\n"
+                            "        constraints:\n          - references",
+                            "          - required\n      shelf_id:\n        type: int\n"
+                            "        constraints:\n          - references")
+    assert schema != SCHEMA
+    source = render_data_loader(tmp_path, schema)
+    assert "Book_by_book_id" not in source
+    assert "static var Book_by_shelf_id:Dictionary = {}" in source
+
+
+@pytest.mark.parametrize("index", ["book_id", "missing", "shelf_id\n      - shelf_id"])
+def test_index_must_list_non_unique_fields_once(tmp_path, index):
+    schema = SCHEMA.replace("      - shelf_id\n      - tags", f"      - {index}")
+    with pytest.raises(SchemaError, match="'index' lists fields"):
+        render_data_loader(tmp_path, schema)
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from dataset import Dataset, forget_dataset, load_dataset
+
+
+def make_dataset() -> Dataset:
+    return Dataset({
+        "MediaPostGroup": [
+            {"group_id": 1, "story_posts": [10, 11]},
+            {"group_id": 2, "story_posts": [11]},
+            {"group_id": 3},
+        ],
+        "StoryPosts": [
+            {"story_id": 10, "posts": [100]},
+            {"story_id": 11, "posts": [101]},
+            {"story_id": 10, "posts": [102]},
+            "not an entry",
+            {"posts": [103]},
+        ],
+    })
+
+
+def test_lookup_lists_every_entry_with_the_value():
+    dataset = make_dataset()
+    entries = dataset.entries("StoryPosts")
+    lookup = dataset.lookup("StoryPosts", "story_id")
+    assert lookup == {10: [entries[0], entries[2]], 11: [entries[1]]}
+
+
+def test_lookup_of_array_field_is_by_element():
+    dataset = make_dataset()
+    groups = dataset.entries("MediaPostGroup")
+    lookup = dataset.lookup("MediaPostGroup", "story_posts")
+    assert lookup == {10: [groups[0]], 11: [groups[0], groups[1]]}
+
+
+def test_lookup_is_built_once_until_invalidated():
+    dataset = make_dataset()
+    lookup = dataset.lookup("StoryPosts", "story_id")
+    assert dataset.lookup("StoryPosts", "story_id") is lookup
+
+    dataset.entries("StoryPosts").append({"story_id": 12, "posts": []})
+    dataset.invalidate()
+    assert 12 in dataset.lookup("StoryPosts", "story_id")
+
+
+def test_lookup_skips_unhashable_values():
+    dataset = Dataset({"StoryPosts": [{"story_id": [1, 2]}, {"story_id": 3}]})
+    assert list(dataset.lookup("StoryPosts", "story_id")) == [3]
+
+
+def test_lookup_of_field_not_indexed_raises():
+    with pytest.raises(KeyError):
+        make_dataset().lookup("StoryPosts", "posts")
+
+
+def test_load_dataset_parses_again_once_forgotten(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"StoryPosts": [{"story_id": 1}]}), "utf-8")
+    try:
+        dataset = load_dataset(str(path))
+        assert load_dataset(str(path)) is dataset
+
+        forget_dataset(str(path))
+        reloaded = load_dataset(str(path))
+        assert reloaded is not dataset
+        assert reloaded.data == dataset.data
+        assert reloaded.data is not dataset.data
+    finally:
+        forget_dataset(str(path))
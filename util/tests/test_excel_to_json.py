@@ -0,0 +1,142 @@
+import datetime
+import re
+import zipfile
+
+import openpyxl
+import pytest
+from openpyxl.cell.rich_text import CellRichText, TextBlock
+from openpyxl.cell.text import InlineFont
+
+import excel_to_json
+from conftest import UTIL_DIR
+
+DATA_XLSX = str(UTIL_DIR / "data.xlsx")
+
+
+@pytest.fixture
+def converted(tmp_path):
+    """The output of a cached conversion of data.xlsx, and its cache"""
+    output_path = tmp_path / "data.json"
+    excel_to_json.excel_to_json(DATA_XLSX, str(output_path), cache=True)
+    return output_path, tmp_path / ("data.json" + excel_to_json.CACHE_SUFFIX)
+
+
+@pytest.mark.parametrize("keep_lines", [0, 1, 2])
+def test_cut_short_cache_is_decoded_again(converted, keep_lines, capsys):
+    output_path, cache_path = converted
+    expected = output_path.read_bytes()
+    lines = cache_path.read_text("utf-8").splitlines(keepends=True)
+    # A header and some of the sheets, or half a line, as a killed run would leave
+    cache_path.write_text("".join(lines[:keep_lines]) + lines[keep_lines][:40], "utf-8")
+    output_path.write_text("{}", "utf-8")
+    capsys.readouterr()
+
+    excel_to_json.excel_to_json(DATA_XLSX, str(output_path), cache=True)
+    assert output_path.read_bytes() == expected
+    assert "decoded" in capsys.readouterr().out
+    assert cache_path.read_text("utf-8").splitlines(keepends=True) == lines
+
+
+def test_cache_of_other_script_is_not_reused(converted, monkeypatch, capsys):
+    output_path, _ = converted
+    output_path.write_text("{}", "utf-8")
+    monkeypatch.setattr(excel_to_json, "CODE_HASH", "0" * 16)
+    capsys.readouterr()
+
+    excel_to_json.excel_to_json(DATA_XLSX, str(output_path), cache=True)
+    assert "Reused 0 cached sheet(s)" in capsys.readouterr().out
+
+
+def tricky_workbook(path, write_only: bool = False) -> None:
+    """A sheet of the values the readers cast differently: dates and times, formulas,
+    rich and padded text, references, line breaks, gaps and missing rows"""
+    wb = openpyxl.Workbook(write_only=write_only)
+    ws = wb.create_sheet("Tricky") if write_only else wb.active
+    ws.title = "Tricky"
+    for row in [
+        ["id", "text", "number", "flag", "when"],
+        ["description"],
+        [1, "plain", 1.5, True, datetime.datetime(2024, 2, 29, 13, 45)],
+        [2, "  padded  ", -3, False, datetime.date(1900, 1, 1)],
+        [3, "a & b < c > d \"q\" 'a'", 1e20, None, datetime.time(6, 30)],
+        [4, "line\nbreak\r\nwindows", 0, True, datetime.timedelta(hours=30)],
+        [5, "=1+2", "x005F_x", "TRUE", "2024-01-01"],
+        [6, ""],
+        [],
+        [8, "ünïcödé ✓", 12345678901234, False],
+    ]:
+        ws.append(row)
+    if not write_only:
+        ws["B12"] = CellRichText(["rich ", TextBlock(InlineFont(b=True), "bold"), " text"])
+        ws["E14"] = 42
+        ws["D15"] = "=SUM(A3:A4)"
+    wb.save(path)
+
+
+def sheet_rows(path, reader: str) -> dict:
+    """Rows of every sheet, without the trailing empty cells openpyxl pads them with"""
+    wb = excel_to_json.open_workbook(str(path), reader)
+    try:
+        rows = {}
+        for name in wb.sheetnames:
+            rows[name] = []
+            for row in wb[name].iter_rows(values_only=True):
+                row = list(row)
+                while row and row[-1] is None:
+                    row.pop()
+                rows[name].append(tuple(row))
+        return rows
+    finally:
+        wb.close()
+
+
+def rewrite_sheets(source, target, rewrite) -> None:
+    """Copy of a workbook with rewrite(xml bytes) applied to each worksheet"""
+    with zipfile.ZipFile(source) as zin, zipfile.ZipFile(target, "w") as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename.startswith("xl/worksheets/sheet"):
+                data = rewrite(data)
+            zout.writestr(item, data)
+
+
+def prefixed(xml: bytes) -> bytes:
+    xml = xml.replace(b'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"',
+                      b'xmlns:x="http://schemas.openxmlformats.org/spreadsheetml/2006/main"')
+    return re.sub(rb"<(/?)([A-Za-z]\w*)(?=[\s/>])", rb"<\1x:\2", xml)
+
+
+SHEET_REWRITES = {
+    "as written": lambda xml: xml,
+    "prefixed": prefixed,
+    "comment": lambda xml: xml.replace(b"</row>", b"</row><!-- </row> -->", 1),
+    "doctype": lambda xml: re.sub(rb"(<\?xml[^>]*>)?", rb"\1<!DOCTYPE worksheet>", xml, count=1),
+    "line ends": lambda xml: xml.replace(b"\n", b"\r\n"),
+}
+
+
+@pytest.mark.parametrize("rewrite", SHEET_REWRITES)
+@pytest.mark.parametrize("write_only", [False, True])
+def test_fast_reader_reads_what_openpyxl_reads(tmp_path, monkeypatch, write_only, rewrite):
+    written = tmp_path / "written.xlsx"
+    tricky_workbook(written, write_only)
+    path = tmp_path / "tricky.xlsx"
+    rewrite_sheets(written, path, SHEET_REWRITES[rewrite])
+    # Batches of a row or two, to cut the sheet data everywhere
+    monkeypatch.setattr(excel_to_json, "_ROW_BATCH_SIZE", 64)
+    assert sheet_rows(path, "fast") == sheet_rows(path, "openpyxl")
+
+
+def test_fast_reader_reads_data_xlsx_like_openpyxl():
+    assert sheet_rows(DATA_XLSX, "fast") == sheet_rows(DATA_XLSX, "openpyxl")
+
+
+@pytest.mark.parametrize("reader", excel_to_json.READERS)
+@pytest.mark.parametrize("mode", [{}, {"stream": True}, {"jobs": 2}, {"stream": True, "jobs": 2},
+                                  {"cache": True}])
+def test_data_xlsx_converts_the_same_every_way(tmp_path, reader, mode):
+    expected_path = tmp_path / "expected.json"
+    excel_to_json.excel_to_json(DATA_XLSX, str(expected_path))
+    output_path = tmp_path / "data.json"
+    excel_to_json.excel_to_json(DATA_XLSX, str(output_path), reader=reader, **mode)
+    assert output_path.read_bytes() == expected_path.read_bytes()
@@ -0,0 +1,73 @@
+import json
+import zipfile
+
+import openpyxl
+import pytest
+
+import excel_to_json
+import json_to_excel
+from conftest import UTIL_DIR
+
+TEMPLATE_XLSX = str(UTIL_DIR / "data.xlsx")
+
+
+def sheet_values(path, type_name: str) -> list:
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return [list(row) for row in wb[type_name].iter_rows(min_row=3, values_only=True)]
+    finally:
+        wb.close()
+
+
+def header(type_name: str) -> list:
+    wb = openpyxl.load_workbook(TEMPLATE_XLSX, read_only=True)
+    try:
+        return list(next(wb[type_name].iter_rows(max_row=1, values_only=True)))
+    finally:
+        wb.close()
+
+
+@pytest.mark.parametrize("engine", json_to_excel.ENGINES)
+def test_non_finite_numbers_are_written_empty(tmp_path, engine):
+    json_path = tmp_path / "data.json"
+    entries = [{"post_id": value, "user_name": "u", "content_text": str(row)}
+               for row, value in enumerate([float("nan"), float("inf"), float("-inf"), 1.5])]
+    json_path.write_text(json.dumps({"SocialMediaPost": entries}), "utf-8")
+    output_path = tmp_path / "out.xlsx"
+
+    json_to_excel.json_to_excel(str(json_path), TEMPLATE_XLSX, str(output_path), engine=engine)
+    column = header("SocialMediaPost").index("post_id")
+    rows = sheet_values(output_path, "SocialMediaPost")[:len(entries)]
+    assert [row[column] for row in rows] == [None, None, None, 1.5]
+
+
+def test_xml_engine_output_does_not_depend_on_jobs(tmp_path):
+    json_path = tmp_path / "data.json"
+    json_path.write_text(json.dumps({
+        "Story": [{"story_id": i, "news_headline": f"headline {i % 3}", "news_content": "same",
+                   "news_fake": bool(i % 2)} for i in range(50)],
+        "SocialMediaPost": [{"post_id": i, "user_name": "same", "content_text": f"post {i}"}
+                            for i in range(50)],
+    }), "utf-8")
+
+    outputs = []
+    for jobs in (1, 2):
+        output_path = tmp_path / f"out_{jobs}.xlsx"
+        json_to_excel.json_to_excel(str(json_path), TEMPLATE_XLSX, str(output_path), engine="xml", jobs=jobs)
+        with zipfile.ZipFile(output_path) as zf:
+            outputs.append({name: zf.read(name) for name in zf.namelist()})
+    assert outputs[0] == outputs[1]
+
+
+@pytest.mark.parametrize("engine", json_to_excel.ENGINES)
+def test_data_survives_a_round_trip(tmp_path, engine):
+    json_path = tmp_path / "data.json"
+    excel_to_json.excel_to_json(TEMPLATE_XLSX, str(json_path))
+    expected = json_path.read_bytes()
+    output_path = tmp_path / "out.xlsx"
+
+    json_to_excel.json_to_excel(str(json_path), TEMPLATE_XLSX, str(output_path), engine=engine)
+    for reader in excel_to_json.READERS:
+        round_trip_path = tmp_path / f"round_trip_{reader}.json"
+        excel_to_json.excel_to_json(str(output_path), str(round_trip_path), reader=reader)
+        assert round_trip_path.read_bytes() == expected
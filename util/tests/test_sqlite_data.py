@@ -0,0 +1,62 @@
+import json
+import sqlite3
+
+import pytest
+
+import sqlite_data
+from validate_data import DataValidator, format_error
+
+CODES = ("not_unique", "duplicate", "missing_reference", "missing_external_reference")
+
+DATA = {
+    "StoryGroup": [
+        {"group_id": 1, "stories": [10, 11]},
+        {"group_id": 1, "stories": [11, 99]},
+    ],
+    "Story": [
+        {"story_id": 10, "news_headline": "a", "news_content": "a", "news_fake": False},
+        {"story_id": 11, "news_headline": "b", "news_content": "b", "news_fake": True},
+        {"story_id": 10, "news_headline": "c", "news_content": "c", "news_fake": False},
+    ],
+    "MediaPostGroup": [
+        {"group_id": 1, "story_posts": [10]},
+        {"group_id": 7, "story_posts": [12]},
+    ],
+    "StoryPosts": [
+        {"story_id": 10, "posts": [100, 101]},
+        {"story_id": 12, "posts": [101, 9999]},
+        # A repeated id: its references are checked too
+        {"story_id": 12, "posts": [8888]},
+    ],
+    "SocialMediaPost": [
+        {"post_id": 100, "user_name": "u", "content_text": "x"},
+        {"post_id": 101, "user_name": "u", "content_text": "x"},
+        {"post_id": 100, "user_name": "v", "content_text": "y"},
+    ],
+}
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(DATA), "utf-8")
+    return str(path)
+
+
+def test_reports_the_errors_of_the_validator(tmp_path, data_path):
+    validator = DataValidator()
+    assert not validator.validate_files([data_path])
+    expected = [format_error(error) for error in validator.errors if error[3] in CODES]
+
+    db_path = str(tmp_path / "data.db")
+    sqlite_data.load(db_path, data_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        errors = sqlite_data.uniqueness_errors(conn, db_path) + sqlite_data.reference_errors(conn)
+    finally:
+        conn.close()
+    # Duplicates point at where the value was first seen, the database rather than the file
+    found = [format_error(error).replace(db_path, data_path) for error in errors]
+
+    assert {"not_unique", "duplicate", "missing_reference"} <= {error[3] for error in errors}
+    assert found == expected
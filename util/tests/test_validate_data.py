@@ -0,0 +1,95 @@
+import functools
+import json
+from pathlib import Path
+
+import pytest
+
+import validate_data
+from dataset import forget_dataset, share_dataset
+from validate_data import DataValidator
+
+
+def test_converting_values_invalidates_the_shared_dataset(tmp_path):
+    data = {
+        "Story": [{"story_id": "10", "news_headline": "a", "news_content": "a", "news_fake": "true"}],
+        "StoryPosts": [{"story_id": "10", "posts": [100]}],
+        "SocialMediaPost": [{"post_id": 100, "user_name": "u", "content_text": "x"}],
+    }
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(data), "utf-8")
+    dataset = share_dataset(str(path), data)
+    try:
+        assert list(dataset.lookup("StoryPosts", "story_id")) == ["10"]
+        assert DataValidator().validate_files([str(path)])
+        # The entries were converted where they are, and the lookups follow them
+        assert data["Story"][0]["news_fake"] is True
+        assert list(dataset.lookup("StoryPosts", "story_id")) == [10]
+        assert dataset.get("Story", 10) is data["Story"][0]
+    finally:
+        forget_dataset(str(path))
+
+
+def write_data_with_errors(path) -> None:
+    """Enough entries for several blocks, with a mistake of each kind among them"""
+    stories = [{"story_id": i, "news_headline": f"headline {i}", "news_content": "content",
+                "news_fake": bool(i % 2)} for i in range(1, 40)]
+    stories[3]["story_id"] = 3
+    stories[5]["news_fake"] = "maybe"
+    del stories[7]["news_headline"]
+    stories[9]["news_content"] = "x" * 1001
+    data = {
+        "StoryGroup": [{"group_id": 1, "stories": [1, 2, 2, 99]}],
+        "Story": stories,
+        "MediaPostGroup": [{"group_id": 1, "story_posts": [1, 5]}],
+        "StoryPosts": [{"story_id": 1, "posts": [100, 101]}, {"story_id": 77, "posts": []}],
+        "SocialMediaPost": [{"post_id": 100, "user_name": "u", "content_text": "x"},
+                            {"post_id": "abc", "user_name": "u", "content_text": "y"}],
+    }
+    path.write_text(json.dumps(data, indent=2), "utf-8")
+
+
+def validate(path, **options) -> tuple:
+    forget_dataset(str(path))
+    validator = DataValidator(**options)
+    try:
+        return validator.validate_files([str(path)]), validator.error_messages()
+    finally:
+        forget_dataset(str(path))
+
+
+@pytest.fixture
+def data_with_errors(tmp_path, monkeypatch):
+    # Blocks of a few entries and stream chunks of a few characters, so every
+    # entry and token lands on a boundary somewhere
+    monkeypatch.setattr(validate_data, "BLOCK_SIZE", 4)
+    monkeypatch.setattr(validate_data, "JsonStream", functools.partial(validate_data.JsonStream, chunk_size=7))
+    path = tmp_path / "data.json"
+    write_data_with_errors(path)
+    return path
+
+
+def test_stream_reports_what_loading_reports(data_with_errors):
+    valid, errors = validate(data_with_errors)
+    assert not valid
+    assert len(errors) >= 8
+    assert validate(data_with_errors, stream=True) == (valid, errors)
+
+
+def test_cache_reports_what_a_full_run_reports(data_with_errors, capsys):
+    cache_path = Path(str(data_with_errors) + validate_data.CACHE_SUFFIX)
+    expected = validate(data_with_errors)
+
+    assert validate(data_with_errors, cache=True) == expected
+    assert cache_path.exists()
+    capsys.readouterr()
+    assert validate(data_with_errors, cache=True) == expected
+    assert "Reused the checks of 0 " not in capsys.readouterr().out
+
+    # An edit mends one entry and breaks another; the rest comes from the cache
+    data = json.loads(data_with_errors.read_text("utf-8"))
+    data["Story"][3]["story_id"] = 4000
+    data["Story"][20]["news_headline"] = None
+    data_with_errors.write_text(json.dumps(data, indent=2), "utf-8")
+    edited = validate(data_with_errors)
+    assert edited != expected
+    assert validate(data_with_errors, cache=True) == edited